@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Splitter Module
+Cắt hàng loạt video đã tải trong cả một cây thư mục: duyệt thư mục dạng generator,
+probe và cắt song song qua một pool giới hạn, bỏ qua file đã cắt đủ đoạn
+
+Chạy: python batch_splitter.py <thư mục> [--workers 4] [--ext .mp4 .mkv] [--output downloads]
+"""
+
+import os
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import mp4_parser
+from config import config
+from video_splitter import VideoSplitter
+
+logger = logging.getLogger(__name__)
+
+
+def iter_video_files(root, extensions=None, exclude_dirs=()):
+    """
+    Duyệt cây thư mục và trả dần từng file video (không liệt kê toàn bộ trước)
+
+    Args:
+        root: Thư mục gốc
+        extensions: Các đuôi file được nhận (mặc định Config.BATCH_EXTENSIONS)
+        exclude_dirs: Các thư mục bỏ qua (ví dụ thư mục output)
+
+    Yields:
+        str: Đường dẫn file video
+    """
+    extensions = tuple(ext.lower() for ext in (extensions or config.BATCH_EXTENSIONS))
+    excluded = {os.path.abspath(d) for d in exclude_dirs}
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        # Thư mục có manifest là thư mục chứa các đoạn đã cắt
+                        if (os.path.abspath(entry.path) not in excluded
+                                and not os.path.exists(os.path.join(entry.path, config.SEGMENT_MANIFEST_NAME))):
+                            pending.append(entry.path)
+                    elif entry.name.lower().endswith(extensions) and entry.is_file():
+                        yield entry.path
+        except OSError as e:
+            logger.warning(f"Không đọc được thư mục {directory}: {e}")
+
+
+class BatchSplitter:
+    """Cắt nhiều file qua một pool worker dùng chung"""
+
+    def __init__(self, max_workers=None, output_path=None, progress_callback=None, log_callback=None):
+        """
+        Khởi tạo BatchSplitter
+
+        Args:
+            max_workers: Số file xử lý song song (mặc định Config.BATCH_MAX_WORKERS)
+            output_path: Thư mục output của VideoSplitter
+            progress_callback: Hàm nhận dict thống kê sau mỗi file
+            log_callback: Hàm ghi log ra giao diện
+        """
+        self.max_workers = max_workers or config.BATCH_MAX_WORKERS
+        self.splitter = VideoSplitter()
+        if output_path:
+            self.splitter.output_path = Path(output_path)
+            self.splitter.output_path.mkdir(parents=True, exist_ok=True)
+        self.progress_callback = progress_callback
+        self.log_callback = log_callback
+        self.stop_flag = False
+        self._lock = threading.Lock()
+        self.stats = {'found': 0, 'done': 0, 'skipped': 0, 'failed': 0, 'segments': 0}
+
+    def log(self, message):
+        logger.info(message)
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def stop(self):
+        self.stop_flag = True
+
+    def _record(self, key, segments=0):
+        with self._lock:
+            self.stats[key] += 1
+            self.stats['segments'] += segments
+            snapshot = dict(self.stats)
+        if self.progress_callback:
+            self.progress_callback(snapshot)
+        return snapshot
+
+    def output_title(self, video_path, root=None):
+        """
+        Tên thư mục output/manifest của một file trong lô
+
+        Tên file kèm mã ngắn của đường dẫn tương đối tới thư mục gốc, để các file
+        trùng tên ở thư mục con khác nhau (hoặc khác đuôi) không ghi đè lên nhau
+        """
+        relative = os.path.relpath(video_path, root) if root else os.path.abspath(video_path)
+        digest = hashlib.sha1(Path(relative).as_posix().encode('utf-8')).hexdigest()[:8]
+        return f"{Path(video_path).stem}_{digest}"
+
+    def process_file(self, video_path, root=None):
+        """Probe rồi cắt một file; trả về ('done'|'skipped'|'failed', số đoạn)"""
+        title = self.output_title(video_path, root)
+        if self.splitter.is_split_complete(video_path, title):
+            return 'skipped', 0
+        try:
+            probe = mp4_parser.probe(video_path)
+        except Exception as e:
+            self.log(f"❌ Không probe được {video_path}: {e}")
+            return 'failed', 0
+        if not any(s.get('codec_type') == 'video' for s in probe['streams']):
+            self.log(f"❌ Không có stream video: {video_path}")
+            return 'failed', 0
+
+        # Dùng lại kết quả probe, VideoSplitter không phải probe lần nữa
+        result = self.splitter.split_video(video_path, title, title, probe=probe)
+        if result['success']:
+            return 'done', result['segments_count']
+        self.log(f"❌ Lỗi cắt {video_path}: {result['error']}")
+        return 'failed', 0
+
+    def run(self, root, extensions=None):
+        """
+        Cắt toàn bộ video trong cây thư mục
+
+        Args:
+            root: Thư mục gốc
+            extensions: Các đuôi file được nhận
+
+        Returns:
+            dict: Thống kê tổng (found, done, skipped, failed, segments)
+        """
+        started = time.perf_counter()
+        files = iter_video_files(root, extensions, exclude_dirs=[self.splitter.output_path])
+        in_flight = {}
+        # Chỉ giữ số job vừa đủ cho pool để generator vẫn duyệt thư mục dần dần
+        window = self.max_workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch_split') as pool:
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and not self.stop_flag and len(in_flight) < window:
+                    video_path = next(files, None)
+                    if video_path is None:
+                        exhausted = True
+                        break
+                    with self._lock:
+                        self.stats['found'] += 1
+                    in_flight[pool.submit(self.process_file, video_path, root)] = video_path
+                if self.stop_flag:
+                    exhausted = True
+                if not in_flight:
+                    break
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    video_path = in_flight.pop(future)
+                    try:
+                        status, segments = future.result()
+                    except Exception as e:
+                        logger.error(f"Lỗi xử lý {video_path}: {e}", exc_info=True)
+                        status, segments = 'failed', 0
+                    snapshot = self._record(status, segments)
+                    processed = snapshot['done'] + snapshot['skipped'] + snapshot['failed']
+                    self.log(f"[{processed}/{snapshot['found']}{'+' if not exhausted else ''}] "
+                             f"{status}: {os.path.basename(video_path)}")
+
+        self.stats['elapsed'] = time.perf_counter() - started
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cắt hàng loạt video trong một thư mục")
+    parser.add_argument('folder', help="Thư mục chứa video")
+    parser.add_argument('--workers', type=int, default=config.BATCH_MAX_WORKERS, help="Số file xử lý song song")
+    parser.add_argument('--ext', nargs='+', default=config.BATCH_EXTENSIONS, help="Các đuôi file được nhận")
+    parser.add_argument('--output', default=config.OUTPUT_PATH, help="Thư mục lưu các đoạn")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        print(f"❌ Không tìm thấy thư mục: {args.folder}")
+        return 1
+
+    print("=== CẮT VIDEO HÀNG LOẠT ===")
+    batch = BatchSplitter(max_workers=args.workers, output_path=args.output)
+    try:
+        stats = batch.run(args.folder, args.ext)
+    except KeyboardInterrupt:
+        batch.stop()
+        stats = batch.stats
+    print(f"\n✅ Xong: {stats['done']} file đã cắt ({stats['segments']} đoạn), "
+          f"{stats['skipped']} file bỏ qua, {stats['failed']} file lỗi")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
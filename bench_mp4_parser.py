@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark so sánh mp4_parser với ffmpeg.probe
+Chạy: python bench_mp4_parser.py [file1.mp4 file2.mov ...] [--iterations N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import ffmpeg
+import mp4_parser
+
+
+def create_sample_video(output_dir):
+    """Tạo video mẫu 60 giây bằng lavfi khi không truyền file vào"""
+    sample_path = os.path.join(output_dir, 'bench_sample.mp4')
+    (
+        ffmpeg
+        .output(
+            ffmpeg.input('testsrc2=size=1280x720:rate=30', f='lavfi', t=60),
+            ffmpeg.input('sine=frequency=440', f='lavfi', t=60),
+            sample_path,
+            vcodec='libx264', acodec='aac', preset='ultrafast', g=60
+        )
+        .overwrite_output()
+        .run(quiet=True)
+    )
+    return sample_path
+
+
+def time_calls(func, path, iterations):
+    """Đo thời gian trung bình (ms) của một hàm probe"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(path)
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def benchmark_file(path, iterations):
+    parser_ms = time_calls(lambda p: mp4_parser.parse_mp4(p).to_ffprobe_dict(), path, iterations)
+    probe_ms = time_calls(ffmpeg.probe, path, iterations)
+    keyframe_ms = time_calls(mp4_parser.get_keyframe_times, path, iterations)
+
+    parsed = mp4_parser.probe(path)
+    probed = ffmpeg.probe(path)
+    duration_diff = abs(float(parsed['format']['duration']) - float(probed['format']['duration']))
+
+    print(f"📁 {os.path.basename(path)}")
+    print(f"  mp4_parser.probe : {parser_ms:8.2f} ms")
+    print(f"  ffmpeg.probe     : {probe_ms:8.2f} ms")
+    print(f"  keyframe times   : {keyframe_ms:8.2f} ms")
+    print(f"  Tăng tốc         : {probe_ms / parser_ms:8.1f}x")
+    print(f"  Lệch thời lượng  : {duration_diff:.4f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mp4_parser vs ffmpeg.probe")
+    parser.add_argument('files', nargs='*', help="Các file MP4/MOV cần đo")
+    parser.add_argument('--iterations', type=int, default=20, help="Số lần chạy mỗi phép đo")
+    args = parser.parse_args()
+
+    print("=== BENCHMARK MP4 PARSER ===")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = args.files or [create_sample_video(temp_dir)]
+        for path in files:
+            if not mp4_parser.is_mp4_file(path):
+                print(f"⚠️  Bỏ qua file không phải MP4: {path}")
+                continue
+            benchmark_file(path, args.iterations)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
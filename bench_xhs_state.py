@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark tách note từ trang explore Xiaohongshu: bộ quét một lượt (xhs_state) so với các regex DOTALL cũ
+Chạy: python bench_xhs_state.py [trang1.html trang2.html ...] [--note-id ID] [--iterations N]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+import xhs_state
+from test_xhs_state import NOTE_ID, build_page
+
+
+def legacy_find_note(html, note_id):
+    """Cách tìm cũ của get_note_info: thử lần lượt các regex .*? DOTALL trên cả trang"""
+    patterns = [
+        r'window\.__INITIAL_STATE__\s*=\s*(\{.*?\});',
+        r'window\.__INITIAL_SSR_STATE__\s*=\s*(\{.*?\});',
+        r'window\.__NUXT__\s*=\s*(\{.*?\});',
+        r'"noteDetailMap":\s*(\{[^}]*"' + re.escape(note_id) + r'"[^}]*\})',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, html, re.DOTALL)
+        if not match:
+            continue
+        try:
+            if 'noteDetailMap' in pattern:
+                note_match = re.search(r'"' + re.escape(note_id) + r'":\s*(\{.*?\}(?=,"[a-f0-9]{24}"|\}))', html, re.DOTALL)
+                if note_match:
+                    return json.loads(note_match.group(1))
+            else:
+                state = json.loads(match.group(1))
+                note_detail_map = state.get('note', {}).get('noteDetailMap', {})
+                if note_id in note_detail_map:
+                    return note_detail_map[note_id]
+        except ValueError:
+            continue
+    return None
+
+
+def scanner_find_note(html, note_id):
+    state = xhs_state.parse_state(html)
+    return xhs_state.find_note(state, note_id) if state is not None else None
+
+
+def time_calls(func, html, note_id, iterations):
+    """Đo thời gian trung bình (ms) và trả về kết quả lần chạy cuối"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func(html, note_id)
+    return (time.perf_counter() - start) * 1000 / iterations, result
+
+
+def benchmark_page(name, html, note_id, iterations):
+    legacy_ms, legacy_note = time_calls(legacy_find_note, html, note_id, iterations)
+    scanner_ms, scanner_note = time_calls(scanner_find_note, html, note_id, iterations)
+
+    print(f"📄 {name} ({len(html) / 1024:.0f} KB)")
+    print(f"  Regex DOTALL cũ : {legacy_ms:8.2f} ms  ({'tìm thấy' if legacy_note else 'không tìm thấy'})")
+    print(f"  Quét một lượt   : {scanner_ms:8.2f} ms  ({'tìm thấy' if scanner_note else 'không tìm thấy'})")
+    print(f"  Tăng tốc        : {legacy_ms / scanner_ms:8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tách state Xiaohongshu")
+    parser.add_argument('pages', nargs='*', help="Các trang explore đã lưu (.html)")
+    parser.add_argument('--note-id', help="ID note cần tìm (mặc định lấy từ tên file)")
+    parser.add_argument('--iterations', type=int, default=20, help="Số lần chạy mỗi phép đo")
+    args = parser.parse_args()
+
+    print("=== BENCHMARK XIAOHONGSHU STATE ===")
+    if args.pages:
+        for path in args.pages:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                html = f.read()
+            note_id = args.note_id or os.path.splitext(os.path.basename(path))[0]
+            benchmark_page(os.path.basename(path), html, note_id, args.iterations)
+    else:
+        # Trang giả lập với số note khác nhau trong noteDetailMap và các dạng state thường gặp
+        variants = [
+            ("có undefined", {}),
+            ("JSON thuần", {'undefined': False}),
+            ("không có ';'", {'undefined': False, 'terminator': ''}),
+        ]
+        for filler_notes in (10, 200, 2000):
+            for label, options in variants:
+                html = build_page(filler_notes=filler_notes, **options)
+                benchmark_page(f"mẫu {filler_notes} note, {label}", html, NOTE_ID, args.iterations)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark XiaohongshuDownloader offline qua xhs_replay_server: số note/giây, thời gian parse trang
+và tốc độ tải media (byte/giây), ở lượt đầu (chưa có cache) và lượt sau (cache note, kho ảnh)
+Chạy: python bench_xiaohongshu.py [--fixtures DIR] [--notes N] [--latency S] [--bandwidth MB/s] [--error-rate P]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import xhs_state
+from config import config
+from xiaohongshu_downloader import XiaohongshuDownloader
+from xhs_replay_server import ReplayServer, synthesize_fixtures
+
+
+def benchmark_parse(fixture_dir, iterations):
+    """Thời gian parse state + tìm note trung bình của các trang trong fixture (ms/trang, MB/s)"""
+    pages = sorted(Path(fixture_dir, 'pages').glob('*.html'))
+    if not pages:
+        return None
+    total_bytes = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for path in pages:
+            html = path.read_text(encoding='utf-8')
+            total_bytes += len(html)
+            state = xhs_state.parse_state(html)
+            assert state is not None and xhs_state.find_note(state, path.stem), f"Không parse được {path.name}"
+    seconds = time.perf_counter() - start
+    return seconds * 1000 / (iterations * len(pages)), total_bytes / seconds / 1048576
+
+
+def run_batch(downloader, server, urls, workers):
+    """Tải cả lô, trả về (số note thành công, thời gian, số byte media server đã gửi)"""
+    server.reset_stats()
+    start = time.perf_counter()
+    results = list(downloader.download_batch(urls, max_workers=workers))
+    seconds = time.perf_counter() - start
+    succeeded = sum(1 for _, result in results if result['success'])
+    return succeeded, seconds, server.stats['media_bytes']
+
+
+def report(label, urls, succeeded, seconds, media_bytes, server):
+    print(f"🚀 {label}")
+    print(f"  Note thành công : {succeeded}/{len(urls)}")
+    print(f"  Thời gian       : {seconds:8.2f} s")
+    print(f"  Note/giây       : {len(urls) / seconds:8.2f}")
+    print(f"  Media           : {media_bytes / 1048576:8.1f} MB  ({media_bytes / seconds / 1048576:.2f} MB/s)")
+    print(f"  Request         : {server.stats['requests']} (lỗi giả lập {server.stats['errors']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark XiaohongshuDownloader với server phát lại cục bộ")
+    parser.add_argument('--fixtures', help="Thư mục fixture đã ghi (mặc định tạo fixture giả lập)")
+    parser.add_argument('--notes', type=int, default=20, help="Số note giả lập khi không có --fixtures")
+    parser.add_argument('--video-mb', type=float, default=4, help="Kích thước video giả lập (MB)")
+    parser.add_argument('--latency', type=float, default=0.02, help="Độ trễ mỗi response (giây)")
+    parser.add_argument('--bandwidth', type=float, help="Băng thông mỗi response (MB/s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Tỉ lệ request trả 503 (0-1)")
+    parser.add_argument('--workers', type=int, default=config.XIAOHONGSHU_MAX_WORKERS, help="Số note tải song song")
+    parser.add_argument('--iterations', type=int, default=5, help="Số lần parse mỗi trang")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help="Hiện log của downloader")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fixture_dir = args.fixtures
+        if not fixture_dir:
+            fixture_dir = os.path.join(temp_dir, 'fixtures')
+            synthesize_fixtures(fixture_dir, notes=args.notes, video_size=int(args.video_mb * 1048576), seed=args.seed)
+
+        # Cache, thống kê và thư mục tải riêng cho benchmark, không đụng tới dữ liệu thật
+        config.XIAOHONGSHU_NOTE_CACHE_DIR = os.path.join(temp_dir, 'notes')
+        config.XIAOHONGSHU_STATS_FILE = os.path.join(temp_dir, 'stats.json')
+        config.XIAOHONGSHU_SHORT_LINK_CACHE = os.path.join(temp_dir, 'xhslink.json')
+        config.XIAOHONGSHU_IMAGE_STORE_DIR = None
+
+        bandwidth = args.bandwidth * 1048576 if args.bandwidth else None
+        with ReplayServer(fixture_dir, args.latency, bandwidth, args.error_rate, args.seed) as server:
+            config.XIAOHONGSHU_WEB_BASE = config.XIAOHONGSHU_EDITH_BASE = server.url
+            urls = [f'https://www.xiaohongshu.com/explore/{note_id}' for note_id in server.note_ids()]
+
+            print("=== BENCHMARK XIAOHONGSHU (OFFLINE) ===")
+            print(f"📁 {len(urls)} note, độ trễ {args.latency * 1000:.0f} ms, "
+                  f"băng thông {f'{args.bandwidth} MB/s' if args.bandwidth else 'không giới hạn'}, "
+                  f"lỗi {args.error_rate:.0%}, {args.workers} worker")
+
+            parse = benchmark_parse(fixture_dir, args.iterations)
+            if parse:
+                print(f"🔍 Parse trang    : {parse[0]:8.2f} ms/trang  ({parse[1]:.1f} MB/s)")
+
+            with XiaohongshuDownloader(os.path.join(temp_dir, 'downloads')) as downloader:
+                report("Lượt đầu (chưa có cache)", urls, *run_batch(downloader, server, urls, args.workers), server)
+
+                # Lượt sau: note lấy từ cache, file đã đủ byte được bỏ qua, ảnh lấy từ kho
+                report("Lượt sau (có cache)", urls, *run_batch(downloader, server, urls, args.workers), server)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Clip Engine Module
+Cắt một đoạn video chính xác: seek nhanh tới keyframe ngay trước điểm bắt đầu,
+chỉ decode phần pre-roll ngắn rồi cắt audio và video cùng một mốc thời gian
+"""
+
+import re
+import time
+import bisect
+import logging
+
+import ffmpeg
+import mp4_parser
+from config import config
+from encoder_tuning import get_encoder_settings
+from ffmpeg_scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Dòng thống kê cuối cùng của ffmpeg: "frame= 600 fps=120 ... speed=4.01x"
+FPS_PATTERN = re.compile(r'fps=\s*([\d.]+)')
+SPEED_PATTERN = re.compile(r'speed=\s*([\d.]+)x')
+
+
+class ClipEngine:
+    """Cắt clip từ một file nguồn, dùng bảng keyframe đọc trực tiếp từ MP4"""
+
+    def __init__(self, input_file):
+        """
+        Khởi tạo ClipEngine
+
+        Args:
+            input_file: File video nguồn
+        """
+        self.input_file = str(input_file)
+        self._keyframes = None
+
+    @property
+    def keyframes(self):
+        """Keyframe của nguồn; rỗng nếu không phải MP4 (khi đó ffmpeg tự tìm keyframe khi seek)"""
+        if self._keyframes is None:
+            try:
+                self._keyframes = mp4_parser.parse_mp4(self.input_file).keyframe_times()
+            except (mp4_parser.Mp4ParseError, OSError, ValueError) as e:
+                logger.debug(f"Không đọc được keyframe, để ffmpeg tự seek: {e}")
+                self._keyframes = []
+        return self._keyframes
+
+    def prior_keyframe(self, time_point):
+        """Keyframe gần nhất tại hoặc trước time_point (None nếu không biết)"""
+        index = bisect.bisect_right(self.keyframes, time_point + config.KEYFRAME_TOLERANCE)
+        if index == 0:
+            return None
+        return self.keyframes[index - 1]
+
+    def encoder_options(self):
+        """Tham số encode cho clip (theo profile đã hiệu chỉnh nếu có)"""
+        settings = get_encoder_settings()
+        options = {
+            'vcodec': config.VIDEO_CODEC,
+            'acodec': config.AUDIO_CODEC,
+            'preset': settings['preset'],
+            'crf': settings['crf'],
+        }
+        if settings['threads']:
+            options['threads'] = settings['threads']
+        return options
+
+    def render(self, output_file, start, duration):
+        """
+        Cắt clip [start, start + duration) và encode lại
+
+        Args:
+            output_file: File đầu ra
+            start: Thời điểm bắt đầu (giây)
+            duration: Thời lượng clip (giây)
+
+        Returns:
+            dict: Thống kê gồm điểm seek, độ dài pre-roll, thời gian chạy, tốc độ encode
+        """
+        keyframe = self.prior_keyframe(start)
+        if keyframe is None:
+            # Seek trước input: ffmpeg tự nhảy tới keyframe gần nhất và bỏ phần pre-roll
+            seek_point, preroll = start, 0.0
+            input_stream = ffmpeg.input(self.input_file, ss=start, t=duration)
+            output_args = {}
+        else:
+            # Seek nhanh tới keyframe, chỉ decode pre-roll rồi cắt cả audio lẫn video ở phía output
+            seek_point, preroll = keyframe, start - keyframe
+            input_stream = ffmpeg.input(self.input_file, ss=keyframe)
+            output_args = {'ss': preroll, 't': duration}
+
+        options = self.encoder_options()
+        with get_scheduler().slot(encode=True, threads=options.get('threads')) as slot:
+            options['threads'] = slot.threads
+            started = time.perf_counter()
+            _, stderr = slot.run(
+                ffmpeg
+                .output(
+                    input_stream['v'],
+                    input_stream['a?'],
+                    str(output_file),
+                    movflags='faststart',
+                    **output_args,
+                    **options
+                )
+                .overwrite_output(),
+                quiet=True, capture_stdout=True, capture_stderr=True
+            )
+            elapsed = time.perf_counter() - started
+
+        stats = {
+            'seek_point': seek_point,
+            'preroll': preroll,
+            'duration': duration,
+            'elapsed': elapsed,
+            'speed': duration / elapsed if elapsed > 0 else 0.0,
+            'encode_fps': None,
+        }
+        log_text = stderr.decode('utf-8', errors='ignore') if stderr else ''
+        fps_values = FPS_PATTERN.findall(log_text)
+        speed_values = SPEED_PATTERN.findall(log_text)
+        if fps_values:
+            stats['encode_fps'] = float(fps_values[-1])
+        if speed_values:
+            stats['speed'] = float(speed_values[-1])
+        return stats
@@ -42,7 +42,99 @@ class Config:
     
     # Đường dẫn output cho VideoSplitter
     OUTPUT_PATH = "downloads"
-
+    
+    # Tên file manifest lưu kế hoạch cắt (seed, các đoạn, kích thước, checksum) trong thư mục output
+    SEGMENT_MANIFEST_NAME = "segments_manifest.json"
+    
+    # Kiểm tra checksum các đoạn đã có khi chạy lại (False = chỉ so sánh kích thước)
+    VERIFY_SEGMENT_CHECKSUM = True
+    
+    # Kiểm tra cấu trúc, thời lượng, stream của các đoạn sau khi cắt (không decode) và cắt lại đoạn lỗi
+    VERIFY_SEGMENTS = True
+    
+    # Sai lệch thời lượng cho phép so với kế hoạch (giây) - stream copy lệch theo khoảng cách keyframe
+    VERIFY_DURATION_TOLERANCE = 3.0
+    
+    # Số luồng kiểm tra đoạn song song
+    VERIFY_MAX_WORKERS = 4
+    
+    # Chế độ tạo đoạn video:
+    # "copy" - stream copy, nhanh nhưng điểm cắt rơi vào keyframe
+    # "smart" - chỉ encode lại từ điểm cắt tới keyframe kế tiếp, copy phần còn lại
+    # "reencode" - encode lại toàn bộ đoạn, chính xác nhưng chậm
+    # "virtual" - không ghi file đoạn, chỉ ghi index vùng byte/mốc thời gian (xuất đoạn bằng virtual_split.py)
+    SPLIT_MODE = "copy"
+    
+    # Tạo ảnh thumbnail và contact sheet cho mỗi đoạn ngay trong lượt ffmpeg tạo đoạn
+    SEGMENT_THUMBNAILS = False
+    
+    # Độ rộng ảnh thumbnail/ô contact sheet (pixel) và lưới contact sheet (cột x hàng)
+    THUMBNAIL_WIDTH = 320
+    CONTACT_SHEET_COLUMNS = 4
+    CONTACT_SHEET_ROWS = 4
+    
+    # Cắt hàng loạt cả thư mục (batch_splitter.py): số file xử lý song song và đuôi file được nhận
+    BATCH_MAX_WORKERS = 4
+    BATCH_EXTENSIONS = [".mp4", ".mkv", ".webm", ".mov"]
+    
+    # Tạo mỗi đoạn ở nhiều độ phân giải trong một lượt decode (mỗi rendition một thư mục con)
+    ENABLE_RENDITION_LADDER = False
+    
+    # Các rendition: bỏ qua mức lớn hơn nguồn; crf/preset bỏ trống thì dùng profile encoder
+    RENDITION_LADDER = [
+        {"name": "1080p", "height": 1080, "crf": 21, "preset": "medium", "maxrate": "6M", "bufsize": "12M", "audio_bitrate": "192k"},
+        {"name": "720p", "height": 720, "crf": 22, "preset": "medium", "maxrate": "3M", "bufsize": "6M", "audio_bitrate": "128k"},
+        {"name": "480p", "height": 480, "crf": 23, "preset": "fast", "maxrate": "1500k", "bufsize": "3M", "audio_bitrate": "96k"},
+    ]
+    
+    # Xuất đoạn dọc 9:16 (short) ngay trong lượt encode tạo đoạn, lưu ở thư mục con "vertical"
+    VERTICAL_EXPORT = False
+    VERTICAL_WIDTH = 1080
+    VERTICAL_HEIGHT = 1920
+    
+    # Cách đưa về khung dọc: "center" (cắt giữa), "detect" (bỏ viền đen rồi cắt giữa), "pad" (giữ cả khung, thêm viền)
+    VERTICAL_CROP_MODE = "center"
+    
+    # Ngưỡng điểm ảnh được coi là đen khi dò viền (0-255)
+    CROPDETECT_LIMIT = 24
+    
+    # Tên file index khi chia ảo (SPLIT_MODE = "virtual")
+    VIRTUAL_INDEX_NAME = "virtual_index.json"
+    
+    # Sai số (giây) để coi điểm cắt trùng với keyframe
+    KEYFRAME_TOLERANCE = 0.001
+    
+    # Cắt trong lúc tải: ffmpeg đọc thẳng luồng media và ghi ra các đoạn, không lưu file gốc
+    STREAM_SPLIT = False
+    
+    # Chu kỳ kiểm tra đoạn mới hoàn thành khi cắt trong lúc tải (giây)
+    STREAM_SPLIT_POLL_INTERVAL = 1.0
+    
+    # Cách chọn điểm cắt:
+    # "random" - độ dài ngẫu nhiên trong khoảng MIN_CUT_TIME-MAX_CUT_TIME
+    # "scene" - ưu tiên điểm chuyển cảnh gần nhất trong khoảng, không có thì ngẫu nhiên
+    # "silence" - ưu tiên giữa các khoảng lặng của audio (hợp với video nói chuyện)
+    CUT_PLANNER = "random"
+    
+    # Điểm scene (0-1) tối thiểu để coi là chuyển cảnh rõ
+    SCENE_CHANGE_THRESHOLD = 0.4
+    
+    # Mức âm lượng (dBFS) dưới ngưỡng này được coi là im lặng
+    SILENCE_THRESHOLD_DB = -40
+    
+    # Khoảng lặng ngắn nhất được dùng làm điểm cắt (giây)
+    SILENCE_MIN_DURATION = 0.4
+    
+    # Tần số lấy mẫu audio mono khi phân tích và độ dài cửa sổ tính RMS (giây)
+    ANALYSIS_SAMPLE_RATE = 8000
+    SILENCE_WINDOW = 0.05
+    
+    # Độ rộng khung hình khi phân tích (decode độ phân giải thấp cho nhanh)
+    ANALYSIS_WIDTH = 160
+    
+    # Thư mục cache kết quả phân tích (theo đường dẫn, kích thước, mtime của file nguồn)
+    ANALYSIS_CACHE_DIR = "cache/analysis"
+    
     # ===== CẤU HÌNH XIAOHONGSHU =====
     # Thư mục lưu video Xiaohongshu
     XIAOHONGSHU_OUTPUT_DIR = "downloads/xiaohongshu"
@@ -53,6 +145,51 @@ class Config:
     # Số lần thử lại khi tải thất bại
     XIAOHONGSHU_RETRY_COUNT = 3
     
+    # Địa chỉ trang web và API edith (đổi sang xhs_replay_server khi chạy benchmark offline)
+    XIAOHONGSHU_WEB_BASE = "https://www.xiaohongshu.com"
+    XIAOHONGSHU_EDITH_BASE = "https://edith.xiaohongshu.com"
+    
+    # Số link Xiaohongshu tải song song trong một lượt
+    XIAOHONGSHU_MAX_WORKERS = 4
+    
+    # Cache vĩnh viễn mã link rút gọn xhslink.com -> note ID
+    XIAOHONGSHU_SHORT_LINK_CACHE = "cache/xhslink_cache.json"
+    
+    # Số ảnh của một note được tải cùng lúc
+    XIAOHONGSHU_IMAGE_WORKERS = 6
+    
+    # Định dạng ảnh ưu tiên khi không biết kích thước (thường nhỏ dần: avif < webp < jpg)
+    XIAOHONGSHU_IMAGE_FORMATS = ['avif', 'webp', 'jpg', 'png']
+    
+    # Hỏi kích thước từng bản ảnh (request một byte) để chọn bản ít byte nhất
+    XIAOHONGSHU_PROBE_IMAGE_VARIANTS = True
+    
+    # Kho ảnh theo hash nội dung, ảnh trùng được hardlink (None = thư mục .image_store trong thư mục tải)
+    XIAOHONGSHU_IMAGE_STORE_DIR = None
+    
+    # Số request đồng thời tối đa cho mỗi host trang/API (xiaohongshu.com, edith...) và mỗi host CDN media
+    XIAOHONGSHU_PAGE_HOST_LIMIT = 2
+    XIAOHONGSHU_CDN_HOST_LIMIT = 4
+    
+    # Gửi thêm request lấy note bằng cách khác nếu cách đang chạy chậm hơn số giây này (None = thử lần lượt)
+    XIAOHONGSHU_HEDGE_DELAY = None
+    
+    # File lưu thống kê thành công/độ trễ của các cách lấy note và hệ số làm mượt EWMA
+    XIAOHONGSHU_STATS_FILE = "cache/xiaohongshu_strategy_stats.json"
+    XIAOHONGSHU_STATS_ALPHA = 0.2
+    
+    # Cache thông tin note: metadata giữ lâu, URL media có chữ ký hết hạn sớm (giây)
+    XIAOHONGSHU_NOTE_CACHE_DIR = "cache/xiaohongshu_notes"
+    XIAOHONGSHU_NOTE_TTL = 7 * 24 * 3600
+    XIAOHONGSHU_MEDIA_URL_TTL = 30 * 60
+    
+    # Tải media: file từ mức này trở lên được chia phần tải song song qua HTTP Range
+    XIAOHONGSHU_PARALLEL_MIN_SIZE = 8 * 1024 * 1024
+    XIAOHONGSHU_DOWNLOAD_PARTS = 4
+    
+    # Kích thước mỗi lần đọc/ghi khi tải (byte)
+    XIAOHONGSHU_DOWNLOAD_BUFFER = 1024 * 1024
+    
     # User Agent cho Xiaohongshu
     XIAOHONGSHU_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
@@ -80,6 +217,34 @@ class Config:
     # CRF (Constant Rate Factor) - chất lượng video (0-51, thấp hơn = chất lượng cao hơn)
     CRF_VALUE = 18
     
+    # ===== CẤU HÌNH TINH CHỈNH ENCODER =====
+    # File profile do encoder_tuning.py tạo ra; khi có profile, ENCODING_PRESET/CRF_VALUE chỉ là giá trị dự phòng
+    ENCODER_PROFILE_PATH = "encoder_profile.json"
+    
+    # Mục tiêu khi chọn tham số encode từ profile: "speed", "balanced", "size"
+    ENCODING_TARGET = "balanced"
+    
+    # Ngưỡng SSIM tối thiểu để một cấu hình được chọn
+    ENCODER_MIN_SSIM = 0.97
+    
+    # Lưới tham số khi hiệu chỉnh
+    CALIBRATION_PRESETS = ["ultrafast", "veryfast", "faster", "medium", "slow"]
+    CALIBRATION_CRF_VALUES = [18, 21, 23, 26]
+    CALIBRATION_THREADS = [1, 2, 4, 0]  # 0 = để ffmpeg tự chọn
+    
+    # Độ dài mỗi clip dùng để đo (giây)
+    CALIBRATION_CLIP_SECONDS = 10
+    
+    # ===== CẤU HÌNH LẬP LỊCH FFMPEG =====
+    # Tổng số core dành cho mọi job ffmpeg (None = số core trừ 1 để giao diện không bị treo)
+    FFMPEG_CPU_BUDGET = None
+    
+    # Số job ffmpeg chạy đồng thời tối đa (các job còn lại xếp hàng)
+    FFMPEG_MAX_JOBS = 2
+    
+    # Mức nice của tiến trình ffmpeg trên Linux/macOS (Windows dùng BELOW_NORMAL)
+    FFMPEG_NICENESS = 10
+    
     # ===== CẤU HÌNH YT-DLP =====
     # Format selector cho từng độ phân giải
     FORMAT_SELECTORS = {
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cut Planner Module
+Tìm điểm cắt "đẹp" cho VideoSplitter: phân tích nguồn một lần (chuyển cảnh hoặc khoảng lặng),
+cache kết quả theo file và trả về các thời điểm nên cắt
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+from pathlib import Path
+
+import ffmpeg
+from config import config
+from ffmpeg_scheduler import get_scheduler
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Đầu ra của filter metadata=print: "frame:12 pts:12 pts_time:0.4" rồi "lavfi.scene_score=0.53"
+PTS_TIME_PATTERN = re.compile(r'pts_time:([\d.]+)')
+SCENE_SCORE_PATTERN = re.compile(r'lavfi\.scene_score=([\d.]+)')
+
+# Đầu ra của filter cropdetect (log mức info): "... crop=640:352:0:4"
+CROPDETECT_PATTERN = re.compile(r'crop=(\d+):(\d+):(\d+):(\d+)')
+
+# Số cửa sổ RMS đọc mỗi lần từ pipe (bộ nhớ cố định, không phụ thuộc độ dài video)
+SILENCE_CHUNK_WINDOWS = 1200
+
+# Chỉ lưu các frame có điểm từ mức này trở lên, đủ để đổi ngưỡng mà không phải phân tích lại
+SCENE_SCORE_FLOOR = 0.05
+
+
+def _cache_path(video_path, kind, params=None):
+    """File cache cho một loại phân tích, khóa theo đường dẫn/kích thước/mtime và tham số"""
+    stat = os.stat(video_path)
+    key = json.dumps([os.path.abspath(video_path), stat.st_size, stat.st_mtime, kind, params])
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return Path(config.ANALYSIS_CACHE_DIR) / f"{Path(video_path).stem[:40]}_{kind}_{digest[:16]}.json"
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cache(cache_path, data):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(temp_path, cache_path)
+
+
+def scene_scores(video_path):
+    """
+    Điểm chuyển cảnh theo thời gian của video (có cache)
+
+    Args:
+        video_path: File video nguồn
+
+    Returns:
+        list: [[thời điểm, điểm scene], ...] cho các frame có điểm >= SCENE_SCORE_FLOOR
+    """
+    cache_path = _cache_path(video_path, 'scene', config.ANALYSIS_WIDTH)
+    cached = _load_cache(cache_path)
+    if cached is not None:
+        return cached
+
+    stream = (
+        ffmpeg
+        .input(str(video_path))
+        .video
+        .filter('scale', config.ANALYSIS_WIDTH, -2)
+        .filter('select', 'gte(scene,0)')
+        .filter('metadata', 'print', file='-')
+        .output('-', f='null')
+        .global_args('-nostats', '-loglevel', 'error')
+    )
+
+    timeline = []
+    with get_scheduler().slot(encode=True) as slot:
+        process = slot.popen(stream, pipe_stdout=True)
+        pts_time = None
+        for line in process.stdout:
+            line = line.decode('utf-8', errors='ignore')
+            match = PTS_TIME_PATTERN.search(line)
+            if match:
+                pts_time = float(match.group(1))
+                continue
+            match = SCENE_SCORE_PATTERN.search(line)
+            if match and pts_time is not None:
+                score = float(match.group(1))
+                if score >= SCENE_SCORE_FLOOR:
+                    timeline.append([round(pts_time, 3), round(score, 4)])
+        if process.wait():
+            raise ffmpeg.Error('ffmpeg', None, None)
+
+    _save_cache(cache_path, timeline)
+    return timeline
+
+
+def _silent_runs(silent, offset, run_start, runs):
+    """
+    Cập nhật danh sách khoảng lặng từ mặt nạ im lặng của một chunk
+
+    Args:
+        silent: Mảng bool, mỗi phần tử là một cửa sổ RMS
+        offset: Chỉ số cửa sổ đầu tiên của chunk
+        run_start: Cửa sổ bắt đầu khoảng lặng đang mở từ chunk trước (None nếu không có)
+        runs: Danh sách [cửa sổ bắt đầu, cửa sổ kết thúc) được bổ sung
+
+    Returns:
+        int: Khoảng lặng còn mở ở cuối chunk (None nếu không có)
+    """
+    if not len(silent):
+        return run_start
+    # Chỉ duyệt các vị trí đổi trạng thái, không duyệt từng cửa sổ
+    changes = np.flatnonzero(silent[1:] != silent[:-1]) + 1
+    for position in np.concatenate(([0], changes)):
+        if silent[position]:
+            if run_start is None:
+                run_start = offset + int(position)
+        elif run_start is not None:
+            runs.append((run_start, offset + int(position)))
+            run_start = None
+    return run_start
+
+
+def silence_intervals(video_path):
+    """
+    Các khoảng lặng trong audio của video (có cache)
+
+    Audio được ffmpeg giảm xuống mono PCM 16-bit tần số thấp và đọc từng chunk qua pipe,
+    năng lượng RMS của mỗi cửa sổ được tính bằng NumPy trên cả chunk.
+
+    Args:
+        video_path: File video nguồn
+
+    Returns:
+        list: [[bắt đầu, kết thúc], ...] (giây) cho các khoảng lặng >= SILENCE_MIN_DURATION
+    """
+    if np is None:
+        raise RuntimeError("Cần cài numpy để phân tích khoảng lặng")
+
+    sample_rate = config.ANALYSIS_SAMPLE_RATE
+    window_samples = max(1, int(sample_rate * config.SILENCE_WINDOW))
+    window_seconds = window_samples / sample_rate
+    params = [sample_rate, window_samples, config.SILENCE_THRESHOLD_DB, config.SILENCE_MIN_DURATION]
+    cache_path = _cache_path(video_path, 'silence', params)
+    cached = _load_cache(cache_path)
+    if cached is not None:
+        return cached
+
+    stream = (
+        ffmpeg
+        .input(str(video_path))
+        .audio
+        .output('pipe:', f='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+        .global_args('-nostats', '-loglevel', 'error')
+    )
+
+    # So sánh bình phương RMS với ngưỡng để khỏi tính căn và log cho từng cửa sổ
+    threshold = (32768.0 * 10 ** (config.SILENCE_THRESHOLD_DB / 20)) ** 2
+    chunk_bytes = window_samples * SILENCE_CHUNK_WINDOWS * 2
+    runs = []
+    run_start = None
+    offset = 0
+    with get_scheduler().slot() as slot:
+        process = slot.popen(stream, pipe_stdout=True)
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            windows = len(data) // (window_samples * 2)
+            if not windows:
+                break
+            samples = np.frombuffer(data, dtype='<i2', count=windows * window_samples)
+            power = np.square(samples.astype(np.float32)).reshape(windows, window_samples).mean(axis=1)
+            run_start = _silent_runs(power < threshold, offset, run_start, runs)
+            offset += windows
+        if process.wait():
+            raise ffmpeg.Error('ffmpeg', None, None)
+    if run_start is not None:
+        runs.append((run_start, offset))
+
+    intervals = [
+        [round(start * window_seconds, 3), round(end * window_seconds, 3)]
+        for start, end in runs
+        if (end - start) * window_seconds >= config.SILENCE_MIN_DURATION
+    ]
+    _save_cache(cache_path, intervals)
+    return intervals
+
+
+def active_area(video_path):
+    """
+    Vùng hình thực tế của video, bỏ viền đen letterbox/pillarbox (có cache)
+
+    Chỉ decode keyframe; cropdetect gộp khung bao qua mọi frame lấy mẫu
+    nên kết quả là vùng hình lớn nhất trong cả video.
+
+    Args:
+        video_path: File video nguồn
+
+    Returns:
+        list: [rộng, cao, x, y] hoặc None nếu không phát hiện được
+    """
+    cache_path = _cache_path(video_path, 'cropdetect', config.CROPDETECT_LIMIT)
+    cached = _load_cache(cache_path)
+    if cached is not None:
+        return cached or None
+
+    stream = (
+        ffmpeg
+        .input(str(video_path), skip_frame='nokey')
+        .video
+        .filter('cropdetect', limit=config.CROPDETECT_LIMIT, round=2, skip=0)
+        .output('-', f='null')
+        .global_args('-nostats', '-loglevel', 'info')
+    )
+
+    area = None
+    with get_scheduler().slot(encode=True) as slot:
+        process = slot.popen(stream, pipe_stderr=True)
+        for line in process.stderr:
+            match = CROPDETECT_PATTERN.search(line.decode('utf-8', errors='ignore'))
+            if match:
+                area = [int(value) for value in match.groups()]
+        if process.wait():
+            raise ffmpeg.Error('ffmpeg', None, None)
+
+    # Lưu cả kết quả rỗng để không phân tích lại video không có frame nào
+    _save_cache(cache_path, area or [])
+    return area
+
+
+class CutPlanner:
+    """Chọn các điểm cắt ưu tiên cho một file nguồn theo Config.CUT_PLANNER"""
+
+    def __init__(self, video_path, method=None):
+        """
+        Khởi tạo CutPlanner
+
+        Args:
+            video_path: File video nguồn
+            method: "random", "scene" hoặc "silence" (mặc định Config.CUT_PLANNER)
+        """
+        self.video_path = str(video_path)
+        self.method = method or config.CUT_PLANNER
+
+    def preferred_cuts(self):
+        """
+        Các thời điểm nên cắt, đã sắp xếp (rỗng nếu dùng cắt ngẫu nhiên)
+
+        Returns:
+            list: Thời điểm (giây)
+        """
+        if self.method == 'scene':
+            return sorted(
+                time_point for time_point, score in scene_scores(self.video_path)
+                if score >= config.SCENE_CHANGE_THRESHOLD
+            )
+        if self.method == 'silence':
+            # Cắt ở giữa khoảng lặng
+            return sorted((start + end) / 2 for start, end in silence_intervals(self.video_path))
+        return []
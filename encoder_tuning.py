@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Encoder Tuning Module
+Đo tốc độ, dung lượng và chất lượng (PSNR/SSIM) của libx264 trên máy hiện tại
+với nhiều preset/CRF/số thread, lưu profile và chọn tham số encode theo mục tiêu
+
+Chạy hiệu chỉnh: python encoder_tuning.py [sample1.mp4 sample2.mp4 ...] [--target balanced]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+
+import ffmpeg
+import mp4_parser
+from config import config
+
+logger = logging.getLogger(__name__)
+
+SSIM_PATTERN = re.compile(r'SSIM .*All:([\d.]+)')
+PSNR_PATTERN = re.compile(r'PSNR .*average:([\d.]+|inf)')
+
+TARGETS = ('speed', 'balanced', 'size')
+
+_profile_cache = {'key': None, 'profile': None}
+
+
+def load_profile(profile_path=None):
+    """
+    Đọc profile đã hiệu chỉnh (cache theo đường dẫn và mtime của file)
+
+    Returns:
+        dict: Profile hoặc None nếu chưa hiệu chỉnh
+    """
+    profile_path = profile_path or config.ENCODER_PROFILE_PATH
+    try:
+        mtime = os.path.getmtime(profile_path)
+    except OSError:
+        return None
+    key = (os.path.abspath(profile_path), mtime)
+    if _profile_cache['key'] != key:
+        try:
+            with open(profile_path, 'r', encoding='utf-8') as f:
+                _profile_cache['profile'] = json.load(f)
+            _profile_cache['key'] = key
+        except (OSError, ValueError) as e:
+            logger.warning(f"Không đọc được encoder profile {profile_path}: {e}")
+            return None
+    return _profile_cache['profile']
+
+
+def get_encoder_settings(target=None):
+    """
+    Lấy preset/CRF/thread cho các đường encode lại
+
+    Args:
+        target: "speed", "balanced" hoặc "size" (mặc định Config.ENCODING_TARGET)
+
+    Returns:
+        dict: {'preset': ..., 'crf': ..., 'threads': ... (None = để ffmpeg tự chọn)}
+    """
+    target = target or config.ENCODING_TARGET
+    profile = load_profile()
+    if profile and target in profile.get('targets', {}):
+        choice = profile['targets'][target]
+        return {
+            'preset': choice['preset'],
+            'crf': choice['crf'],
+            'threads': choice['threads'] or None,
+        }
+    return {
+        'preset': config.ENCODING_PRESET,
+        'crf': config.CRF_VALUE,
+        'threads': None,
+    }
+
+
+def select_targets(results, min_ssim):
+    """
+    Chọn cấu hình tốt nhất cho từng mục tiêu từ kết quả đo
+
+    Args:
+        results: Danh sách kết quả đo (fps, bytes_per_second, ssim...)
+        min_ssim: Ngưỡng SSIM tối thiểu
+
+    Returns:
+        dict: {target: kết quả được chọn}
+    """
+    candidates = [r for r in results if r['ssim'] >= min_ssim] or results
+    if not candidates:
+        return {}
+
+    max_fps = max(r['fps'] for r in candidates) or 1.0
+    min_size = min(r['bytes_per_second'] for r in candidates) or 1.0
+
+    def balanced_score(r):
+        return (r['fps'] / max_fps) * (min_size / r['bytes_per_second'])
+
+    return {
+        'speed': max(candidates, key=lambda r: (r['fps'], -r['bytes_per_second'])),
+        'size': min(candidates, key=lambda r: (r['bytes_per_second'], -r['fps'])),
+        'balanced': max(candidates, key=balanced_score),
+    }
+
+
+class EncoderCalibrator:
+    """Chạy lưới preset × CRF × thread trên các clip mẫu"""
+
+    def __init__(self, presets=None, crf_values=None, thread_counts=None, clip_seconds=None, log_callback=None):
+        self.presets = presets or config.CALIBRATION_PRESETS
+        self.crf_values = crf_values or config.CALIBRATION_CRF_VALUES
+        self.thread_counts = thread_counts or config.CALIBRATION_THREADS
+        self.clip_seconds = clip_seconds or config.CALIBRATION_CLIP_SECONDS
+        self.log_callback = log_callback
+
+    def log(self, message):
+        logger.info(message)
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def make_synthetic_reference(self, work_dir):
+        """Clip tổng hợp 720p có chuyển động và nhiễu, lưu lossless làm tham chiếu"""
+        reference = os.path.join(work_dir, 'synthetic_reference.mp4')
+        (
+            ffmpeg
+            .input(f'testsrc2=size=1280x720:rate=30:duration={self.clip_seconds}', f='lavfi')
+            .filter('noise', alls=6, allf='t')
+            .output(reference, vcodec='libx264', qp=0, preset='ultrafast', pix_fmt='yuv420p')
+            .overwrite_output()
+            .run(quiet=True, capture_stdout=True, capture_stderr=True)
+        )
+        return reference
+
+    def make_sample_reference(self, sample_path, work_dir, index):
+        """Lấy một đoạn giữa video mẫu, lưu lossless làm tham chiếu"""
+        duration = float(mp4_parser.probe(sample_path)['format']['duration'])
+        start = max(0.0, duration / 2 - self.clip_seconds / 2)
+        reference = os.path.join(work_dir, f'sample_{index}_reference.mp4')
+        (
+            ffmpeg
+            .input(sample_path, ss=start, t=self.clip_seconds)
+            .video
+            .output(reference, vcodec='libx264', qp=0, preset='ultrafast', pix_fmt='yuv420p')
+            .overwrite_output()
+            .run(quiet=True, capture_stdout=True, capture_stderr=True)
+        )
+        return reference
+
+    def measure_quality(self, encoded, reference):
+        """Tính SSIM và PSNR của file đã encode so với tham chiếu"""
+        distorted = ffmpeg.input(encoded).video.filter_multi_output('split')
+        original = ffmpeg.input(reference).video.filter_multi_output('split')
+        ssim = ffmpeg.filter([distorted[0], original[0]], 'ssim')
+        psnr = ffmpeg.filter([distorted[1], original[1]], 'psnr')
+        _, stderr = (
+            ffmpeg
+            .merge_outputs(
+                ffmpeg.output(ssim, 'pipe:', f='null'),
+                ffmpeg.output(psnr, 'pipe:', f='null')
+            )
+            .run(quiet=True, capture_stdout=True, capture_stderr=True)
+        )
+        text = stderr.decode('utf-8', errors='ignore')
+        ssim_match = SSIM_PATTERN.search(text)
+        psnr_match = PSNR_PATTERN.search(text)
+        psnr_value = psnr_match.group(1) if psnr_match else '0'
+        return (
+            float(ssim_match.group(1)) if ssim_match else 0.0,
+            100.0 if psnr_value == 'inf' else float(psnr_value),
+        )
+
+    def encode_once(self, reference, output, preset, crf, threads):
+        """Encode tham chiếu với một cấu hình, trả về (số giây, số frame)"""
+        options = {'vcodec': config.VIDEO_CODEC, 'preset': preset, 'crf': crf}
+        if threads:
+            options['threads'] = threads
+        started = time.perf_counter()
+        (
+            ffmpeg
+            .input(reference)
+            .output(output, **options)
+            .overwrite_output()
+            .run(quiet=True, capture_stdout=True, capture_stderr=True)
+        )
+        elapsed = time.perf_counter() - started
+        frames = mp4_parser.parse_mp4(output).video_track.sample_count
+        return elapsed, frames
+
+    def run(self, sample_paths=()):
+        """
+        Chạy hiệu chỉnh trên clip tổng hợp và các video mẫu
+
+        Args:
+            sample_paths: Danh sách video mẫu (tùy chọn)
+
+        Returns:
+            list: Kết quả trung bình cho từng cấu hình
+        """
+        with tempfile.TemporaryDirectory(prefix='encoder_tuning_') as work_dir:
+            references = [self.make_synthetic_reference(work_dir)]
+            for index, sample in enumerate(sample_paths):
+                references.append(self.make_sample_reference(sample, work_dir, index))
+            self.log(f"Hiệu chỉnh trên {len(references)} clip, "
+                     f"{len(self.presets) * len(self.crf_values) * len(self.thread_counts)} cấu hình")
+
+            results = []
+            output = os.path.join(work_dir, 'encoded.mp4')
+            for preset in self.presets:
+                for crf in self.crf_values:
+                    for threads in self.thread_counts:
+                        total_elapsed = total_frames = total_bytes = 0
+                        ssim_values, psnr_values = [], []
+                        for reference in references:
+                            elapsed, frames = self.encode_once(reference, output, preset, crf, threads)
+                            total_elapsed += elapsed
+                            total_frames += frames
+                            total_bytes += os.path.getsize(output)
+                            ssim, psnr = self.measure_quality(output, reference)
+                            ssim_values.append(ssim)
+                            psnr_values.append(psnr)
+
+                        result = {
+                            'preset': preset,
+                            'crf': crf,
+                            'threads': threads,
+                            'fps': total_frames / total_elapsed if total_elapsed else 0.0,
+                            'bytes_per_second': total_bytes / (self.clip_seconds * len(references)),
+                            'ssim': sum(ssim_values) / len(ssim_values),
+                            'psnr': sum(psnr_values) / len(psnr_values),
+                        }
+                        results.append(result)
+                        self.log(f"  {preset:>9} crf={crf:<2} threads={threads or 'auto':<4} "
+                                 f"{result['fps']:7.1f} fps  {result['bytes_per_second'] / 1024:8.1f} KB/s  "
+                                 f"SSIM={result['ssim']:.4f}  PSNR={result['psnr']:.2f}")
+            return results
+
+    def save_profile(self, results, profile_path=None):
+        """Lưu kết quả và lựa chọn theo mục tiêu vào file profile"""
+        profile_path = profile_path or config.ENCODER_PROFILE_PATH
+        profile = {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'host': {
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+            },
+            'min_ssim': config.ENCODER_MIN_SSIM,
+            'results': results,
+            'targets': select_targets(results, config.ENCODER_MIN_SSIM),
+        }
+        temp_path = f"{profile_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, profile_path)
+        return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hiệu chỉnh preset/CRF/thread của encoder cho máy hiện tại")
+    parser.add_argument('samples', nargs='*', help="Video mẫu dùng thêm ngoài clip tổng hợp")
+    parser.add_argument('--presets', nargs='+', help="Danh sách preset cần đo")
+    parser.add_argument('--crf', nargs='+', type=int, help="Danh sách CRF cần đo")
+    parser.add_argument('--threads', nargs='+', type=int, help="Danh sách số thread (0 = tự động)")
+    parser.add_argument('--seconds', type=int, help="Độ dài mỗi clip đo (giây)")
+    parser.add_argument('--target', choices=TARGETS, default=config.ENCODING_TARGET,
+                        help="Mục tiêu hiển thị sau khi hiệu chỉnh")
+    parser.add_argument('--output', default=config.ENCODER_PROFILE_PATH, help="File profile đầu ra")
+    args = parser.parse_args()
+
+    print("=== HIỆU CHỈNH ENCODER ===")
+    calibrator = EncoderCalibrator(args.presets, args.crf, args.threads, args.seconds)
+    results = calibrator.run(args.samples)
+    profile = calibrator.save_profile(results, args.output)
+
+    print(f"\n✅ Đã lưu profile: {args.output}")
+    for target, choice in profile['targets'].items():
+        marker = '👉' if target == args.target else '  '
+        print(f"{marker} {target:>8}: preset={choice['preset']} crf={choice['crf']} "
+              f"threads={choice['threads'] or 'auto'} ({choice['fps']:.1f} fps, SSIM={choice['ssim']:.4f})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FFmpeg Scheduler Module
+Điều phối mọi tiến trình ffmpeg của ứng dụng theo một ngân sách CPU chung:
+cấp số thread và số slot chạy đồng thời, chạy encode với độ ưu tiên thấp hơn giao diện
+và xếp hàng công việc khi ngân sách đã dùng hết
+"""
+
+import os
+import sys
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+
+import ffmpeg
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def _lower_priority(process):
+    """
+    Hạ độ ưu tiên của tiến trình ffmpeg vừa tạo (POSIX)
+
+    Đặt sau Popen thay cho preexec_fn: preexec_fn chạy giữa fork và exec,
+    không an toàn khi ứng dụng có nhiều thread
+    """
+    if not hasattr(os, 'setpriority'):
+        return
+    try:
+        niceness = os.getpriority(os.PRIO_PROCESS, 0) + config.FFMPEG_NICENESS
+        os.setpriority(os.PRIO_PROCESS, process.pid, min(niceness, 19))
+    except OSError:
+        # Tiến trình đã kết thúc hoặc không đủ quyền: giữ độ ưu tiên hiện tại
+        pass
+
+
+def _priority_kwargs():
+    """Tham số Popen để chạy ffmpeg với độ ưu tiên thấp hơn GUI (Windows)"""
+    if sys.platform == 'win32':
+        return {'creationflags': getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0)}
+    return {}
+
+
+class FFmpegSlot:
+    """Một slot đã được cấp: số thread được phép dùng và cách chạy ffmpeg trong slot"""
+
+    def __init__(self, threads):
+        self.threads = threads
+
+    def popen(self, stream_spec, pipe_stdin=False, pipe_stdout=False, pipe_stderr=False, quiet=False):
+        """
+        Chạy ffmpeg bất đồng bộ trong slot (tương đương ffmpeg.run_async)
+
+        Args:
+            stream_spec: Stream ffmpeg-python hoặc danh sách tham số dòng lệnh
+
+        Returns:
+            subprocess.Popen: Tiến trình ffmpeg
+        """
+        args = stream_spec if isinstance(stream_spec, list) else ffmpeg.compile(stream_spec)
+        process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE if pipe_stdin else None,
+            stdout=subprocess.PIPE if pipe_stdout or quiet else None,
+            stderr=subprocess.PIPE if pipe_stderr or quiet else None,
+            **_priority_kwargs()
+        )
+        _lower_priority(process)
+        return process
+
+    def run(self, stream_spec, input=None, capture_stdout=False, capture_stderr=False, quiet=False):
+        """
+        Chạy ffmpeg trong slot và chờ kết thúc (tương đương ffmpeg.run)
+
+        Returns:
+            tuple: (stdout, stderr)
+
+        Raises:
+            ffmpeg.Error: Nếu ffmpeg trả về mã lỗi
+        """
+        process = self.popen(
+            stream_spec,
+            pipe_stdin=input is not None,
+            pipe_stdout=capture_stdout,
+            pipe_stderr=capture_stderr,
+            quiet=quiet
+        )
+        out, err = process.communicate(input)
+        if process.returncode:
+            raise ffmpeg.Error('ffmpeg', out, err)
+        return out, err
+
+
+class FFmpegScheduler:
+    """Cấp phát thread/slot cho các job ffmpeg từ một ngân sách core cố định"""
+
+    def __init__(self, cpu_budget=None, max_jobs=None):
+        """
+        Khởi tạo FFmpegScheduler
+
+        Args:
+            cpu_budget: Tổng số core dành cho ffmpeg (mặc định: số core trừ 1 cho GUI)
+            max_jobs: Số job ffmpeg chạy đồng thời tối đa
+        """
+        self.cpu_budget = cpu_budget or config.FFMPEG_CPU_BUDGET or max(1, (os.cpu_count() or 2) - 1)
+        self.max_jobs = max_jobs or config.FFMPEG_MAX_JOBS
+        self.used_threads = 0
+        self.active_jobs = 0
+        self._condition = threading.Condition()
+
+    def default_encode_threads(self):
+        """Số thread mặc định cho một job encode: chia đều ngân sách cho số slot"""
+        return max(1, self.cpu_budget // self.max_jobs)
+
+    @contextmanager
+    def slot(self, encode=False, threads=None):
+        """
+        Chờ tới khi còn ngân sách rồi cấp một slot
+
+        Args:
+            encode: True nếu job encode lại (tốn CPU); job stream copy chỉ tính 1 thread
+            threads: Số thread mong muốn cho job encode (bị giới hạn bởi ngân sách)
+
+        Yields:
+            FFmpegSlot: Slot với số thread được cấp
+        """
+        if encode:
+            cost = min(threads or self.default_encode_threads(), self.cpu_budget)
+        else:
+            cost = 1
+
+        with self._condition:
+            waited = False
+            while (self.active_jobs >= self.max_jobs
+                   or self.used_threads + cost > self.cpu_budget):
+                if not waited:
+                    logger.debug(f"Hết ngân sách CPU ({self.used_threads}/{self.cpu_budget}), xếp hàng job ffmpeg")
+                    waited = True
+                self._condition.wait()
+            self.active_jobs += 1
+            self.used_threads += cost
+
+        try:
+            yield FFmpegSlot(cost)
+        finally:
+            with self._condition:
+                self.active_jobs -= 1
+                self.used_threads -= cost
+                self._condition.notify_all()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Scheduler dùng chung cho toàn bộ ứng dụng"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FFmpegScheduler()
+        return _scheduler
@@ -23,6 +23,7 @@ try:
     from tqdm import tqdm
     from video_downloader import VideoDownloader
     from xiaohongshu_downloader import XiaohongshuDownloader
+    import xhs_image_store
 except ImportError as e:
     print(f"Lỗi import thư viện: {e}")
     print("Vui lòng cài đặt các thư viện cần thiết: pip install -r requirements.txt")
@@ -133,6 +134,10 @@ class YouTubeDownloaderApp:
         self.enable_cut = tk.BooleanVar(value=False)
         ttk.Checkbutton(cut_frame, text="Bật cắt video ngẫu nhiên", variable=self.enable_cut).pack(anchor="w")
         
+        # Checkbox cắt trong lúc tải (không lưu file gốc)
+        self.stream_split = tk.BooleanVar(value=config.STREAM_SPLIT)
+        ttk.Checkbutton(cut_frame, text="Cắt trong lúc tải (không lưu file gốc)", variable=self.stream_split).pack(anchor="w")
+        
         # Cài đặt thời gian cắt
         time_frame = ttk.Frame(cut_frame)
         time_frame.pack(fill="x", pady=(5, 0))
@@ -398,6 +403,7 @@ class YouTubeDownloaderApp:
             min_time = self.min_time.get()
             max_time = self.max_time.get()
             short_video_time = self.short_video_time.get()
+            stream_split = self.stream_split.get()
             
             # Kiểm tra thư mục
             if not os.path.exists(output_dir):
@@ -418,7 +424,8 @@ class YouTubeDownloaderApp:
                 enable_cut=enable_cut,
                 min_time=min_time,
                 max_time=max_time,
-                short_video_time=short_video_time
+                short_video_time=short_video_time,
+                stream_split=stream_split
             )
             
             if self.is_downloading:  # Chỉ hiển thị kết quả nếu không bị dừng
@@ -514,30 +521,27 @@ class YouTubeDownloaderApp:
             successful_downloads = []
             failed_downloads = []
             
-            for i, url in enumerate(urls, 1):
-                try:
-                    self.root.after(0, lambda i=i, total=total_urls, url=url: 
-                                  self.xiaohongshu_log_message(f"[{i}/{total}] Đang tải: {url}"))
-                    
-                    def progress_callback(message, url=url):
-                        self.root.after(0, lambda: self.xiaohongshu_log_message(f"  {message}"))
-                    
-                    # Tải video
-                    result = self.xiaohongshu_downloader.download_video(url, progress_callback)
-                    
-                    if result['success']:
-                        successful_downloads.append({'url': url, 'result': result})
-                        self.root.after(0, lambda result=result: 
-                                      self.xiaohongshu_log_message(f"  ✅ {result['message']}"))
-                    else:
-                        failed_downloads.append({'url': url, 'error': result['message']})
-                        self.root.after(0, lambda result=result: 
-                                      self.xiaohongshu_log_message(f"  ❌ {result['message']}"))
-                        
-                except Exception as e:
-                    error_msg = f"Lỗi khi tải {url}: {str(e)}"
-                    failed_downloads.append({'url': url, 'error': error_msg})
-                    self.root.after(0, lambda msg=error_msg: self.xiaohongshu_log_message(f"  ❌ {msg}"))
+            def progress_callback(url, message):
+                self.root.after(0, lambda: self.xiaohongshu_log_message(f"  {message} ({url})"))
+            
+            # Các link được tải song song, kết quả trả về theo thứ tự hoàn thành
+            for i, (url, result) in enumerate(self.xiaohongshu_downloader.download_batch(urls, progress_callback), 1):
+                if result['success']:
+                    successful_downloads.append({'url': url, 'result': result})
+                    message = f"[{i}/{total_urls}] ✅ {result['message']}: {url}"
+                else:
+                    failed_downloads.append({'url': url, 'error': result['message']})
+                    message = f"[{i}/{total_urls}] ❌ {result['message']}: {url}"
+                counts = f"Đã xong {i}/{total_urls} (✅ {len(successful_downloads)}, ❌ {len(failed_downloads)})"
+                self.root.after(0, lambda message=message, counts=counts: (
+                    self.xiaohongshu_log_message(message),
+                    self.xiaohongshu_status_label.config(text=counts)
+                ))
+            
+            savings = self.xiaohongshu_downloader.last_batch_savings
+            if savings['downloaded_bytes'] or savings['dedup_storage_bytes']:
+                savings_message = f"💾 {xhs_image_store.describe_savings(savings)}"
+                self.root.after(0, lambda: self.xiaohongshu_log_message(savings_message))
             
             # Tổng kết
             summary_result = {
@@ -686,6 +690,7 @@ def main():
     root = tk.Tk()
     app = YouTubeDownloaderApp(root)
     root.mainloop()
+    app.xiaohongshu_downloader.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
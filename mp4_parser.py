@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MP4 Parser Module
+Đọc trực tiếp các box MP4/MOV (moov/mvhd/tkhd/stsd/stts/stss/stco...) bằng mmap
+để lấy thời lượng, codec, độ phân giải, fps và vị trí keyframe mà không cần gọi ffprobe
+"""
+
+import os
+import sys
+import mmap
+import struct
+import logging
+from array import array
+from fractions import Fraction
+
+import ffmpeg
+
+logger = logging.getLogger(__name__)
+
+# Các phần mở rộng được thử đọc bằng parser trước khi fallback sang ffprobe
+MP4_EXTENSIONS = ('.mp4', '.m4v', '.mov', '.m4a', '.3gp', '.3g2')
+
+# Các box chứa box con cần duyệt xuống
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'mvex'}
+
+# Các box có thể xuất hiện ở đầu file MP4/MOV hợp lệ
+TOP_LEVEL_BOXES = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pdin', b'uuid', b'styp'}
+
+# Ánh xạ fourcc trong stsd sang tên codec theo ffprobe
+CODEC_NAMES = {
+    b'avc1': 'h264', b'avc3': 'h264',
+    b'hvc1': 'hevc', b'hev1': 'hevc',
+    b'av01': 'av1', b'vp09': 'vp9', b'vp08': 'vp8',
+    b'mp4v': 'mpeg4', b'jpeg': 'mjpeg', b'apcn': 'prores', b'apch': 'prores',
+    b'mp4a': 'aac', b'Opus': 'opus', b'ac-3': 'ac3', b'ec-3': 'eac3',
+    b'fLaC': 'flac', b'.mp3': 'mp3', b'alac': 'alac', b'lpcm': 'pcm_s16le',
+}
+
+HANDLER_TYPES = {b'vide': 'video', b'soun': 'audio'}
+
+# Tên profile theo ffprobe (đọc từ avcC/hvcC)
+H264_PROFILES = {66: 'Constrained Baseline', 77: 'Main', 88: 'Extended', 100: 'High', 110: 'High 10', 122: 'High 4:2:2', 244: 'High 4:4:4 Predictive'}
+HEVC_PROFILES = {1: 'Main', 2: 'Main 10', 3: 'Main Still Picture', 4: 'Rext'}
+
+
+class Mp4ParseError(Exception):
+    """Lỗi khi file không phải MP4 hoặc cấu trúc box không đọc được"""
+
+
+def _iter_boxes(buf, start, end):
+    """
+    Duyệt các box nằm trong khoảng [start, end)
+
+    Yields:
+        tuple: (box_type, payload_start, box_end)
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', buf, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise Mp4ParseError(f"Box {box_type!r} bị cắt cụt tại {offset}")
+            size = struct.unpack_from('>Q', buf, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            raise Mp4ParseError(f"Kích thước box {box_type!r} không hợp lệ tại {offset}")
+        box_end = offset + size
+        if box_end > end:
+            raise Mp4ParseError(f"Box {box_type!r} vượt quá kích thước file tại {offset}")
+        yield box_type, offset + header, box_end
+        offset = box_end
+
+
+def _read_array(buf, offset, count, typecode):
+    """Đọc mảng số nguyên big-endian từ buffer (nhanh hơn unpack từng phần tử)"""
+    values = array(typecode)
+    size = values.itemsize * count
+    if offset + size > len(buf):
+        raise Mp4ParseError("Bảng mẫu vượt quá kích thước box")
+    values.frombytes(buf[offset:offset + size])
+    if sys.byteorder == 'little':
+        values.byteswap()
+    return values
+
+
+class Mp4Track:
+    """Thông tin một track đọc từ box trak"""
+
+    def __init__(self):
+        self.track_id = 0
+        self.handler = None
+        self.timescale = 0
+        self.duration = 0
+        self.codec_tag = None
+        self.width = 0
+        self.height = 0
+        self.sample_rate = 0
+        self.channels = 0
+        self.profile = None
+        self.level = None
+        self.bit_depth = None
+        self.media_time = 0
+        self.edit_duration = 0
+        self.stts = []
+        self.ctts = []
+        self.stss = None
+        self.stsc = []
+        self.sample_size = 0
+        self.sample_sizes = None
+        self.sample_count = 0
+        self.chunk_offsets = None
+
+    @property
+    def codec_type(self):
+        return HANDLER_TYPES.get(self.handler, 'data')
+
+    @property
+    def codec_name(self):
+        return CODEC_NAMES.get(self.codec_tag, self.codec_tag.decode('latin-1').strip() if self.codec_tag else 'unknown')
+
+    @property
+    def duration_seconds(self):
+        if not self.timescale:
+            return 0.0
+        return self.duration / self.timescale
+
+    @property
+    def frame_rate(self):
+        """Frame rate dạng Fraction (tính từ stts giống avg_frame_rate của ffprobe)"""
+        total_delta = sum(count * delta for count, delta in self.stts)
+        if not total_delta or not self.sample_count:
+            return Fraction(0)
+        if len(self.stts) == 1:
+            return Fraction(self.timescale, self.stts[0][1])
+        return Fraction(self.sample_count * self.timescale, total_delta).limit_denominator(1001000)
+
+    @property
+    def total_bytes(self):
+        if self.sample_sizes is not None:
+            return sum(self.sample_sizes)
+        return self.sample_size * self.sample_count
+
+    def decode_times(self):
+        """Danh sách DTS (đơn vị timescale) của từng mẫu"""
+        times = []
+        current = 0
+        for count, delta in self.stts:
+            for _ in range(count):
+                times.append(current)
+                current += delta
+        return times
+
+    def presentation_times(self):
+        """Danh sách thời điểm hiển thị (giây) của từng mẫu, đã áp dụng ctts và edit list"""
+        times = self.decode_times()
+        if self.ctts:
+            index = 0
+            for count, offset in self.ctts:
+                for i in range(index, min(index + count, len(times))):
+                    times[i] += offset
+                index += count
+        scale = float(self.timescale or 1)
+        return [(t - self.media_time) / scale for t in times]
+
+    def keyframe_indices(self):
+        """Chỉ số (bắt đầu từ 0) của các mẫu là keyframe"""
+        if self.stss is None:
+            # Không có stss nghĩa là mọi mẫu đều là sync sample
+            return list(range(self.sample_count))
+        return [n - 1 for n in self.stss if 0 < n <= self.sample_count]
+
+    def _run_values_at(self, runs, indices, cumulative):
+        """Tra giá trị của bảng run-length (stts/ctts) tại các chỉ số mẫu đã sắp xếp"""
+        values = []
+        run_start = 0
+        total = 0
+        run_iter = iter(runs)
+        count, value = next(run_iter, (0, 0))
+        for index in indices:
+            while index >= run_start + count:
+                if cumulative:
+                    total += count * value
+                run_start += count
+                next_run = next(run_iter, None)
+                if next_run is None:
+                    count, value = float('inf'), value
+                    break
+                count, value = next_run
+            if cumulative:
+                values.append(total + (index - run_start) * value)
+            else:
+                values.append(value)
+        return values
+
+    def keyframe_times(self):
+        """Thời điểm (giây) của các keyframe, sắp xếp tăng dần"""
+        indices = self.keyframe_indices()
+        # Chỉ tính thời gian cho các keyframe thay vì toàn bộ mẫu
+        times = self._run_values_at(self.stts, indices, cumulative=True)
+        if self.ctts:
+            offsets = self._run_values_at(self.ctts, indices, cumulative=False)
+            times = [t + o for t, o in zip(times, offsets)]
+        scale = float(self.timescale or 1)
+        return sorted(max(0.0, (t - self.media_time) / scale) for t in times)
+
+    def sample_offsets(self):
+        """Vị trí byte trong file của từng mẫu (tính từ stsc + stco + stsz)"""
+        if self.chunk_offsets is None:
+            return []
+        offsets = []
+        chunk_count = len(self.chunk_offsets)
+        sample_index = 0
+        for entry_index, (first_chunk, samples_per_chunk, _) in enumerate(self.stsc):
+            if entry_index + 1 < len(self.stsc):
+                last_chunk = self.stsc[entry_index + 1][0] - 1
+            else:
+                last_chunk = chunk_count
+            for chunk in range(first_chunk, last_chunk + 1):
+                position = self.chunk_offsets[chunk - 1]
+                for _ in range(samples_per_chunk):
+                    if sample_index >= self.sample_count:
+                        return offsets
+                    offsets.append(position)
+                    position += self.sample_sizes[sample_index] if self.sample_sizes is not None else self.sample_size
+                    sample_index += 1
+        return offsets
+
+    def sample_size_at(self, index):
+        if self.sample_sizes is not None:
+            return self.sample_sizes[index]
+        return self.sample_size
+
+
+class Mp4Info:
+    """Kết quả đọc box moov của một file MP4"""
+
+    def __init__(self, path, file_size):
+        self.path = path
+        self.file_size = file_size
+        self.major_brand = None
+        self.timescale = 0
+        self.duration = 0
+        self.tracks = []
+        self.fragmented = False
+        # Box cấp cao nhất: loại -> (vị trí byte, kích thước), ví dụ 'moov' -> (1234, 5678)
+        self.boxes = {}
+
+    @property
+    def duration_seconds(self):
+        if self.timescale and self.duration:
+            return self.duration / self.timescale
+        return max((t.duration_seconds for t in self.tracks), default=0.0)
+
+    @property
+    def video_track(self):
+        return next((t for t in self.tracks if t.codec_type == 'video'), None)
+
+    @property
+    def audio_track(self):
+        return next((t for t in self.tracks if t.codec_type == 'audio'), None)
+
+    def keyframe_times(self):
+        track = self.video_track
+        return track.keyframe_times() if track else []
+
+    def track_duration(self, track):
+        """Thời lượng track (giây), ưu tiên edit list như ffprobe"""
+        if track.edit_duration and self.timescale:
+            return track.edit_duration / self.timescale
+        return track.duration_seconds
+
+    def to_ffprobe_dict(self):
+        """
+        Chuyển sang cấu trúc giống output của ffmpeg.probe để dùng thay thế trực tiếp
+
+        Returns:
+            dict: {'streams': [...], 'format': {...}}
+        """
+        streams = []
+        for index, track in enumerate(self.tracks):
+            duration = self.track_duration(track)
+            stream = {
+                'index': index,
+                'codec_name': track.codec_name,
+                'codec_tag_string': track.codec_tag.decode('latin-1') if track.codec_tag else '',
+                'codec_type': track.codec_type,
+                'time_base': f"1/{track.timescale}",
+                'duration': f"{duration:.6f}",
+                'nb_frames': str(track.sample_count),
+            }
+            if duration > 0:
+                stream['bit_rate'] = str(int(track.total_bytes * 8 / duration))
+            if track.codec_type == 'video':
+                rate = track.frame_rate
+                stream.update({
+                    'width': track.width,
+                    'height': track.height,
+                    'r_frame_rate': f"{rate.numerator}/{rate.denominator}",
+                    'avg_frame_rate': f"{rate.numerator}/{rate.denominator}",
+                })
+                if track.profile:
+                    stream['profile'] = track.profile
+                if track.level is not None:
+                    stream['level'] = track.level
+                if track.bit_depth:
+                    stream['pix_fmt'] = 'yuv420p10le' if track.bit_depth > 8 else 'yuv420p'
+            elif track.codec_type == 'audio':
+                stream.update({
+                    'sample_rate': str(track.sample_rate),
+                    'channels': track.channels,
+                })
+            streams.append(stream)
+
+        duration = self.duration_seconds
+        fmt = {
+            'filename': str(self.path),
+            'nb_streams': len(streams),
+            'format_name': 'mov,mp4,m4a,3gp,3g2,mj2',
+            'duration': f"{duration:.6f}",
+            'size': str(self.file_size),
+            'bit_rate': str(int(self.file_size * 8 / duration)) if duration > 0 else '0',
+        }
+        if self.major_brand:
+            fmt['tags'] = {'major_brand': self.major_brand}
+        return {'streams': streams, 'format': fmt}
+
+
+class _Mp4Reader:
+    """Đọc cấu trúc box từ buffer đã mmap"""
+
+    def __init__(self, buf, info):
+        self.buf = buf
+        self.info = info
+
+    def parse(self):
+        found_moov = False
+        box_offset = 0
+        for box_type, start, end in _iter_boxes(self.buf, 0, len(self.buf)):
+            self.info.boxes.setdefault(box_type.decode('latin-1'), (box_offset, end - box_offset))
+            box_offset = end
+            if box_type == b'ftyp':
+                self.info.major_brand = self.buf[start:start + 4].decode('latin-1').strip()
+            elif box_type == b'moov':
+                self._parse_moov(start, end)
+                found_moov = True
+            elif box_type == b'moof':
+                self.info.fragmented = True
+        if not found_moov:
+            raise Mp4ParseError("Không tìm thấy box moov")
+
+    def _parse_moov(self, start, end):
+        for box_type, child_start, child_end in _iter_boxes(self.buf, start, end):
+            if box_type == b'mvhd':
+                version = self.buf[child_start]
+                if version == 1:
+                    self.info.timescale, self.info.duration = struct.unpack_from('>IQ', self.buf, child_start + 20)
+                else:
+                    self.info.timescale, self.info.duration = struct.unpack_from('>II', self.buf, child_start + 12)
+            elif box_type == b'trak':
+                track = Mp4Track()
+                self._parse_container(track, child_start, child_end)
+                self.info.tracks.append(track)
+            elif box_type == b'mvex':
+                self.info.fragmented = True
+
+    def _parse_container(self, track, start, end, parent=b'trak'):
+        for box_type, child_start, child_end in _iter_boxes(self.buf, start, end):
+            if box_type in CONTAINER_BOXES:
+                self._parse_container(track, child_start, child_end, box_type)
+            elif box_type == b'hdlr' and parent != b'mdia':
+                # QuickTime có thêm hdlr của data handler ('alis'/'url ') trong minf: bỏ qua
+                continue
+            else:
+                handler = getattr(self, f"_parse_{box_type.decode('latin-1').strip()}", None)
+                if handler:
+                    handler(track, child_start, child_end)
+
+    def _parse_tkhd(self, track, start, end):
+        version = self.buf[start]
+        if version == 1:
+            track.track_id = struct.unpack_from('>I', self.buf, start + 20)[0]
+            size_offset = start + 88
+        else:
+            track.track_id = struct.unpack_from('>I', self.buf, start + 12)[0]
+            size_offset = start + 76
+        width, height = struct.unpack_from('>II', self.buf, size_offset)
+        track.width = width >> 16
+        track.height = height >> 16
+
+    def _parse_elst(self, track, start, end):
+        version = self.buf[start]
+        count = struct.unpack_from('>I', self.buf, start + 4)[0]
+        offset = start + 8
+        for _ in range(count):
+            if version == 1:
+                segment_duration, media_time = struct.unpack_from('>Qq', self.buf, offset)
+                offset += 20
+            else:
+                segment_duration, media_time = struct.unpack_from('>Ii', self.buf, offset)
+                offset += 12
+            if media_time >= 0:
+                track.media_time = media_time
+                track.edit_duration = segment_duration
+                break
+
+    def _parse_mdhd(self, track, start, end):
+        version = self.buf[start]
+        if version == 1:
+            track.timescale, track.duration = struct.unpack_from('>IQ', self.buf, start + 20)
+        else:
+            track.timescale, track.duration = struct.unpack_from('>II', self.buf, start + 12)
+
+    def _parse_hdlr(self, track, start, end):
+        track.handler = bytes(self.buf[start + 8:start + 12])
+
+    def _parse_stsd(self, track, start, end):
+        count = struct.unpack_from('>I', self.buf, start + 4)[0]
+        if count == 0:
+            return
+        for box_type, entry_start, entry_end in _iter_boxes(self.buf, start + 8, end):
+            track.codec_tag = box_type
+            # entry_start trỏ sau header 8 byte; 6 byte reserved + 2 byte data_reference_index
+            body = entry_start + 8
+            if track.handler == b'vide' and body + 28 <= entry_end:
+                width, height = struct.unpack_from('>HH', self.buf, body + 16)
+                track.width = track.width or width
+                track.height = track.height or height
+                # Visual sample entry dài 78 byte, sau đó là các box cấu hình codec (avcC/hvcC...)
+                if entry_start + 78 < entry_end:
+                    self._parse_codec_config(track, entry_start + 78, entry_end)
+            elif track.handler == b'soun' and body + 20 <= entry_end:
+                sound_version = struct.unpack_from('>H', self.buf, body)[0]
+                if sound_version == 2 and body + 40 <= entry_end:
+                    sample_rate, channels = struct.unpack_from('>dI', self.buf, body + 24)
+                    track.sample_rate = int(sample_rate)
+                    track.channels = channels
+                else:
+                    track.channels = struct.unpack_from('>H', self.buf, body + 8)[0]
+                    track.sample_rate = struct.unpack_from('>I', self.buf, body + 16)[0] >> 16
+            break
+
+    def _parse_codec_config(self, track, start, end):
+        for box_type, config_start, config_end in _iter_boxes(self.buf, start, end):
+            if box_type == b'avcC' and config_start + 4 <= config_end:
+                profile_idc, level_idc = self.buf[config_start + 1], self.buf[config_start + 3]
+                track.profile = H264_PROFILES.get(profile_idc)
+                track.level = level_idc
+                track.bit_depth = {110: 10, 66: 8, 77: 8, 88: 8, 100: 8}.get(profile_idc)
+            elif box_type == b'hvcC' and config_start + 18 <= config_end:
+                profile_idc = self.buf[config_start + 1] & 0x1f
+                track.profile = HEVC_PROFILES.get(profile_idc)
+                track.level = self.buf[config_start + 12]
+                track.bit_depth = (self.buf[config_start + 17] & 0x07) + 8
+
+    def _parse_stts(self, track, start, end):
+        count = struct.unpack_from('>I', self.buf, start + 4)[0]
+        values = _read_array(self.buf, start + 8, count * 2, 'I')
+        track.stts = list(zip(values[0::2], values[1::2]))
+
+    def _parse_ctts(self, track, start, end):
+        count = struct.unpack_from('>I', self.buf, start + 4)[0]
+        values = _read_array(self.buf, start + 8, count * 2, 'I')
+        # Version 1 dùng offset có dấu; version 0 một số encoder cũng ghi giá trị âm
+        offsets = [v - (1 << 32) if v & 0x80000000 else v for v in values[1::2]]
+        track.ctts = list(zip(values[0::2], offsets))
+
+    def _parse_stss(self, track, start, end):
+        count = struct.unpack_from('>I', self.buf, start + 4)[0]
+        track.stss = _read_array(self.buf, start + 8, count, 'I')
+
+    def _parse_stsc(self, track, start, end):
+        count = struct.unpack_from('>I', self.buf, start + 4)[0]
+        values = _read_array(self.buf, start + 8, count * 3, 'I')
+        track.stsc = list(zip(values[0::3], values[1::3], values[2::3]))
+
+    def _parse_stsz(self, track, start, end):
+        track.sample_size, track.sample_count = struct.unpack_from('>II', self.buf, start + 4)
+        if track.sample_size == 0:
+            track.sample_sizes = _read_array(self.buf, start + 12, track.sample_count, 'I')
+
+    def _parse_stco(self, track, start, end):
+        count = struct.unpack_from('>I', self.buf, start + 4)[0]
+        track.chunk_offsets = _read_array(self.buf, start + 8, count, 'I')
+
+    def _parse_co64(self, track, start, end):
+        count = struct.unpack_from('>I', self.buf, start + 4)[0]
+        track.chunk_offsets = _read_array(self.buf, start + 8, count, 'Q')
+
+
+def is_mp4_file(path):
+    """
+    Kiểm tra nhanh file có phải container MP4/MOV không (dựa trên header box đầu tiên)
+
+    Args:
+        path: Đường dẫn file
+
+    Returns:
+        bool: True nếu file bắt đầu bằng một box MP4 hợp lệ
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(8)
+        return len(header) == 8 and header[4:8] in TOP_LEVEL_BOXES
+    except OSError:
+        return False
+
+
+def parse_mp4(path):
+    """
+    Đọc file MP4/MOV bằng mmap, chỉ chạm vào các trang chứa header box và moov
+
+    Args:
+        path: Đường dẫn file
+
+    Returns:
+        Mp4Info: Thông tin container và các track
+
+    Raises:
+        Mp4ParseError: Nếu file không phải MP4 hoặc là fragmented MP4
+    """
+    path = str(path)
+    if not is_mp4_file(path):
+        raise Mp4ParseError(f"Không phải file MP4/MOV: {path}")
+
+    file_size = os.path.getsize(path)
+    info = Mp4Info(path, file_size)
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            try:
+                _Mp4Reader(buf, info).parse()
+            except struct.error as e:
+                raise Mp4ParseError(f"Box MP4 bị hỏng: {e}")
+
+    if info.fragmented and not any(t.sample_count for t in info.tracks):
+        raise Mp4ParseError("Fragmented MP4 không có bảng mẫu trong moov")
+    if not info.tracks:
+        raise Mp4ParseError("File MP4 không có track nào")
+    return info
+
+
+def _can_parse(path):
+    return str(path).lower().endswith(MP4_EXTENSIONS) or is_mp4_file(path)
+
+
+def probe(path):
+    """
+    Thay thế cho ffmpeg.probe: đọc MP4 trực tiếp, fallback sang ffprobe với container khác
+
+    Args:
+        path: Đường dẫn file video
+
+    Returns:
+        dict: Cấu trúc {'streams': [...], 'format': {...}} giống ffmpeg.probe
+    """
+    if _can_parse(path):
+        try:
+            return parse_mp4(path).to_ffprobe_dict()
+        except (Mp4ParseError, OSError, ValueError) as e:
+            logger.debug(f"Không đọc được MP4 trực tiếp ({e}), dùng ffprobe: {path}")
+    return ffmpeg.probe(str(path))
+
+
+def get_keyframe_times(path):
+    """
+    Lấy thời điểm các keyframe của stream video đầu tiên
+
+    Args:
+        path: Đường dẫn file video
+
+    Returns:
+        list: Danh sách thời điểm keyframe (giây), tăng dần
+    """
+    if _can_parse(path):
+        try:
+            return parse_mp4(path).keyframe_times()
+        except (Mp4ParseError, OSError, ValueError) as e:
+            logger.debug(f"Không đọc được keyframe từ MP4 ({e}), dùng ffprobe: {path}")
+
+    result = ffmpeg.probe(str(path), select_streams='v:0', show_entries='packet=pts_time,flags')
+    return sorted(
+        float(packet['pts_time'])
+        for packet in result.get('packets', [])
+        if 'K' in packet.get('flags', '') and packet.get('pts_time') not in (None, 'N/A')
+    )
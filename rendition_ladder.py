@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rendition Ladder Module
+Tạo tất cả các đoạn ở nhiều độ phân giải: mỗi đoạn một lệnh ffmpeg seek đúng mốc kế hoạch,
+decode đoạn đó một lần, tách thành các nhánh scale riêng và encode đồng thời
+"""
+
+import logging
+from pathlib import Path
+
+import ffmpeg
+import mp4_parser
+from config import config
+from cut_planner import active_area
+from encoder_tuning import get_encoder_settings
+from ffmpeg_scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def vertical_crop(area, target_width, target_height):
+    """
+    Khung cắt lớn nhất có tỉ lệ đích, đặt giữa vùng hình
+
+    Args:
+        area: Vùng hình [rộng, cao, x, y]
+        target_width, target_height: Kích thước đích (xác định tỉ lệ)
+
+    Returns:
+        list: [rộng, cao, x, y] (kích thước chẵn)
+    """
+    width, height, x, y = area
+    if width * target_height > height * target_width:
+        crop_height = height
+        crop_width = height * target_width // target_height
+    else:
+        crop_width = width
+        crop_height = width * target_height // target_width
+    crop_width -= crop_width % 2
+    crop_height -= crop_height % 2
+    return [crop_width, crop_height, x + (width - crop_width) // 2, y + (height - crop_height) // 2]
+
+
+class RenditionLadder:
+    """Encode một video thành các đoạn × các rendition, mỗi đoạn decode một lần"""
+
+    def __init__(self, video_path):
+        """
+        Khởi tạo RenditionLadder
+
+        Args:
+            video_path: File video nguồn
+        """
+        self.video_path = str(video_path)
+        probe = mp4_parser.probe(self.video_path)
+        video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), {})
+        self.width = int(video_stream.get('width') or 0)
+        self.height = int(video_stream.get('height') or 0)
+        self.has_audio = any(s['codec_type'] == 'audio' for s in probe['streams'])
+
+    def renditions(self, ladder=None):
+        """
+        Các rendition cần tạo, bỏ các mức lớn hơn nguồn (không upscale)
+
+        Returns:
+            list: Cấu hình rendition từ Config.RENDITION_LADDER
+        """
+        ladder = ladder if ladder is not None else config.RENDITION_LADDER
+        selected = [r for r in ladder if not self.height or r['height'] <= self.height]
+        if not selected and ladder:
+            # Nguồn nhỏ hơn mọi mức: giữ một bản ở độ phân giải gốc
+            smallest = min(ladder, key=lambda r: r['height'])
+            selected = [dict(smallest, height=self.height)]
+        return selected
+
+    def branch(self, rendition):
+        """Nhánh encode cho một rendition: tên, hàm lọc video và tham số output"""
+        settings = get_encoder_settings()
+        options = {
+            'vcodec': rendition.get('vcodec', config.VIDEO_CODEC),
+            'preset': rendition.get('preset', settings['preset']),
+            'crf': rendition.get('crf', settings['crf']),
+            'pix_fmt': 'yuv420p',
+        }
+        if rendition.get('maxrate'):
+            options['maxrate'] = rendition['maxrate']
+            options['bufsize'] = rendition.get('bufsize', rendition['maxrate'])
+        if self.has_audio:
+            options['acodec'] = config.AUDIO_CODEC
+            if rendition.get('audio_bitrate'):
+                options['b:a'] = rendition['audio_bitrate']
+        return {
+            'name': rendition['name'],
+            'video': lambda stream: stream.filter('scale', -2, rendition['height']),
+            'options': options,
+        }
+
+    def vertical_branch(self, mode=None):
+        """
+        Nhánh xuất đoạn dọc (Config.VERTICAL_WIDTH x VERTICAL_HEIGHT)
+
+        Args:
+            mode: "center", "detect" hoặc "pad" (mặc định Config.VERTICAL_CROP_MODE)
+        """
+        mode = mode or config.VERTICAL_CROP_MODE
+        width, height = config.VERTICAL_WIDTH, config.VERTICAL_HEIGHT
+
+        if mode == 'pad':
+            def video(stream):
+                return (
+                    stream
+                    .filter('scale', width, height, force_original_aspect_ratio='decrease')
+                    .filter('pad', width, height, '(ow-iw)/2', '(oh-ih)/2')
+                    .filter('setsar', 1)
+                )
+        else:
+            area = [self.width, self.height, 0, 0]
+            if mode == 'detect':
+                # Vùng hình được dò một lần cho cả video và cache lại
+                area = active_area(self.video_path) or area
+            crop = vertical_crop(area, width, height)
+            logger.info(f"Vertical crop box ({mode}): {crop}")
+
+            def video(stream):
+                return (
+                    stream
+                    .filter('crop', *crop)
+                    .filter('scale', width, height)
+                    .filter('setsar', 1)
+                )
+
+        branch = self.branch({'name': 'vertical', 'height': height})
+        branch['video'] = video
+        return branch
+
+    def _fan_out(self, stream, count, audio=False):
+        """Tách một đoạn đã cắt cho count nhánh"""
+        if count == 1:
+            return [stream]
+        copies = stream.filter_multi_output('asplit' if audio else 'split', count)
+        return [copies[i] for i in range(count)]
+
+    def encode(self, segments, output_dir, safe_title, branches):
+        """
+        Encode mọi đoạn cho mọi nhánh, mỗi đoạn một lệnh ffmpeg
+
+        Mỗi lệnh seek tới mốc bắt đầu của đoạn (seek ở input kèm encode lại nên đúng từng frame;
+        segment muxer chỉ cắt được ở keyframe đầu tiên sau mốc nên đoạn có thể lệch xa kế hoạch),
+        decode đoạn đó một lần rồi tách cho các nhánh. Các đoạn chạy lần lượt nên bộ nhớ không
+        tăng theo số đoạn
+
+        Args:
+            segments: Các đoạn theo kế hoạch (segment_number, start, duration); có thể chỉ là
+                một phần kế hoạch khi tạo lại các đoạn lỗi
+            output_dir: Thư mục output của video (mỗi nhánh một thư mục con)
+            safe_title: Tiền tố tên file
+            branches: Danh sách nhánh (xem branch())
+
+        Returns:
+            dict: {tên nhánh: [đường dẫn các đoạn theo thứ tự]}
+        """
+        numbers = [segment.get('segment_number', i + 1) for i, segment in enumerate(segments)]
+
+        branch_dirs = {}
+        for branch in branches:
+            branch_dirs[branch['name']] = Path(output_dir) / branch['name']
+            branch_dirs[branch['name']].mkdir(parents=True, exist_ok=True)
+
+        scheduler = get_scheduler()
+        for number, segment in zip(numbers, segments):
+            source = ffmpeg.input(self.video_path, ss=segment['start'], t=segment['duration'])
+            videos = self._fan_out(source.video, len(branches))
+            audios = self._fan_out(source.audio, len(branches), audio=True) if self.has_audio else [None] * len(branches)
+
+            with scheduler.slot(encode=True, threads=scheduler.cpu_budget) as slot:
+                # Các encoder của đoạn này chạy đồng thời: chia đều số thread được cấp
+                branch_threads = max(1, slot.threads // len(branches))
+                outputs = []
+                for branch, branch_video, branch_audio in zip(branches, videos, audios):
+                    streams = [branch['video'](branch_video)]
+                    if branch_audio is not None:
+                        streams.append(branch_audio)
+                    outputs.append(
+                        ffmpeg.output(
+                            *streams,
+                            str(branch_dirs[branch['name']] / f"{safe_title}_{number:02d}.mp4"),
+                            movflags='+faststart',
+                            threads=branch_threads,
+                            **branch['options']
+                        )
+                    )
+                slot.run(
+                    ffmpeg.merge_outputs(*outputs).overwrite_output(),
+                    quiet=True, capture_stdout=True, capture_stderr=True
+                )
+
+        results = {}
+        for name, branch_dir in branch_dirs.items():
+            paths = [branch_dir / f"{safe_title}_{number:02d}.mp4" for number in numbers]
+            results[name] = [str(path) for path in paths if path.exists()]
+            logger.info(f"Rendition {name}: {len(results[name])}/{len(segments)} segments")
+        return results
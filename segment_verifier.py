@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Segment Verifier Module
+Kiểm tra các đoạn video sau khi cắt mà không cần decode: đọc cấu trúc box MP4,
+phát hiện file bị cắt cụt, so thời lượng với kế hoạch và kiểm tra có đủ stream.
+
+Kiểm tra thư mục đã cắt: python segment_verifier.py <thư mục đoạn> [...] [--repair]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import mp4_parser
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def verify_segment(path, expected_duration=None, expect_audio=False, tolerance=None):
+    """
+    Kiểm tra một đoạn video bằng cách đọc container (không decode)
+
+    Args:
+        path: File đoạn video
+        expected_duration: Thời lượng theo kế hoạch (giây)
+        expect_audio: True nếu nguồn có audio
+        tolerance: Sai lệch thời lượng cho phép (mặc định Config.VERIFY_DURATION_TOLERANCE)
+
+    Returns:
+        dict: {'path', 'ok', 'errors', 'duration'}
+    """
+    tolerance = config.VERIFY_DURATION_TOLERANCE if tolerance is None else tolerance
+    result = {'path': str(path), 'ok': False, 'errors': [], 'duration': None}
+    try:
+        file_size = os.path.getsize(path)
+    except OSError:
+        result['errors'].append("không tìm thấy file")
+        return result
+    if not file_size:
+        result['errors'].append("file rỗng")
+        return result
+
+    try:
+        info = mp4_parser.parse_mp4(path)
+    except (mp4_parser.Mp4ParseError, OSError, ValueError) as e:
+        result['errors'].append(f"container hỏng: {e}")
+        return result
+
+    video = info.video_track
+    if video is None or not video.sample_count:
+        result['errors'].append("không có stream video")
+    if expect_audio and (info.audio_track is None or not info.audio_track.sample_count):
+        result['errors'].append("không có stream audio")
+
+    # Dữ liệu mẫu phải nằm trọn trong file (phát hiện mdat bị cắt cụt)
+    for track in info.tracks:
+        offsets = track.sample_offsets()
+        if offsets:
+            last = len(offsets) - 1
+            if offsets[last] + track.sample_size_at(last) > file_size:
+                result['errors'].append(f"track {track.track_id} bị cắt cụt")
+
+    durations = [info.track_duration(t) for t in (video, info.audio_track) if t is not None]
+    result['duration'] = max(durations) if durations else info.duration_seconds
+    if expected_duration is not None and abs(result['duration'] - expected_duration) > tolerance:
+        result['errors'].append(
+            f"thời lượng {result['duration']:.2f}s khác kế hoạch {expected_duration:.2f}s"
+        )
+
+    result['ok'] = not result['errors']
+    return result
+
+
+def copy_tolerance(source_path):
+    """
+    Sai lệch thời lượng cho phép với đoạn stream copy
+
+    Đoạn copy bắt đầu từ keyframe tại hoặc trước điểm cắt nên có thể dài hơn kế hoạch
+    tới một GOP: cộng GOP dài nhất của nguồn vào Config.VERIFY_DURATION_TOLERANCE.
+    Không đọc được keyframe thì bỏ qua kiểm tra thời lượng (trả về vô cực)
+    """
+    try:
+        info = mp4_parser.parse_mp4(source_path)
+        times = info.video_track.keyframe_times() + [info.duration_seconds]
+    except (mp4_parser.Mp4ParseError, OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Không đọc được keyframe của {source_path}, bỏ qua kiểm tra thời lượng: {e}")
+        return float('inf')
+    longest_gop = max((b - a for a, b in zip(times, times[1:])), default=0.0)
+    return config.VERIFY_DURATION_TOLERANCE + longest_gop
+
+
+def verify_segments(output_files, expect_audio=False, max_workers=None, tolerance=None):
+    """
+    Kiểm tra song song các đoạn video
+
+    Args:
+        output_files: Danh sách entry đoạn (path, duration, segment_number)
+        expect_audio: True nếu nguồn có audio
+        max_workers: Số luồng kiểm tra (mặc định Config.VERIFY_MAX_WORKERS)
+        tolerance: Sai lệch thời lượng cho phép (đoạn stream copy: copy_tolerance)
+
+    Returns:
+        dict: Báo cáo {'checked', 'passed', 'failed': [...], 'results': [...]}
+    """
+    def check(entry):
+        result = verify_segment(entry['path'], entry.get('duration'), expect_audio, tolerance)
+        result['segment_number'] = entry.get('segment_number')
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers or config.VERIFY_MAX_WORKERS) as pool:
+        results = list(pool.map(check, output_files))
+    failed = [r for r in results if not r['ok']]
+    return {
+        'checked': len(results),
+        'passed': len(results) - len(failed),
+        'failed': failed,
+        'results': results,
+    }
+
+
+@contextmanager
+def _manifest_config(params):
+    """
+    Tạm đặt Config theo params của manifest để đoạn được sửa giống lần cắt ban đầu
+    (chế độ cắt, rendition, xuất dọc)
+    """
+    values = {'SPLIT_MODE': params.get('split_mode', config.SPLIT_MODE)}
+    ladder = params.get('rendition_ladder')
+    values['ENABLE_RENDITION_LADDER'] = bool(ladder)
+    if ladder:
+        values['RENDITION_LADDER'] = [r for r in config.RENDITION_LADDER if r['name'] in ladder]
+    vertical = params.get('vertical_export')
+    values['VERTICAL_EXPORT'] = bool(vertical)
+    if vertical:
+        values['VERTICAL_WIDTH'], values['VERTICAL_HEIGHT'], values['VERTICAL_CROP_MODE'] = vertical
+
+    original = {key: getattr(config, key) for key in values}
+    for key, value in values.items():
+        setattr(config, key, value)
+    try:
+        yield
+    finally:
+        for key, value in original.items():
+            setattr(config, key, value)
+
+
+def _rendition_entries(manifest, segments_dir):
+    """Entry của các đoạn rendition/dọc ghi trong manifest (<thư mục>/<rendition>/<file>)"""
+    return [
+        {
+            'filename': s['filename'],
+            'path': str(segments_dir / name / s['filename']),
+            'rendition': name,
+            'segment_number': s['segment_number'],
+            'start_time': s['start'],
+            'duration': s['duration'],
+            'size': size,
+        }
+        for s in manifest['segments']
+        for name, size in (s.get('renditions') or {}).items()
+    ]
+
+
+def verify_directory(segments_dir, repair=False):
+    """
+    Kiểm tra các đoạn trong một thư mục theo manifest; nếu repair thì chỉ tạo lại đoạn lỗi
+
+    Manifest có rendition ladder hoặc xuất dọc thì kiểm tra từng rendition trong thư mục con.
+    Khi sửa, Config được đặt tạm theo params của manifest (chế độ cắt, rendition) nên
+    không nên gọi song song với việc cắt video khác
+
+    Returns:
+        dict: Báo cáo kiểm tra (sau khi sửa nếu repair)
+    """
+    from rendition_ladder import RenditionLadder
+    from smart_render import SmartRenderer
+    from video_splitter import VideoSplitter
+
+    segments_dir = Path(segments_dir)
+    manifest_path = segments_dir / config.SEGMENT_MANIFEST_NAME
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    source_path = manifest['source']['path']
+    try:
+        expect_audio = any(s['codec_type'] == 'audio' for s in mp4_parser.probe(source_path)['streams'])
+    except Exception:
+        expect_audio = False
+
+    params = manifest.get('params', {})
+    if params.get('rendition_ladder') or params.get('vertical_export'):
+        entries = _rendition_entries(manifest, segments_dir)
+        if not entries:
+            raise ValueError("manifest chưa ghi rendition nào")
+        report = verify_segments(entries, expect_audio=expect_audio)
+        if repair and report['failed']:
+            splitter = VideoSplitter()
+            splitter.output_path = segments_dir.parent
+            with _manifest_config(params):
+                output_files, report = splitter.repair_renditions(
+                    RenditionLadder(source_path), manifest, manifest_path, segments_dir, segments_dir.name,
+                    entries, report, expect_audio
+                )
+        return report
+
+    split_mode = params.get('split_mode', config.SPLIT_MODE)
+    tolerance = copy_tolerance(source_path) if split_mode == 'copy' else None
+
+    entries = [
+        {'path': str(segments_dir / s['filename']), 'duration': s['duration'], 'segment_number': s['segment_number']}
+        for s in manifest['segments']
+    ]
+    report = verify_segments(entries, expect_audio=expect_audio, tolerance=tolerance)
+    if repair and report['failed']:
+        splitter = VideoSplitter()
+        splitter.output_path = segments_dir.parent
+        # Cắt lại đúng chế độ đã dùng khi tạo đoạn (giống split_video)
+        renderer = SmartRenderer(source_path) if split_mode != 'copy' else None
+        with _manifest_config(params):
+            output_files, report = splitter.repair_segments(
+                source_path, segments_dir.name, manifest, manifest_path, segments_dir, entries, report,
+                renderer=renderer, tolerance=tolerance
+            )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kiểm tra các đoạn video đã cắt (không decode)")
+    parser.add_argument('folders', nargs='+', help="Thư mục chứa các đoạn (có manifest)")
+    parser.add_argument('--repair', action='store_true', help="Cắt lại các đoạn lỗi")
+    args = parser.parse_args()
+
+    total_failed = 0
+    for folder in args.folders:
+        try:
+            report = verify_directory(folder, repair=args.repair)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ {folder}: không đọc được manifest ({e})")
+            total_failed += 1
+            continue
+        print(f"{'✅' if not report['failed'] else '❌'} {folder}: {report['passed']}/{report['checked']} đoạn đạt")
+        for result in report['failed']:
+            print(f"   - {os.path.basename(result['path'])}: {'; '.join(result['errors'])}")
+        total_failed += len(report['failed'])
+    return 1 if total_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Render Module
+Cắt đoạn video chính xác tới từng frame với tốc độ gần bằng stream copy:
+chỉ encode lại phần từ điểm cắt tới keyframe kế tiếp, phần còn lại được copy nguyên
+"""
+
+import os
+import re
+import bisect
+import logging
+import tempfile
+import functools
+import subprocess
+from pathlib import Path
+
+import ffmpeg
+import mp4_parser
+from config import config
+from encoder_tuning import get_encoder_settings
+from ffmpeg_scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Encoder tương ứng với codec nguồn (chỉ các codec ghép nối được qua MPEG-TS)
+SMART_ENCODERS = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+}
+
+# Một dòng encoder video trong "ffmpeg -encoders": " V....D libx264   ..."
+ENCODER_LINE = re.compile(r'^\s*V\S*\s+(\S+)', re.MULTILINE)
+
+# Tên profile ffprobe -> tham số profile của libx264
+X264_PROFILES = {
+    'Constrained Baseline': 'baseline',
+    'Main': 'main',
+    'High': 'high',
+    'High 10': 'high10',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def available_encoders():
+    """
+    Các encoder video của ffmpeg đang cài (chỉ hỏi ffmpeg một lần)
+
+    Returns:
+        frozenset: Tên encoder, rỗng nếu không hỏi được ffmpeg
+    """
+    try:
+        output = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True, timeout=30
+        ).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Không lấy được danh sách encoder của ffmpeg: {e}")
+        return frozenset()
+    return frozenset(ENCODER_LINE.findall(output))
+
+
+def smart_encoder(codec_name, available=None):
+    """
+    Encoder dùng để encode lại phần đầu đoạn cho codec nguồn
+
+    Args:
+        codec_name: Codec của stream video nguồn
+        available: Các encoder có sẵn (mặc định hỏi ffmpeg); rỗng = không rõ, coi như có đủ
+
+    Returns:
+        str: Tên encoder hoặc None nếu codec không ghép được hoặc ffmpeg thiếu encoder
+    """
+    encoder = SMART_ENCODERS.get(codec_name)
+    available = available_encoders() if available is None else available
+    if encoder and available and encoder not in available:
+        logger.warning(f"ffmpeg không có encoder {encoder}, không smart render được codec {codec_name}")
+        return None
+    return encoder
+
+
+class SmartRenderer:
+    """Tạo đoạn video cho một file nguồn, dùng chung thông tin keyframe giữa các đoạn"""
+
+    def __init__(self, video_path):
+        """
+        Khởi tạo SmartRenderer
+
+        Args:
+            video_path: File video nguồn
+        """
+        self.video_path = str(video_path)
+        probe = mp4_parser.probe(self.video_path)
+        self.video_stream = next((s for s in probe['streams'] if s['codec_type'] == 'video'), None)
+        self.has_audio = any(s['codec_type'] == 'audio' for s in probe['streams'])
+        self._keyframes = None
+
+    @property
+    def keyframes(self):
+        """Thời điểm keyframe của nguồn (chỉ đọc một lần cho tất cả các đoạn)"""
+        if self._keyframes is None:
+            self._keyframes = mp4_parser.get_keyframe_times(self.video_path)
+        return self._keyframes
+
+    @property
+    def encoder(self):
+        if not self.video_stream:
+            return None
+        return smart_encoder(self.video_stream.get('codec_name'))
+
+    def can_reencode(self):
+        """ffmpeg có encoder cho Config.VIDEO_CODEC (dùng khi encode lại cả đoạn)"""
+        available = available_encoders()
+        return not available or config.VIDEO_CODEC in available
+
+    def next_keyframe(self, time_point):
+        """Keyframe đầu tiên tại hoặc sau time_point (None nếu không có)"""
+        index = bisect.bisect_left(self.keyframes, time_point - config.KEYFRAME_TOLERANCE)
+        if index < len(self.keyframes):
+            return self.keyframes[index]
+        return None
+
+    def encoder_options(self):
+        """
+        Tham số encode khớp với stream gốc để phần encode lại ghép được với phần copy
+
+        Returns:
+            dict: Tham số output cho ffmpeg
+        """
+        settings = get_encoder_settings()
+        options = {
+            'vcodec': self.encoder or config.VIDEO_CODEC,
+            'preset': settings['preset'],
+            'crf': settings['crf'],
+        }
+        if settings['threads']:
+            options['threads'] = settings['threads']
+        stream = self.video_stream or {}
+        if stream.get('pix_fmt'):
+            options['pix_fmt'] = stream['pix_fmt']
+        if options['vcodec'] == 'libx264':
+            if stream.get('profile') in X264_PROFILES:
+                options['profile:v'] = X264_PROFILES[stream['profile']]
+            if stream.get('level'):
+                options['level'] = f"{int(stream['level']) / 10:.1f}"
+        return options
+
+    def render(self, output_path, start, duration):
+        """
+        Tạo đoạn [start, start + duration) chính xác tới từng frame
+
+        Args:
+            output_path: File đầu ra
+            start: Thời điểm bắt đầu (giây)
+            duration: Thời lượng (giây)
+
+        Returns:
+            dict: Cách tạo đoạn ('copy', 'smart' hoặc 'reencode') và số giây đã encode lại
+        """
+        mode, keyframe = self.plan(start, duration)
+        if mode == 'reencode':
+            return self._reencode_or_copy(output_path, start, duration)
+        if mode == 'copy':
+            self._copy(output_path, start, duration)
+            return {'mode': 'copy', 'reencoded_seconds': 0.0}
+        self._smart_render(output_path, start, keyframe, start + duration)
+        return {'mode': 'smart', 'reencoded_seconds': keyframe - start}
+
+    def plan(self, start, duration):
+        """
+        Cách tạo đoạn [start, start + duration)
+
+        Returns:
+            tuple: (mode, keyframe) - mode là 'copy', 'smart' hoặc 'reencode',
+                   keyframe là keyframe đầu tiên trong đoạn (None khi encode lại cả đoạn)
+        """
+        end = start + duration
+        if not self.encoder:
+            # Codec không ghép nối được (hoặc thiếu encoder) - encode lại toàn bộ đoạn
+            return 'reencode', None
+
+        keyframe = self.next_keyframe(start)
+        if keyframe is None or keyframe >= end - config.KEYFRAME_TOLERANCE:
+            # Không có keyframe trong đoạn (đoạn ngắn hơn một GOP)
+            return 'reencode', None
+
+        if keyframe - start <= config.KEYFRAME_TOLERANCE:
+            # Điểm cắt trùng keyframe - copy toàn bộ là đã chính xác
+            return 'copy', keyframe
+        return 'smart', keyframe
+
+    def _reencode_or_copy(self, output_path, start, duration):
+        """Encode lại cả đoạn; ffmpeg không có encoder nào dùng được thì copy (cắt theo keyframe)"""
+        if not self.can_reencode():
+            logger.warning(f"ffmpeg không có encoder {config.VIDEO_CODEC}, dùng stream copy cho {Path(output_path).name}")
+            self._copy(output_path, start, duration)
+            return {'mode': 'copy', 'reencoded_seconds': 0.0}
+        self.reencode(output_path, start, duration)
+        return {'mode': 'reencode', 'reencoded_seconds': duration}
+
+    def reencode(self, output_path, start, duration, preview=None):
+        """
+        Encode lại toàn bộ đoạn (seek chính xác trước input)
+
+        Args:
+            preview: Hàm nhận stream video đã decode và trả về các output phụ (thumbnail...),
+                     để dùng chung lượt decode với đoạn video
+        """
+        options = self.encoder_options()
+        with get_scheduler().slot(encode=True, threads=options.get('threads')) as slot:
+            options['threads'] = slot.threads
+            source = ffmpeg.input(self.video_path, ss=start, t=duration)
+            if preview:
+                video = source.video.filter_multi_output('split')
+                outputs = [ffmpeg.output(video[0], source['a?'], str(output_path),
+                                         acodec=config.AUDIO_CODEC, movflags='faststart', **options)]
+                outputs.extend(preview(video[1]))
+            else:
+                outputs = [source.output(str(output_path), acodec=config.AUDIO_CODEC,
+                                         movflags='faststart', **options)]
+            slot.run(
+                ffmpeg.merge_outputs(*outputs).overwrite_output(),
+                quiet=True, capture_stdout=True, capture_stderr=True
+            )
+
+    def _copy(self, output_path, start, duration):
+        with get_scheduler().slot() as slot:
+            slot.run(
+                ffmpeg
+                .input(self.video_path, ss=start, t=duration)
+                .output(
+                    str(output_path),
+                    vcodec='copy',
+                    acodec='copy',
+                    avoid_negative_ts='make_zero'
+                )
+                .overwrite_output(),
+                quiet=True, capture_stdout=True, capture_stderr=True
+            )
+
+    def _smart_render(self, output_path, start, keyframe, end):
+        """Encode [start, keyframe), copy [keyframe, end) rồi ghép lại với audio copy từ nguồn"""
+        output_path = Path(output_path)
+        with tempfile.TemporaryDirectory(dir=output_path.parent, prefix='.smart_') as temp_dir:
+            head_path = os.path.join(temp_dir, 'head.ts')
+            tail_path = os.path.join(temp_dir, 'tail.ts')
+            list_path = os.path.join(temp_dir, 'parts.txt')
+
+            # Phần đầu: encode lại từ điểm cắt tới keyframe kế tiếp
+            options = self.encoder_options()
+            with get_scheduler().slot(encode=True, threads=options.get('threads')) as slot:
+                options['threads'] = slot.threads
+                slot.run(
+                    ffmpeg
+                    .input(self.video_path, ss=start, t=keyframe - start)
+                    .video
+                    .output(head_path, f='mpegts', **options)
+                    .overwrite_output(),
+                    quiet=True, capture_stdout=True, capture_stderr=True
+                )
+
+            # Phần còn lại: copy nguyên từ keyframe (MPEG-TS mang SPS/PPS trong stream nên ghép được)
+            with get_scheduler().slot() as slot:
+                slot.run(
+                    ffmpeg
+                    .input(self.video_path, ss=keyframe, t=end - keyframe)
+                    .video
+                    .output(tail_path, vcodec='copy', f='mpegts')
+                    .overwrite_output(),
+                    quiet=True, capture_stdout=True, capture_stderr=True
+                )
+
+            with open(list_path, 'w', encoding='utf-8') as f:
+                f.write("file 'head.ts'\nfile 'tail.ts'\n")
+
+            video = ffmpeg.input(list_path, f='concat', safe=0).video
+            streams = [video]
+            if self.has_audio:
+                streams.append(ffmpeg.input(self.video_path, ss=start, t=end - start)['a'])
+            with get_scheduler().slot() as slot:
+                slot.run(
+                    ffmpeg
+                    .output(
+                        *streams,
+                        str(output_path),
+                        c='copy',
+                        movflags='faststart',
+                        avoid_negative_ts='make_zero'
+                    )
+                    .overwrite_output(),
+                    quiet=True, capture_stdout=True, capture_stderr=True
+                )
+        logger.debug(f"Smart render {output_path.name}: encode {keyframe - start:.2f}s, copy {end - keyframe:.2f}s")
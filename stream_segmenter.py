@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stream Segmenter Module
+Cắt video ngay trong lúc tải: ffmpeg đọc trực tiếp luồng media mà yt-dlp chọn
+và ghi thẳng ra các đoạn bằng segment muxer, không lưu file gốc đầy đủ
+"""
+
+import os
+import re
+import csv
+import time
+import random
+import logging
+import threading
+
+import ffmpeg
+from config import config
+from ffmpeg_scheduler import get_scheduler
+from video_splitter import VideoSplitter
+
+try:
+    import yt_dlp
+except ImportError:
+    yt_dlp = None
+
+logger = logging.getLogger(__name__)
+
+
+class StreamSegmenter:
+    """Tải và cắt một video thành các đoạn trong cùng một lượt ffmpeg"""
+
+    def __init__(self, log_callback=None, segment_callback=None, stop_check=None):
+        """
+        Khởi tạo StreamSegmenter
+
+        Args:
+            log_callback: Hàm ghi log ra giao diện
+            segment_callback: Hàm được gọi với đường dẫn mỗi đoạn ngay khi đoạn đó hoàn thành
+            stop_check: Hàm trả về True khi người dùng dừng
+        """
+        self.log_callback = log_callback
+        self.segment_callback = segment_callback
+        self.stop_check = stop_check or (lambda: False)
+
+    def log(self, message):
+        logger.info(message)
+        if self.log_callback:
+            self.log_callback(message)
+
+    def resolve_formats(self, url, format_selector):
+        """
+        Lấy URL media trực tiếp (và header HTTP) cho các format yt-dlp chọn
+
+        Returns:
+            dict: Thông tin video với danh sách 'inputs' gồm (url, headers)
+        """
+        if yt_dlp is None:
+            raise RuntimeError("Cần cài yt-dlp để cắt trong lúc tải")
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'format': format_selector,
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+        formats = info.get('requested_formats') or [info]
+        return {
+            'id': info.get('id', ''),
+            'title': info.get('title', 'Unknown'),
+            'duration': info.get('duration') or 0,
+            'inputs': [(f['url'], f.get('http_headers') or {}) for f in formats],
+        }
+
+    def _build_command(self, inputs, boundaries, pattern, list_path):
+        streams = []
+        for index, (media_url, headers) in enumerate(inputs):
+            input_args = {}
+            if headers:
+                input_args['headers'] = ''.join(f"{key}: {value}\r\n" for key, value in headers.items())
+            if media_url.startswith('http'):
+                input_args.update(reconnect=1, reconnect_streamed=1, reconnect_delay_max=5)
+            source = ffmpeg.input(media_url, **input_args)
+            if len(inputs) == 1:
+                streams.extend([source['v:0'], source['a?']])
+            else:
+                # Format video và audio riêng (DASH): lấy video từ input đầu, audio từ input sau
+                streams.append(source['v:0'] if index == 0 else source['a:0'])
+
+        return (
+            ffmpeg
+            .output(
+                *streams,
+                pattern,
+                c='copy',
+                f='segment',
+                segment_times=','.join(f"{t:.3f}" for t in boundaries),
+                segment_start_number=1,
+                segment_format='mp4',
+                segment_format_options='movflags=+faststart',
+                segment_list=list_path,
+                segment_list_type='csv',
+                reset_timestamps=1
+            )
+            .overwrite_output()
+            .global_args('-nostats', '-loglevel', 'error')
+        )
+
+    def _publish_finished(self, list_path, output_dir, finished, total):
+        """Báo các đoạn mới hoàn thành (segment muxer ghi danh sách khi đóng mỗi đoạn)"""
+        if not os.path.exists(list_path):
+            return
+        with open(list_path, 'r', encoding='utf-8', newline='') as f:
+            rows = [row for row in csv.reader(f) if row]
+        for row in rows[len(finished):]:
+            path = os.path.join(output_dir, row[0])
+            finished.append(path)
+            self.log(f"Đoạn {len(finished)}/{total} sẵn sàng: {row[0]}")
+            if self.segment_callback:
+                self.segment_callback(path)
+
+    def split(self, url, output_dir, format_selector=None, safe_title=None, info=None):
+        """
+        Tải và cắt video thành các đoạn; đoạn nào xong sẽ dùng được ngay
+
+        Args:
+            url: URL video
+            output_dir: Thư mục chứa các đoạn
+            format_selector: Format selector của yt-dlp
+            safe_title: Tiền tố tên file (mặc định lấy từ tiêu đề video)
+            info: Kết quả resolve_formats đã có (khỏi gọi yt-dlp lần nữa)
+
+        Returns:
+            list: Đường dẫn các đoạn đã tạo theo thứ tự
+        """
+        info = info or self.resolve_formats(url, format_selector)
+        if not info['duration']:
+            raise ValueError("Không biết thời lượng video, không lập được kế hoạch cắt")
+
+        if safe_title is None:
+            safe_title = "".join(c for c in info['title'] if c.isalnum() or c in (' ', '-', '_')).rstrip()[:50]
+        segments = VideoSplitter().calculate_segments(info['duration'], seed=random.randrange(2 ** 32))
+        boundaries = [segment['start'] for segment in segments[1:]]
+        self.log(f"Cắt trong lúc tải: {len(segments)} đoạn, không lưu file gốc")
+
+        os.makedirs(output_dir, exist_ok=True)
+        pattern = os.path.join(output_dir, f"{safe_title.replace('%', '%%')}_%02d.mp4")
+        list_path = os.path.join(output_dir, f".{info['id'] or 'stream'}_segments.csv")
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+        stream = self._build_command(info['inputs'], boundaries, pattern, list_path)
+        finished = []
+        try:
+            with get_scheduler().slot() as slot:
+                process = slot.popen(stream, pipe_stderr=True)
+                # Đọc stderr song song: pipe đầy sẽ làm ffmpeg dừng chờ trong lúc ta chỉ poll
+                stderr_chunks = []
+                reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+                reader.start()
+                try:
+                    while process.poll() is None:
+                        if self.stop_check():
+                            process.terminate()
+                            break
+                        self._publish_finished(list_path, output_dir, finished, len(segments))
+                        time.sleep(config.STREAM_SPLIT_POLL_INTERVAL)
+                    process.wait()
+                except BaseException:
+                    process.kill()
+                    process.wait()
+                    raise
+                finally:
+                    reader.join()
+            if process.returncode and not self.stop_check():
+                raise ffmpeg.Error('ffmpeg', None, b''.join(stderr_chunks))
+            self._publish_finished(list_path, output_dir, finished, len(segments))
+        except BaseException:
+            # Lỗi giữa chừng: xóa các đoạn đã ghi để lượt tải đầy đủ không để lại file dở
+            self._remove_segments(output_dir, safe_title)
+            raise
+        finally:
+            if os.path.exists(list_path):
+                os.remove(list_path)
+
+        # Dừng giữa chừng: bỏ đoạn đang ghi dở, giữ các đoạn đã hoàn thành
+        self._remove_segments(output_dir, safe_title, keep=finished)
+        return finished
+
+    def _remove_segments(self, output_dir, safe_title, keep=()):
+        """Xóa các file đoạn <safe_title>_NN.mp4 trong output_dir, trừ các file trong keep"""
+        name_pattern = re.compile(re.escape(safe_title) + r'_\d{2,}\.mp4$')
+        for name in os.listdir(output_dir):
+            path = os.path.join(output_dir, name)
+            if name_pattern.match(name) and path not in keep:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Không xóa được đoạn dở {path}: {e}")
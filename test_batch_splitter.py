@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test duyệt thư mục khi cắt hàng loạt: lọc đuôi file, bỏ qua thư mục ẩn và thư mục chứa đoạn đã cắt;
+file trùng tên ở thư mục con khác nhau không ghi đè nhau (cần ffmpeg)
+"""
+
+import os
+import tempfile
+import types
+
+import mp4_parser
+from config import config
+from batch_splitter import BatchSplitter, iter_video_files
+from test_video_splitter import split_config
+from test_smart_render import FFMPEG, make_clip
+
+
+def test_iter_video_files_filters_tree():
+    with tempfile.TemporaryDirectory() as root:
+        paths = {
+            'a.mp4': True,
+            'notes.txt': False,
+            'sub/b.MKV': True,
+            'sub/deeper/c.webm': True,
+            '.hidden/d.mp4': False,
+            'done_segments/e.mp4': False,
+            f'done_segments/{config.SEGMENT_MANIFEST_NAME}': False,
+        }
+        for relative in paths:
+            full_path = os.path.join(root, relative)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            open(full_path, 'wb').close()
+
+        files = iter_video_files(root)
+        assert isinstance(files, types.GeneratorType)
+        found = sorted(os.path.relpath(path, root).replace(os.sep, '/') for path in files)
+        assert found == sorted(relative for relative, expected in paths.items() if expected)
+        print(f"✅ Duyệt thư mục tìm đúng {len(found)} video")
+
+
+def test_same_names_in_subfolders():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, 'videos')
+        for folder, duration in (('a', 6), ('b', 9)):
+            os.makedirs(os.path.join(root, folder))
+            make_clip(os.path.join(root, folder, 'clip.mp4'), duration=duration, gop=25)
+        output = os.path.join(temp_dir, 'out')
+
+        probes = []
+        original_probe = mp4_parser.probe
+
+        def counting_probe(path):
+            probes.append(path)
+            return original_probe(path)
+
+        mp4_parser.probe = counting_probe
+        try:
+            with split_config(MIN_CUT_TIME=4, MAX_CUT_TIME=4, SPLIT_MODE='copy', CUT_PLANNER='random'):
+                batch = BatchSplitter(max_workers=2, output_path=output, log_callback=lambda message: None)
+                stats = batch.run(root)
+                assert (stats['done'], stats['failed']) == (2, 0), stats
+                # Mỗi file chỉ probe một lần (kết quả probe được chuyển cho VideoSplitter)
+                assert sorted(probes) == sorted(os.path.join(root, folder, 'clip.mp4') for folder in 'ab')
+
+                titles = {batch.output_title(os.path.join(root, folder, 'clip.mp4'), root) for folder in 'ab'}
+                assert len(titles) == 2 and sorted(os.listdir(output)) == sorted(titles)
+
+                again = BatchSplitter(max_workers=2, output_path=output, log_callback=lambda message: None).run(root)
+                assert (again['done'], again['skipped']) == (0, 2), again
+        finally:
+            mp4_parser.probe = original_probe
+        print("✅ File trùng tên ở thư mục khác nhau có thư mục output riêng")
+
+
+if __name__ == "__main__":
+    test_iter_video_files_filters_tree()
+    test_same_names_in_subfolders()
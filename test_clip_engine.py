@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test cắt clip: seek tới keyframe trước điểm bắt đầu, frame đầu của clip đúng điểm bắt đầu
+và thời lượng audio/video đúng yêu cầu (cần ffmpeg)
+"""
+
+import os
+import tempfile
+import subprocess
+
+from clip_engine import ClipEngine
+from test_smart_render import FFMPEG, make_clip, stream_durations
+
+FPS = 25
+
+
+def frame_at(path, time_point):
+    """Frame xám 80x60 tại time_point (seek chính xác phía output)"""
+    return subprocess.run(
+        ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', path, '-ss', f'{time_point:.3f}',
+         '-frames:v', '1', '-vf', 'scale=80:60', '-pix_fmt', 'gray', '-f', 'rawvideo', '-'],
+        capture_output=True, check=True
+    ).stdout
+
+
+def difference(a, b):
+    return sum(abs(x - y) for x, y in zip(a, b)) / len(a)
+
+
+def test_clip_start_and_duration():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = make_clip(os.path.join(temp_dir, 'source.mp4'), duration=8, gop=50, fps=FPS)
+        output = os.path.join(temp_dir, 'clip.mp4')
+        start, duration = 3.2, 2.5
+
+        engine = ClipEngine(source)
+        stats = engine.render(output, start, duration)
+        # Seek tới keyframe 2.0s và chỉ decode 1.2s pre-roll
+        assert abs(stats['seek_point'] - 2.0) < 1e-6
+        assert abs(stats['preroll'] - 1.2) < 1e-6
+
+        durations = stream_durations(output)
+        assert abs(durations['video'] - duration) < 1.5 / FPS, durations
+        assert abs(durations['audio'] - duration) < 0.05, durations
+
+        # Frame đầu của clip giống frame nguồn tại điểm bắt đầu hơn các frame lân cận
+        first = frame_at(output, 0)
+        distances = {offset: difference(first, frame_at(source, start + offset / FPS)) for offset in (-2, -1, 0, 1, 2)}
+        assert min(distances, key=distances.get) == 0, distances
+        print(f"✅ Clip bắt đầu đúng {start}s và dài {durations['video']:.2f}s")
+
+
+if __name__ == "__main__":
+    test_clip_start_and_duration()
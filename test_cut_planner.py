@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test chọn điểm cắt: bám theo điểm ưu tiên trong khoảng MIN-MAX, không có thì cắt ngẫu nhiên;
+tìm khoảng lặng theo từng chunk audio
+"""
+
+import numpy as np
+
+from config import config
+from cut_planner import _silent_runs
+from video_splitter import VideoSplitter
+
+
+def test_boundaries_snap_to_preferred_cuts():
+    splitter = VideoSplitter()
+    preferred = [30.0, 72.5, 100.0, 144.2, 250.0]
+    segments = splitter.calculate_segments(300, seed=3, preferred_cuts=preferred)
+
+    boundaries = [s['start'] for s in segments[1:]]
+    assert boundaries[0] == 72.5
+    assert boundaries[1] == 144.2
+    for segment in segments[:-1]:
+        assert config.MIN_CUT_TIME <= segment['duration'] <= config.MAX_CUT_TIME
+    assert abs(sum(s['duration'] for s in segments) - 300) < 1e-9
+    print(f"✅ Điểm cắt bám theo điểm ưu tiên: {boundaries}")
+
+
+def test_falls_back_to_random_without_candidates():
+    splitter = VideoSplitter()
+    random_plan = splitter.calculate_segments(300, seed=5)
+    out_of_range = splitter.calculate_segments(300, seed=5, preferred_cuts=[10.0, 290.0])
+    assert random_plan == out_of_range
+    print("✅ Không có điểm ưu tiên trong khoảng thì cắt ngẫu nhiên")
+
+
+def test_silent_runs_span_chunks():
+    mask = np.array([0, 1, 1, 0, 0, 1, 1, 1, 1, 0, 1, 1], dtype=bool)
+    runs = []
+    run_start = None
+    # Đọc theo chunk 4 cửa sổ: khoảng lặng nối qua ranh giới chunk vẫn phải liền mạch
+    for offset in range(0, len(mask), 4):
+        run_start = _silent_runs(mask[offset:offset + 4], offset, run_start, runs)
+    if run_start is not None:
+        runs.append((run_start, len(mask)))
+    assert runs == [(1, 3), (5, 9), (10, 12)]
+    print(f"✅ Khoảng lặng qua nhiều chunk: {runs}")
+
+
+if __name__ == "__main__":
+    test_boundaries_snap_to_preferred_cuts()
+    test_falls_back_to_random_without_candidates()
+    test_silent_runs_span_chunks()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test chọn tham số encode: chọn cấu hình theo mục tiêu, đọc profile và giá trị dự phòng
+khi chưa hiệu chỉnh (file profile tạm, không cần ffmpeg)
+"""
+
+import os
+import json
+import tempfile
+
+from config import config
+from encoder_tuning import EncoderCalibrator, select_targets, load_profile, get_encoder_settings
+
+
+def result(preset, crf, threads, fps, bytes_per_second, ssim):
+    return {'preset': preset, 'crf': crf, 'threads': threads, 'fps': fps,
+            'bytes_per_second': bytes_per_second, 'ssim': ssim, 'psnr': 40.0}
+
+
+RESULTS = [
+    result('ultrafast', 23, 0, 400.0, 900000, 0.960),   # nhanh nhất nhưng dưới ngưỡng SSIM
+    result('veryfast', 23, 4, 250.0, 500000, 0.975),
+    result('medium', 23, 0, 120.0, 300000, 0.980),
+    result('slow', 20, 2, 40.0, 280000, 0.990),
+]
+
+
+def test_select_targets():
+    targets = select_targets(RESULTS, min_ssim=0.97)
+    assert targets['speed']['preset'] == 'veryfast'
+    assert targets['size']['preset'] == 'slow'
+    # balanced = tốc độ tương đối × dung lượng tương đối: veryfast 1.0*0.56 > medium 0.48*0.93 > slow 0.16*1.0
+    assert targets['balanced']['preset'] == 'veryfast'
+
+    # Không cấu hình nào đạt ngưỡng: chọn trong tất cả thay vì không có gì
+    assert select_targets(RESULTS, min_ssim=0.999)['speed']['preset'] == 'ultrafast'
+    assert select_targets([], min_ssim=0.97) == {}
+    print("✅ Chọn cấu hình theo mục tiêu, bỏ cấu hình dưới ngưỡng SSIM")
+
+
+def test_profile_and_fallback():
+    original = (config.ENCODER_PROFILE_PATH, config.ENCODING_TARGET)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        profile_path = os.path.join(temp_dir, 'encoder_profile.json')
+        config.ENCODER_PROFILE_PATH = profile_path
+        config.ENCODING_TARGET = 'balanced'
+        try:
+            # Chưa hiệu chỉnh: dùng ENCODING_PRESET/CRF_VALUE, để ffmpeg tự chọn số thread
+            assert load_profile() is None
+            assert get_encoder_settings() == {
+                'preset': config.ENCODING_PRESET, 'crf': config.CRF_VALUE, 'threads': None
+            }
+
+            EncoderCalibrator(log_callback=lambda message: None).save_profile(RESULTS)
+            assert load_profile()['min_ssim'] == config.ENCODER_MIN_SSIM
+            assert get_encoder_settings() == {'preset': 'veryfast', 'crf': 23, 'threads': 4}
+            assert get_encoder_settings('speed')['threads'] == 4
+            assert get_encoder_settings('size') == {'preset': 'slow', 'crf': 20, 'threads': 2}
+
+            # Profile được đọc lại khi file thay đổi
+            with open(profile_path, 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+            profile['targets'] = {'balanced': result('faster', 26, 0, 1, 1, 1)}
+            with open(profile_path, 'w', encoding='utf-8') as f:
+                json.dump(profile, f)
+            stat = os.stat(profile_path)
+            os.utime(profile_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            # threads = 0 trong profile nghĩa là để ffmpeg tự chọn
+            assert get_encoder_settings() == {'preset': 'faster', 'crf': 26, 'threads': None}
+            # Mục tiêu không có trong profile: giá trị dự phòng
+            assert get_encoder_settings('size')['preset'] == config.ENCODING_PRESET
+
+            # Profile hỏng: coi như chưa hiệu chỉnh
+            broken_path = os.path.join(temp_dir, 'broken.json')
+            with open(broken_path, 'w', encoding='utf-8') as f:
+                f.write('{"targets": ')
+            config.ENCODER_PROFILE_PATH = broken_path
+            assert load_profile() is None
+            assert get_encoder_settings()['preset'] == config.ENCODING_PRESET
+            print("✅ Đọc profile, làm mới khi file đổi và dùng giá trị dự phòng khi chưa có")
+        finally:
+            config.ENCODER_PROFILE_PATH, config.ENCODING_TARGET = original
+
+
+if __name__ == "__main__":
+    test_select_targets()
+    test_profile_and_fallback()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test bộ lập lịch ffmpeg: cấp thread trong ngân sách và xếp hàng khi hết ngân sách
+"""
+
+import os
+import sys
+import time
+import threading
+
+from config import config
+from ffmpeg_scheduler import FFmpegScheduler
+
+
+def test_thread_grant_is_clamped_to_budget():
+    scheduler = FFmpegScheduler(cpu_budget=4, max_jobs=2)
+    with scheduler.slot(encode=True, threads=16) as slot:
+        assert slot.threads == 4
+    with scheduler.slot(encode=True) as slot:
+        assert slot.threads == 2
+    with scheduler.slot() as slot:
+        assert slot.threads == 1
+    assert scheduler.used_threads == 0 and scheduler.active_jobs == 0
+    print("✅ Số thread được cấp nằm trong ngân sách")
+
+
+def test_jobs_queue_when_budget_exhausted():
+    scheduler = FFmpegScheduler(cpu_budget=4, max_jobs=4)
+    lock = threading.Lock()
+    peak = {'threads': 0}
+
+    def job():
+        with scheduler.slot(encode=True, threads=3):
+            with lock:
+                peak['threads'] = max(peak['threads'], scheduler.used_threads)
+            time.sleep(0.05)
+
+    workers = [threading.Thread(target=job) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert peak['threads'] <= 4, "Không được vượt quá ngân sách CPU"
+    assert scheduler.used_threads == 0
+    print(f"✅ Job xếp hàng đúng, đỉnh sử dụng {peak['threads']}/4 thread")
+
+
+def test_popen_lowers_priority():
+    if not hasattr(os, 'setpriority'):
+        print("⏭️ Bỏ qua: hệ điều hành không hỗ trợ setpriority")
+        return
+    with FFmpegScheduler(cpu_budget=1, max_jobs=1).slot() as slot:
+        process = slot.popen([sys.executable, '-c', 'import time; time.sleep(2)'])
+        try:
+            expected = min(os.getpriority(os.PRIO_PROCESS, 0) + config.FFMPEG_NICENESS, 19)
+            assert os.getpriority(os.PRIO_PROCESS, process.pid) == expected
+        finally:
+            process.kill()
+            process.wait()
+    print("✅ Tiến trình con chạy với độ ưu tiên thấp hơn")
+
+
+if __name__ == "__main__":
+    test_thread_grant_is_clamped_to_budget()
+    test_jobs_queue_when_budget_exhausted()
+    test_popen_lowers_priority()
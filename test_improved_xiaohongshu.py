@@ -6,14 +6,18 @@ Test script cho các cải tiến mới của Xiaohongshu downloader
 
 import sys
 import os
+import tempfile
 from xiaohongshu_downloader import XiaohongshuDownloader
 
+# Thống kê endpoint của test với mạng thật không ghi vào cache của ứng dụng
+STATS_PATH = os.path.join(tempfile.gettempdir(), 'xhs_test_strategy_stats.json')
+
 def test_xiaohongshu_downloader():
     print("=== Test Xiaohongshu Downloader với các cải tiến mới ===")
     print()
     
     # Khởi tạo downloader
-    downloader = XiaohongshuDownloader()
+    downloader = XiaohongshuDownloader(stats_path=STATS_PATH)
     
     # Test URLs
     test_urls = [
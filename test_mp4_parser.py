@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test mp4_parser với file MP4 tổng hợp (không cần ffmpeg), và file .mov thật so với ffprobe (cần ffmpeg)
+"""
+
+import os
+import struct
+import tempfile
+
+import ffmpeg
+import mp4_parser
+from test_smart_render import FFMPEG, make_clip
+
+
+def box(box_type, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type, payload, version=0):
+    return box(box_type, struct.pack('>I', version << 24) + payload)
+
+
+def build_sample_mp4():
+    """Tạo MP4 gồm 1 track video 10 frame @ 25fps, keyframe ở frame 1 và 6"""
+    frame_sizes = [100] * 10
+    mdat_payload = b'\x00' * sum(frame_sizes)
+
+    ftyp = box(b'ftyp', b'isom' + struct.pack('>I', 512) + b'isomavc1')
+
+    visual_entry = (
+        b'\x00' * 6 + struct.pack('>H', 1)
+        + b'\x00' * 16 + struct.pack('>HH', 640, 360)
+        + b'\x00' * 50
+    )
+    stsd = full_box(b'stsd', struct.pack('>I', 1) + box(b'avc1', visual_entry))
+    stts = full_box(b'stts', struct.pack('>III', 1, 10, 512))
+    stss = full_box(b'stss', struct.pack('>III', 2, 1, 6))
+    stsc = full_box(b'stsc', struct.pack('>IIII', 1, 1, 10, 1))
+    stsz = full_box(b'stsz', struct.pack('>II', 0, 10) + struct.pack('>10I', *frame_sizes))
+
+    def build_moov(chunk_offset):
+        stco = full_box(b'stco', struct.pack('>II', 1, chunk_offset))
+        stbl = box(b'stbl', stsd + stts + stss + stsc + stsz + stco)
+        minf = box(b'minf', stbl)
+        hdlr = full_box(b'hdlr', struct.pack('>I', 0) + b'vide' + b'\x00' * 13)
+        mdhd = full_box(b'mdhd', struct.pack('>IIII', 0, 0, 12800, 5120) + b'\x00' * 4)
+        mdia = box(b'mdia', mdhd + hdlr + minf)
+        tkhd = full_box(b'tkhd', struct.pack('>IIIII', 0, 0, 1, 0, 400) + b'\x00' * 52
+                        + struct.pack('>II', 640 << 16, 360 << 16))
+        trak = box(b'trak', tkhd + mdia)
+        mvhd = full_box(b'mvhd', struct.pack('>IIII', 0, 0, 1000, 400) + b'\x00' * 80)
+        return box(b'moov', mvhd + trak)
+
+    moov = build_moov(0)
+    chunk_offset = len(ftyp) + len(moov) + 8
+    moov = build_moov(chunk_offset)
+    return ftyp + moov + box(b'mdat', mdat_payload), chunk_offset
+
+
+def write_temp(data, suffix='.mp4'):
+    handle, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(handle, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_parse_synthetic_mp4():
+    data, chunk_offset = build_sample_mp4()
+    path = write_temp(data)
+    try:
+        info = mp4_parser.parse_mp4(path)
+        video = info.video_track
+
+        assert info.major_brand == 'isom'
+        assert abs(info.duration_seconds - 0.4) < 1e-9
+        assert video.codec_name == 'h264'
+        assert (video.width, video.height) == (640, 360)
+        assert video.frame_rate == 25
+        assert video.sample_count == 10
+        assert info.keyframe_times() == [0.0, 0.2]
+        assert video.sample_offsets() == [chunk_offset + 100 * i for i in range(10)]
+
+        probe = mp4_parser.probe(path)
+        assert probe['streams'][0]['codec_type'] == 'video'
+        assert probe['streams'][0]['r_frame_rate'] == '25/1'
+        assert float(probe['streams'][0]['duration']) == 0.4
+        assert int(probe['format']['size']) == len(data)
+        print("✅ Parse MP4 tổng hợp thành công")
+    finally:
+        os.remove(path)
+
+
+def test_truncated_mp4_is_rejected():
+    data, _ = build_sample_mp4()
+    path = write_temp(data[:-500])
+    try:
+        try:
+            mp4_parser.parse_mp4(path)
+            assert False, "File bị cắt cụt phải báo lỗi"
+        except mp4_parser.Mp4ParseError:
+            pass
+        print("✅ Phát hiện file MP4 bị cắt cụt")
+    finally:
+        os.remove(path)
+
+
+def test_non_mp4_detection():
+    path = write_temp(b'\x1a\x45\xdf\xa3' + b'\x00' * 64, suffix='.mkv')
+    try:
+        assert not mp4_parser.is_mp4_file(path)
+        print("✅ Nhận diện file không phải MP4")
+    finally:
+        os.remove(path)
+
+
+def test_quicktime_matches_ffprobe():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # minf của .mov có thêm hdlr cho data handler, không được ghi đè handler của mdia
+        path = make_clip(os.path.join(temp_dir, 'clip.mov'), duration=4, gop=25)
+        expected = {stream['codec_type']: stream for stream in ffmpeg.probe(path)['streams']}
+        info = mp4_parser.parse_mp4(path)
+        actual = {stream['codec_type']: stream for stream in mp4_parser.probe(path)['streams']}
+
+        assert set(actual) == set(expected) == {'video', 'audio'}, actual
+        assert (actual['video']['width'], actual['video']['height']) == (expected['video']['width'],
+                                                                          expected['video']['height'])
+        assert actual['audio']['sample_rate'] == expected['audio']['sample_rate']
+        for codec_type in ('video', 'audio'):
+            assert abs(float(actual[codec_type]['duration']) - float(expected[codec_type]['duration'])) < 0.05
+        assert info.keyframe_times()[:4] == [0.0, 1.0, 2.0, 3.0]
+        print("✅ Parse file .mov khớp ffprobe")
+
+
+if __name__ == "__main__":
+    test_parse_synthetic_mp4()
+    test_truncated_mp4_is_rejected()
+    test_non_mp4_detection()
+    test_quicktime_matches_ffprobe()
@@ -6,6 +6,7 @@ Script test với link Xiaohongshu thật để kiểm tra tính năng
 
 import sys
 import os
+import tempfile
 from pathlib import Path
 
 # Thêm thư mục hiện tại vào Python path
@@ -14,11 +15,14 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from xiaohongshu_downloader import XiaohongshuDownloader
 from config import config
 
+# Thống kê endpoint của test với mạng thật không ghi vào cache của ứng dụng
+STATS_PATH = os.path.join(tempfile.gettempdir(), 'xhs_test_strategy_stats.json')
+
 def test_with_sample_urls():
     """Test với một số URL mẫu"""
     print("=== Test với URL mẫu ===")
     
-    downloader = XiaohongshuDownloader()
+    downloader = XiaohongshuDownloader(stats_path=STATS_PATH)
     
     # Một số URL mẫu để test (có thể không hoạt động do bảo mật)
     sample_urls = [
@@ -67,7 +71,7 @@ def test_error_handling():
     """Test xử lý lỗi"""
     print("\n=== Test xử lý lỗi ===")
     
-    downloader = XiaohongshuDownloader()
+    downloader = XiaohongshuDownloader(stats_path=STATS_PATH)
     
     # Test với URL không hợp lệ
     invalid_urls = [
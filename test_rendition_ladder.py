@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test chọn rendition và tham số encode của từng nhánh (không cần ffmpeg);
+encode thật: mỗi đoạn của mỗi rendition đúng mốc cắt kế hoạch (cần ffmpeg)
+"""
+
+import os
+import tempfile
+
+import ffmpeg
+import mp4_parser
+from config import config
+from ffmpeg_scheduler import FFmpegSlot
+from rendition_ladder import RenditionLadder, vertical_crop
+from test_mp4_parser import build_sample_mp4, write_temp
+from test_smart_render import FFMPEG, make_clip, stream_durations
+
+
+def encode_recording_runs(ladder, segments, output_dir, branches):
+    """Chạy ladder.encode, trả về (kết quả, danh sách file output của từng lệnh ffmpeg)"""
+    runs = []
+    original = FFmpegSlot.run
+
+    def run(slot, stream_spec, **kwargs):
+        runs.append([arg for arg in ffmpeg.compile(stream_spec) if arg.endswith('.mp4')][1:])
+        return original(slot, stream_spec, **kwargs)
+
+    FFmpegSlot.run = run
+    try:
+        return ladder.encode(segments, output_dir, 'clip', branches), runs
+    finally:
+        FFmpegSlot.run = original
+
+
+def test_renditions_skip_upscale():
+    data, _ = build_sample_mp4()
+    path = write_temp(data)
+    try:
+        ladder = RenditionLadder(path)
+        assert (ladder.height, ladder.has_audio) == (360, False)
+
+        levels = [
+            {'name': '720p', 'height': 720},
+            {'name': '360p', 'height': 360, 'crf': 24, 'maxrate': '1M'},
+            {'name': '240p', 'height': 240},
+        ]
+        assert [r['name'] for r in ladder.renditions(levels)] == ['360p', '240p']
+        # Nguồn nhỏ hơn mọi mức thì giữ một bản ở độ phân giải gốc
+        assert ladder.renditions(levels[:1]) == [{'name': '720p', 'height': 360}]
+
+        branch = ladder.branch(levels[1])
+        assert branch['options']['crf'] == 24
+        assert branch['options']['bufsize'] == '1M'
+        assert 'acodec' not in branch['options']
+        print("✅ Chọn rendition không upscale và đúng tham số encode")
+    finally:
+        os.remove(path)
+
+
+def test_vertical_crop_box():
+    # Khung ngang: cắt theo chiều cao, đặt giữa
+    assert vertical_crop([1920, 1080, 0, 0], 1080, 1920) == [606, 1080, 657, 0]
+    # Vùng hình sau khi bỏ viền đen letterbox
+    assert vertical_crop([640, 360, 0, 60], 9, 16) == [202, 360, 219, 60]
+    # Nguồn hẹp hơn 9:16: giữ nguyên chiều rộng, cắt bớt chiều cao
+    assert vertical_crop([400, 1000, 0, 0], 9, 16) == [400, 710, 0, 145]
+    print("✅ Khung cắt dọc 9:16 đúng tỉ lệ và nằm giữa vùng hình")
+
+
+def test_encode_cuts_at_plan():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # GOP 10s: mốc cắt không trùng keyframe nguồn
+        source = make_clip(os.path.join(temp_dir, 'source.mp4'), duration=30, gop=250)
+        segments = [
+            {'segment_number': 1, 'start': 0, 'duration': 12.2},
+            {'segment_number': 2, 'start': 12.2, 'duration': 10.8},
+            {'segment_number': 3, 'start': 23, 'duration': 7},
+        ]
+        ladder = RenditionLadder(source)
+        branches = [ladder.branch({'name': '240p', 'height': 240}), ladder.branch({'name': '120p', 'height': 120})]
+        results, runs = encode_recording_runs(ladder, segments, temp_dir, branches)
+        # Mỗi đoạn một lệnh ffmpeg encode cho mọi rendition: bộ nhớ không tăng theo số đoạn
+        assert [sorted(os.path.basename(path) for path in outputs) for outputs in runs] == [
+            ['clip_01.mp4'] * 2, ['clip_02.mp4'] * 2, ['clip_03.mp4'] * 2], runs
+        for name, paths in results.items():
+            assert len(paths) == 3, (name, paths)
+            for segment, path in zip(segments, paths):
+                durations = stream_durations(path)
+                assert abs(durations['video'] - segment['duration']) < 1.5 / 25, (name, path, durations)
+                assert abs(durations['audio'] - segment['duration']) < 0.05, (name, path, durations)
+        print("✅ Mỗi đoạn của mọi rendition đúng mốc cắt kế hoạch")
+
+        # Tạo lại riêng một đoạn của một rendition
+        again = ladder.encode(segments[1:2], os.path.join(temp_dir, 'again'), 'clip', branches[1:])
+        assert [os.path.basename(path) for path in again['120p']] == ['clip_02.mp4']
+        assert abs(stream_durations(again['120p'][0])['video'] - 10.8) < 1.5 / 25
+        print("✅ Encode lại một đoạn giữa video đúng mốc cắt")
+
+
+def test_vertical_segments():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    original = (config.VERTICAL_WIDTH, config.VERTICAL_HEIGHT)
+    config.VERTICAL_WIDTH, config.VERTICAL_HEIGHT = 90, 160
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = make_clip(os.path.join(temp_dir, 'source.mp4'), duration=10, gop=250)
+            segments = [
+                {'segment_number': 1, 'start': 0, 'duration': 4.4},
+                {'segment_number': 2, 'start': 4.4, 'duration': 5.6},
+            ]
+            ladder = RenditionLadder(source)
+            for mode in ('center', 'pad'):
+                output_dir = os.path.join(temp_dir, mode)
+                results, runs = encode_recording_runs(ladder, segments, output_dir, [ladder.vertical_branch(mode)])
+                paths = results['vertical']
+                assert len(paths) == 2, (mode, paths)
+                # Chỉ xuất dọc: mỗi lệnh ffmpeg một encoder cho một đoạn
+                assert [[os.path.basename(path) for path in outputs] for outputs in runs] == [
+                    ['clip_01.mp4'], ['clip_02.mp4']], (mode, runs)
+                for segment, path in zip(segments, paths):
+                    video = next(s for s in mp4_parser.probe(path)['streams'] if s['codec_type'] == 'video')
+                    assert (int(video['width']), int(video['height'])) == (90, 160), (mode, video)
+                    durations = stream_durations(path)
+                    assert abs(durations['video'] - segment['duration']) < 1.5 / 25, (mode, path, durations)
+                    assert abs(durations['audio'] - segment['duration']) < 0.05, (mode, path, durations)
+        print("✅ Đoạn dọc đúng kích thước và đúng mốc cắt kế hoạch")
+    finally:
+        config.VERTICAL_WIDTH, config.VERTICAL_HEIGHT = original
+
+
+if __name__ == "__main__":
+    test_renditions_skip_upscale()
+    test_vertical_crop_box()
+    test_encode_cuts_at_plan()
+    test_vertical_segments()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test manifest cắt video: kế hoạch cắt cố định theo seed và bỏ qua đoạn đã hoàn thành
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from video_splitter import VideoSplitter
+
+
+def test_seeded_plan_is_stable():
+    splitter = VideoSplitter()
+    first = splitter.calculate_segments(600, seed=42)
+    second = splitter.calculate_segments(600, seed=42)
+    assert first == second, "Cùng seed phải cho cùng kế hoạch cắt"
+    assert abs(sum(s['duration'] for s in first) - 600) < 1e-9
+    print(f"✅ Kế hoạch cắt ổn định: {len(first)} đoạn")
+
+
+def test_manifest_roundtrip_and_reuse():
+    splitter = VideoSplitter()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        source = temp_dir / 'source.mp4'
+        source.write_bytes(b'\x00' * 1024)
+
+        segments = splitter.calculate_segments(300, seed=7)
+        manifest = splitter._new_manifest(str(source), 'video', 300, 7, segments)
+        manifest_path = temp_dir / 'segments_manifest.json'
+        splitter._save_manifest(manifest_path, manifest)
+
+        loaded = splitter._load_manifest(manifest_path, str(source))
+        assert loaded == manifest
+
+        # Đoạn đã ghi xong và khớp checksum thì được dùng lại
+        first = loaded['segments'][0]
+        segment_path = temp_dir / first['filename']
+        segment_path.write_bytes(b'segment-data')
+        first['size'] = segment_path.stat().st_size
+        first['checksum'] = splitter._file_checksum(segment_path)
+        assert splitter._existing_segment(temp_dir, first) is not None
+
+        # Đoạn bị hỏng hoặc chưa có thì phải tạo lại
+        segment_path.write_bytes(b'segment-dat!')
+        assert splitter._existing_segment(temp_dir, first) is None
+        assert splitter._existing_segment(temp_dir, loaded['segments'][1]) is None
+
+        # Nguồn thay đổi thì manifest bị bỏ qua
+        source.write_bytes(b'\x00' * 2048)
+        os.utime(source, (0, 0))
+        assert splitter._load_manifest(manifest_path, str(source)) is None
+        print("✅ Manifest lưu/đọc và kiểm tra đoạn đã có thành công")
+
+
+if __name__ == "__main__":
+    test_seeded_plan_is_stable()
+    test_manifest_roundtrip_and_reuse()
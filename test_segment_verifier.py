@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test kiểm tra đoạn video sau khi cắt: cấu trúc, thời lượng, stream (không cần ffmpeg)
+"""
+
+import os
+
+from config import config
+from segment_verifier import copy_tolerance, verify_segment, verify_segments
+from test_mp4_parser import build_sample_mp4, write_temp
+
+
+def test_verify_segment_checks():
+    data, _ = build_sample_mp4()
+    good = write_temp(data)
+    truncated = write_temp(data[:-300])
+    try:
+        assert verify_segment(good, expected_duration=0.4, tolerance=0.05)['ok']
+        assert not verify_segment(good, expected_duration=2.0, tolerance=0.05)['ok']
+        assert not verify_segment(good, expect_audio=True)['ok']
+        assert not verify_segment(truncated)['ok']
+
+        report = verify_segments([
+            {'path': good, 'duration': 0.4, 'segment_number': 1},
+            {'path': truncated, 'duration': 0.4, 'segment_number': 2},
+        ], tolerance=0.05)
+        assert (report['checked'], report['passed']) == (2, 1)
+        assert report['failed'][0]['segment_number'] == 2
+        print("✅ Kiểm tra đoạn phát hiện đúng file lỗi")
+
+        # Đoạn stream copy được lệch thêm một GOP (keyframe 0s và 0.2s, video dài 0.4s)
+        assert abs(copy_tolerance(good) - (config.VERIFY_DURATION_TOLERANCE + 0.2)) < 1e-9
+        assert copy_tolerance(truncated + '.khongco') == float('inf')
+        print("✅ Sai lệch cho phép với đoạn copy tính theo GOP dài nhất")
+    finally:
+        os.remove(good)
+        os.remove(truncated)
+
+
+if __name__ == "__main__":
+    test_verify_segment_checks()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test smart render: chọn copy / encode phần đầu + copy phần sau / encode lại cả đoạn,
+thời lượng đoạn đúng kế hoạch và dự phòng khi ffmpeg thiếu encoder (cần ffmpeg)
+"""
+
+import os
+import shutil
+import tempfile
+import subprocess
+
+import mp4_parser
+from config import config
+from smart_render import SmartRenderer, available_encoders, smart_encoder
+
+FFMPEG = shutil.which('ffmpeg')
+
+
+def make_clip(path, duration=10, gop=50, fps=25, size='320x240', audio=True):
+    """Video test (testsrc2, h264) có keyframe mỗi gop frame và audio sine nếu cần"""
+    args = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate={fps}:duration={duration}']
+    if audio:
+        args += ['-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}']
+    args += ['-c:v', 'libx264', '-preset', 'ultrafast', '-g', str(gop), '-keyint_min', str(gop),
+             '-sc_threshold', '0', '-pix_fmt', 'yuv420p']
+    if audio:
+        args += ['-c:a', 'aac', '-shortest']
+    subprocess.run(args + [str(path)], check=True)
+    return str(path)
+
+
+def stream_durations(path):
+    """Thời lượng (giây) của từng loại stream trong file: {'video': ..., 'audio': ...}"""
+    return {
+        stream['codec_type']: float(stream['duration'])
+        for stream in mp4_parser.probe(str(path))['streams']
+        if stream.get('duration')
+    }
+
+
+def test_smart_encoder_fallback():
+    assert smart_encoder('h264', frozenset({'libx264', 'libx265'})) == 'libx264'
+    # ffmpeg không có libx265: không smart render hevc
+    assert smart_encoder('hevc', frozenset({'libx264'})) is None
+    assert smart_encoder('vp9', frozenset({'libx264'})) is None
+    # Không hỏi được ffmpeg thì giữ encoder mặc định
+    assert smart_encoder('hevc', frozenset()) == 'libx265'
+    print("✅ Chỉ dùng encoder smart render mà ffmpeg có sẵn")
+
+
+def can_read_mpegts(temp_dir):
+    """Một số bản ffmpeg build tĩnh bị lỗi khi đọc MPEG-TS (smart render ghép qua MPEG-TS)"""
+    path = os.path.join(temp_dir, 'probe.ts')
+    subprocess.run(['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-f', 'lavfi',
+                    '-i', 'testsrc2=size=64x64:rate=5:duration=1', '-c:v', 'libx264', path], check=True)
+    return subprocess.run(['ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', path, '-f', 'null', '-'],
+                          capture_output=True).returncode == 0
+
+
+def test_render_modes_and_durations():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    assert 'libx264' in available_encoders()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = make_clip(os.path.join(temp_dir, 'source.mp4'))
+        renderer = SmartRenderer(source)
+        assert renderer.keyframes[:3] == [0.0, 2.0, 4.0]
+
+        # Điểm cắt trùng keyframe: copy; giữa GOP: encode tới keyframe kế tiếp rồi copy; ngắn hơn GOP: encode lại
+        assert renderer.plan(4.0, 3.0) == ('copy', 4.0)
+        assert renderer.plan(1.0, 4.0) == ('smart', 2.0)
+        assert renderer.plan(6.5, 1.0) == ('reencode', None)
+        print("✅ Smart render chọn đúng cách tạo đoạn theo keyframe")
+
+        cases = [(4.0, 3.0, 'copy', 0.0), (6.5, 1.0, 'reencode', 1.0)]
+        if can_read_mpegts(temp_dir):
+            cases.append((1.0, 4.0, 'smart', 1.0))
+        else:
+            print("⏭️ Bỏ qua đoạn smart: ffmpeg này không đọc được MPEG-TS")
+        for start, duration, mode, reencoded in cases:
+            output = os.path.join(temp_dir, f'{mode}.mp4')
+            info = renderer.render(output, start, duration)
+            assert info['mode'] == mode, (start, info)
+            assert abs(info['reencoded_seconds'] - reencoded) < 0.05
+            durations = stream_durations(output)
+            assert abs(durations['video'] - duration) < 0.1, (mode, durations)
+            assert abs(durations['audio'] - duration) < 0.1, (mode, durations)
+        print("✅ Đoạn tạo ra đúng thời lượng kế hoạch")
+
+        # Không có encoder cho Config.VIDEO_CODEC: đoạn vẫn được tạo bằng stream copy thay vì lỗi
+        original_codec = config.VIDEO_CODEC
+        config.VIDEO_CODEC = 'libkhongco'
+        try:
+            info = renderer._reencode_or_copy(os.path.join(temp_dir, 'fallback.mp4'), 4.0, 2.0)
+            assert info['mode'] == 'copy'
+            assert abs(stream_durations(os.path.join(temp_dir, 'fallback.mp4'))['video'] - 2.0) < 0.1
+        finally:
+            config.VIDEO_CODEC = original_codec
+        print("✅ Dùng stream copy khi ffmpeg thiếu encoder")
+
+
+if __name__ == "__main__":
+    test_smart_encoder_fallback()
+    test_render_modes_and_durations()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test cắt trong lúc tải: các đoạn được báo ngay khi xong, và khi ffmpeg lỗi
+thì không để lại đoạn dở cho lượt tải đầy đủ (đọc file cục bộ thay cho URL, cần ffmpeg)
+"""
+
+import os
+import tempfile
+
+import ffmpeg
+from config import config
+from stream_segmenter import StreamSegmenter
+from test_smart_render import FFMPEG, make_clip, stream_durations
+
+
+def test_split_local_source():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    original = (config.MIN_CUT_TIME, config.MAX_CUT_TIME, config.STREAM_SPLIT_POLL_INTERVAL)
+    config.MIN_CUT_TIME, config.MAX_CUT_TIME, config.STREAM_SPLIT_POLL_INTERVAL = 4, 4, 0.05
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = make_clip(os.path.join(temp_dir, 'source.mp4'), duration=10, gop=25)
+            output_dir = os.path.join(temp_dir, 'segments')
+            published = []
+            segmenter = StreamSegmenter(log_callback=lambda message: None, segment_callback=published.append)
+            info = {'id': 'local', 'title': 'clip', 'duration': 10, 'inputs': [(source, {})]}
+
+            paths = segmenter.split(None, output_dir, safe_title='clip', info=info)
+            assert [os.path.basename(path) for path in paths] == ['clip_01.mp4', 'clip_02.mp4', 'clip_03.mp4']
+            assert published == paths
+            assert abs(stream_durations(paths[0])['video'] - 4.0) < 0.1
+            # File danh sách của segment muxer không còn sau khi xong
+            assert sorted(os.listdir(output_dir)) == ['clip_01.mp4', 'clip_02.mp4', 'clip_03.mp4']
+            print("✅ Cắt trong lúc đọc nguồn, báo từng đoạn khi xong")
+
+            # ffmpeg lỗi: đoạn của lần chạy hỏng bị xóa, file khác trong thư mục giữ nguyên
+            failing = {'id': 'broken', 'title': 'clip', 'duration': 10,
+                       'inputs': [(os.path.join(temp_dir, 'khong_co.mp4'), {})]}
+            with open(os.path.join(output_dir, 'notes.txt'), 'w') as f:
+                f.write('giữ lại')
+            try:
+                segmenter.split(None, output_dir, safe_title='clip', info=failing)
+                assert False, "Phải báo lỗi khi ffmpeg thất bại"
+            except ffmpeg.Error as e:
+                assert e.stderr
+            assert os.listdir(output_dir) == ['notes.txt']
+            print("✅ Xóa đoạn dở khi cắt trong lúc tải thất bại")
+    finally:
+        config.MIN_CUT_TIME, config.MAX_CUT_TIME, config.STREAM_SPLIT_POLL_INTERVAL = original
+
+
+if __name__ == "__main__":
+    test_split_local_source()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test VideoSplitter trên video thật: thời lượng các đoạn tạo ra khớp kế hoạch cắt
+(stream copy kèm thumbnail), cần ffmpeg
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+from config import config
+from segment_verifier import verify_directory
+from video_splitter import VideoSplitter
+from test_smart_render import FFMPEG, make_clip, stream_durations
+
+
+@contextmanager
+def split_config(**values):
+    """Tạm đổi các giá trị Config trong một test"""
+    original = {key: getattr(config, key) for key in values}
+    for key, value in values.items():
+        setattr(config, key, value)
+    try:
+        yield
+    finally:
+        for key, value in original.items():
+            setattr(config, key, value)
+
+
+def split_durations(source, output_dir, **values):
+    """Chia source với cấu hình tạm, trả về (kết quả, thời lượng video/audio từng đoạn)"""
+    settings = dict(OUTPUT_PATH=output_dir, MIN_CUT_TIME=5, MAX_CUT_TIME=5, SPLIT_MODE='copy',
+                    SEGMENT_THUMBNAILS=False, CUT_PLANNER='random')
+    settings.update(values)
+    with split_config(**settings):
+        result = VideoSplitter().split_video(source, 'clip', 'clip')
+    assert result['success'], result
+    return result, [stream_durations(entry['path']) for entry in result['output_files']]
+
+
+def test_copy_segments_with_thumbnails():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Keyframe mỗi 4s: điểm cắt 5s và 10s nằm giữa GOP, stream copy bắt đầu từ keyframe trước đó
+        source = make_clip(os.path.join(temp_dir, 'source.mp4'), duration=12, gop=100)
+        _, plain = split_durations(source, os.path.join(temp_dir, 'plain'))
+        result, with_previews = split_durations(source, os.path.join(temp_dir, 'previews'), SEGMENT_THUMBNAILS=True)
+
+        # Thumbnail không được làm thay đổi đoạn copy
+        assert [entry['duration'] for entry in result['output_files']] == [5, 5, 2]
+        for entry, expected, durations in zip(result['output_files'], plain, with_previews):
+            assert abs(durations['video'] - expected['video']) < 0.01, (entry['filename'], expected, durations)
+            # Lệch kế hoạch tối đa một GOP (phần đầu từ keyframe trước điểm cắt)
+            assert entry['duration'] - 0.1 < durations['video'] < entry['duration'] + 4.1, (entry['filename'], durations)
+            # Đoạn cuối (10-12s) không có keyframe riêng: thumbnail lấy từ keyframe 8s giống phần được copy
+            assert os.path.getsize(entry['thumbnail']) > 0
+        print("✅ Đoạn stream copy kèm thumbnail giữ nguyên thời lượng như khi không có thumbnail")
+
+
+def test_copy_segments_pass_verification():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = make_clip(os.path.join(temp_dir, 'source.mp4'), duration=12, gop=100)
+        # Đoạn copy dài hơn kế hoạch tới 4s (một GOP), vượt xa sai lệch 0.5s nhưng không phải lỗi
+        result, durations = split_durations(source, os.path.join(temp_dir, 'out'), VERIFY_DURATION_TOLERANCE=0.5)
+        assert max(d['video'] - entry['duration'] for entry, d in zip(result['output_files'], durations)) > 0.5
+        verification = result['verification']
+        assert verification['passed'] == 3 and not verification['failed'], verification
+        assert 'repaired' not in verification
+        print("✅ Đoạn copy lệch trong một GOP không bị cắt lại")
+
+
+def test_ladder_verification():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    ladder = [{'name': '120p', 'height': 120}]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = make_clip(os.path.join(temp_dir, 'source.mp4'), duration=12, gop=100)
+        result, durations = split_durations(source, os.path.join(temp_dir, 'out'),
+                                            ENABLE_RENDITION_LADDER=True, RENDITION_LADDER=ladder,
+                                            VERIFY_DURATION_TOLERANCE=0.1)
+        assert result['renditions'] == ['120p'] and not result['verification']['failed']
+        for entry, d in zip(result['output_files'], durations):
+            assert abs(d['video'] - entry['duration']) < 0.1, (entry['filename'], d)
+        print("✅ Đoạn rendition đúng kế hoạch và qua kiểm tra")
+
+        # Đoạn không qua kiểm tra kể cả sau khi encode lại: báo lỗi thay vì thành công
+        with split_config(OUTPUT_PATH=os.path.join(temp_dir, 'strict'), MIN_CUT_TIME=5, MAX_CUT_TIME=5,
+                          ENABLE_RENDITION_LADDER=True, RENDITION_LADDER=ladder, VERIFY_DURATION_TOLERANCE=-1):
+            splitter = VideoSplitter()
+            result = splitter.split_video(source, 'clip', 'clip')
+            assert not result['success'] and len(result['verification']['failed']) == 3, result
+            # Kích thước bị xóa khỏi manifest nên lần chạy sau encode lại thay vì bỏ qua
+            assert not splitter.is_split_complete(source, 'clip')
+        print("✅ Đoạn rendition vẫn lỗi sau khi encode lại thì báo thất bại")
+
+
+def truncate(path):
+    """Làm hỏng một đoạn: cắt cụt nửa sau file"""
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+
+def test_verify_directory_repairs_like_split():
+    if not FFMPEG:
+        print("⏭️ Bỏ qua: không có ffmpeg")
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = make_clip(os.path.join(temp_dir, 'source.mp4'), duration=12, gop=100)
+        result, _ = split_durations(source, os.path.join(temp_dir, 'reencode'), SPLIT_MODE='reencode')
+        truncate(result['output_files'][1]['path'])
+
+        # Cấu hình hiện tại là copy nhưng đoạn được cắt lại theo chế độ ghi trong manifest
+        with split_config(SPLIT_MODE='copy'):
+            report = verify_directory(result['output_directory'], repair=True)
+        assert not report['failed'] and report['repaired'] == [2], report
+        # Stream copy sẽ bắt đầu từ keyframe 4s, encode lại thì đúng mốc 5s
+        assert abs(stream_durations(result['output_files'][1]['path'])['video'] - 5) < 0.1
+        print("✅ Sửa đoạn từ thư mục dùng đúng chế độ cắt của manifest")
+
+        ladder = [{'name': '120p', 'height': 120}]
+        result, _ = split_durations(source, os.path.join(temp_dir, 'ladder'),
+                                    ENABLE_RENDITION_LADDER=True, RENDITION_LADDER=ladder)
+        broken = result['output_files'][1]['path']
+        truncate(broken)
+        report = verify_directory(result['output_directory'])
+        assert report['checked'] == 3 and [r['path'] for r in report['failed']] == [broken], report
+        with split_config(RENDITION_LADDER=ladder):
+            report = verify_directory(result['output_directory'], repair=True)
+        assert not report['failed'] and report['repaired'] == [broken], report
+        assert abs(stream_durations(broken)['video'] - 5) < 0.1
+        print("✅ Kiểm tra và sửa từng rendition trong thư mục con")
+
+
+if __name__ == "__main__":
+    test_copy_segments_with_thumbnails()
+    test_copy_segments_pass_verification()
+    test_ladder_verification()
+    test_verify_directory_repairs_like_split()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test chia video ảo: ranh giới căn về keyframe và vùng byte của từng đoạn (không cần ffmpeg)
+"""
+
+import os
+
+import virtual_split
+from test_mp4_parser import build_sample_mp4, write_temp
+
+
+def test_index_aligns_to_keyframes():
+    data, chunk_offset = build_sample_mp4()
+    path = write_temp(data)
+    try:
+        segments = [
+            {'segment_number': 1, 'filename': 'video_01.mp4', 'start': 0, 'duration': 0.25},
+            {'segment_number': 2, 'filename': 'video_02.mp4', 'start': 0.25, 'duration': 0.15},
+        ]
+        index = virtual_split.build_index(path, segments)
+        first, second = index['segments']
+
+        # Điểm cắt 0.25s rơi về keyframe 0.2s (frame thứ 6)
+        assert (first['start'], second['start']) == (0.0, 0.2)
+        assert abs(first['duration'] - 0.2) < 1e-9 and abs(second['duration'] - 0.2) < 1e-9
+        assert first['tracks'][0]['samples'] == [0, 5]
+        assert first['tracks'][0]['byte_span'] == [chunk_offset, chunk_offset + 500]
+        assert second['tracks'][0]['byte_span'] == [chunk_offset + 500, chunk_offset + 1000]
+        assert first['tracks'][0]['bytes'] == second['tracks'][0]['bytes'] == 500
+        assert index['init']['ftyp'][0] == 0
+        assert index['init']['moov'][0] == index['init']['ftyp'][1]
+        print("✅ Index ảo căn theo keyframe và đúng vùng byte")
+
+        # Index ghi gọn, một dòng, và đọc lại được
+        index_path = f"{path}.json"
+        virtual_split.write_index(path, segments, index_path)
+        with open(index_path, 'r', encoding='utf-8') as f:
+            assert '\n' not in f.read()
+        assert virtual_split.load_index(index_path)['segments'] == index['segments']
+        os.remove(index_path)
+        print("✅ Index ảo được ghi gọn")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    test_index_aligns_to_keyframes()
@@ -6,14 +6,18 @@ Test script với link Xiaohongshu thật để kiểm tra tính năng download
 
 import sys
 import os
+import tempfile
 from xiaohongshu_downloader import XiaohongshuDownloader
 
+# Thống kê endpoint của test với mạng thật không ghi vào cache của ứng dụng
+STATS_PATH = os.path.join(tempfile.gettempdir(), 'xhs_test_strategy_stats.json')
+
 def test_with_real_links():
     print("=== Test Xiaohongshu Downloader với link thật ===")
     print()
     
     # Khởi tạo downloader
-    downloader = XiaohongshuDownloader()
+    downloader = XiaohongshuDownloader(stats_path=STATS_PATH)
     
     # Hướng dẫn lấy link đúng
     print("Hướng dẫn lấy link Xiaohongshu đúng:")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test ảnh Xiaohongshu: chọn bản ít byte nhất, sửa đuôi theo nội dung
+và hardlink ảnh trùng qua kho theo hash (server cục bộ)
+"""
+
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from xiaohongshu_downloader import XiaohongshuDownloader
+from xhs_image_store import image_variants, image_key, url_format, sniff_extension
+
+JPEG = b'\xff\xd8\xff\xe0' + b'j' * 50000
+WEBP = b'RIFF\x00\x00\x00\x00WEBPVP8 ' + b'w' * 20000
+PNG = b'\x89PNG\r\n\x1a\n' + b'p' * 30000
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """/<mã ảnh>!nd_dft_<định dạng>_3 trả nội dung theo định dạng; ảnh "mislabeled" trả PNG dù URL ghi jpg"""
+
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get('Range')))
+        if 'mislabeled' in self.path:
+            body = PNG
+        elif '_webp_' in self.path:
+            body = WEBP
+        else:
+            body = JPEG
+        match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        if match:
+            start, end = int(match.group(1)), int(match.group(2))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(body)}')
+            body = body[start:end + 1]
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def image(base, key):
+    return {
+        'url_default': f'{base}/{key}!nd_dft_wgth_jpg_3',
+        'url_pre': f'{base}/{key}!nd_prv_wgth_jpg_3',
+        'info_list': [
+            {'image_scene': 'WB_PRV', 'url': f'{base}/{key}!nd_prv_wlteh_webp_3'},
+            {'image_scene': 'WB_DFT', 'url': f'{base}/{key}!nd_dft_wlteh_webp_3'},
+        ],
+    }
+
+
+def test_image_helpers():
+    info = image('https://sns-webpic-qc.xhscdn.com/202410191234/abc', '1040g2sg31')
+    assert image_variants(info) == [info['url_default'], info['info_list'][1]['url']]
+    assert image_key(info['url_default']) == '1040g2sg31'
+    assert url_format(info['url_default']) == 'jpg'
+    assert url_format('https://sns-webpic-qc.xhscdn.com/x?imageView2/2/w/1080/format/avif') == 'avif'
+    assert url_format('https://sns-img-qc.xhscdn.com/1') is None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'a.jpg')
+        with open(path, 'wb') as f:
+            f.write(WEBP)
+        assert sniff_extension(path) == 'webp'
+    print("✅ Tách các bản ảnh, mã ảnh, định dạng theo URL và theo nội dung")
+
+
+def test_smallest_variant_and_dedup():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            downloader = XiaohongshuDownloader(output_dir)
+            note_dir = Path(output_dir) / 'note1'
+            note_dir.mkdir()
+            images = [image(base, 'first'), {'url_default': f'{base}/mislabeled!nd_dft_wgth_jpg_3'}]
+            files, savings = downloader.download_images(images, note_dir, 'note1')
+
+            # Bản webp nhỏ hơn được chọn; ảnh URL ghi jpg nhưng nội dung PNG được đặt đuôi .png
+            assert [Path(path).name for path in files] == ['note1_image_1.webp', 'note1_image_2.png']
+            assert Path(files[0]).read_bytes() == WEBP
+            assert savings['format_saved_bytes'] == len(JPEG) - len(WEBP)
+            assert savings['downloaded_bytes'] == len(WEBP) + len(PNG)
+            print("✅ Chọn bản ảnh ít byte nhất và đặt đúng đuôi file")
+
+            # Note đăng lại: ảnh cùng mã lấy từ kho không cần request,
+            # ảnh khác mã nhưng trùng nội dung được hardlink thay vì ghi thêm
+            ImageHandler.requests_seen.clear()
+            repost_dir = Path(output_dir) / 'note2'
+            repost_dir.mkdir()
+            images = [image(base, 'first'), image(base, 'reupload')]
+            files, savings = downloader.download_images(images, repost_dir, 'note2')
+
+            assert not any('first' in path for path, _ in ImageHandler.requests_seen)
+            # Ảnh mới: hỏi kích thước hai bản rồi tải thẳng bản được chọn, không hỏi lại lần nữa
+            reupload = [(path, byte_range) for path, byte_range in ImageHandler.requests_seen if 'reupload' in path]
+            assert len(reupload) == 3 and sum(byte_range == 'bytes=0-0' for _, byte_range in reupload) == 2
+            assert [Path(path).name for path in files] == ['note2_image_1.webp', 'note2_image_2.webp']
+            first = note_dir / 'note1_image_1.webp'
+            assert all(os.path.samefile(first, path) for path in files)
+            assert savings['dedup_bandwidth_bytes'] == len(WEBP)
+            assert savings['dedup_storage_bytes'] == 2 * len(WEBP)
+            assert savings['downloaded_bytes'] == len(WEBP)
+            print("✅ Ảnh trùng được lấy từ kho/hardlink, không tải và không ghi thêm")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_image_helpers()
+    test_smallest_variant_and_dedup()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test cache thông tin note Xiaohongshu: hạn metadata, hạn URL media và làm mới riêng phần media
+"""
+
+import os
+import json
+import tempfile
+
+from xhs_note_cache import NoteCache
+
+
+def age_entry(cache, note_id, seconds, media_only=False):
+    """Lùi thời điểm lấy note trong file cache để giả lập thời gian trôi qua"""
+    path = cache._path(note_id)
+    with open(path, 'r', encoding='utf-8') as f:
+        entry = json.load(f)
+    entry['media_fetched_at'] -= seconds
+    if not media_only:
+        entry['fetched_at'] -= seconds
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+
+
+def test_note_cache_ttls():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = NoteCache(cache_dir, note_ttl=3600, media_ttl=60)
+        note = {'title': 'Tiêu đề', 'user': {'nickname': 'a'}, 'video': {'url': 'https://cdn/v1.mp4?sign=1'}}
+        assert cache.get('64f1') is None
+        cache.put('64f1', note)
+        assert cache.get('64f1') == {'note': note, 'media_fresh': True}
+
+        # URL media hết hạn nhưng metadata vẫn còn
+        age_entry(cache, '64f1', 120)
+        assert cache.get('64f1')['media_fresh'] is False
+        refreshed = cache.put('64f1', {'title': 'khác', 'video': {'url': 'https://cdn/v1.mp4?sign=2'}},
+                              refresh_media_only=True)
+        assert refreshed['title'] == 'Tiêu đề'
+        assert refreshed['video']['url'].endswith('sign=2')
+        assert cache.get('64f1')['media_fresh'] is True
+
+        # Metadata hết hạn thì phải lấy lại cả note
+        age_entry(cache, '64f1', 7200)
+        assert cache.get('64f1') is None
+
+        # ID không hợp lệ không được dùng làm tên file
+        assert cache.put('../x', note) == note
+        assert not os.path.exists(os.path.join(cache_dir, '..', 'x.json'))
+        print("✅ Cache note giữ metadata lâu, làm mới riêng URL media khi hết hạn")
+
+
+def test_malformed_entries_are_misses():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = NoteCache(cache_dir, note_ttl=3600, media_ttl=60)
+        note = {'title': 'Tiêu đề', 'video': {'url': 'https://cdn/v1.mp4?sign=1'}}
+        for entry in ({'note': note}, {'note': note, 'fetched_at': 0}, {'fetched_at': 0, 'media_fetched_at': 0},
+                      ['không phải dict'], None, {'note': note, 'fetched_at': 'hôm qua', 'media_fetched_at': 0}):
+            with open(cache._path('64f1'), 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            assert cache.get('64f1') is None, entry
+            # Lấy lại note thì ghi đè bản hỏng
+            cache.put('64f1', note)
+            assert cache.get('64f1') == {'note': note, 'media_fresh': True}
+        print("✅ File cache sai định dạng được coi như chưa cache")
+
+
+if __name__ == "__main__":
+    test_note_cache_ttls()
+    test_malformed_entries_are_misses()
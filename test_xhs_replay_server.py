@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test server phát lại Xiaohongshu: XiaohongshuDownloader tải trọn lô từ fixture giả lập,
+lỗi giả lập, giới hạn băng thông và Range trên media (không cần mạng)
+"""
+
+import os
+import time
+import tempfile
+from pathlib import Path
+
+import requests
+
+from config import config
+from xiaohongshu_downloader import XiaohongshuDownloader
+from xhs_replay_server import ReplayServer, synthesize_fixtures
+
+CONFIG_KEYS = ('XIAOHONGSHU_WEB_BASE', 'XIAOHONGSHU_EDITH_BASE', 'XIAOHONGSHU_NOTE_CACHE_DIR',
+               'XIAOHONGSHU_STATS_FILE', 'XIAOHONGSHU_SHORT_LINK_CACHE')
+
+
+def test_downloader_against_replay():
+    original = {key: getattr(config, key) for key in CONFIG_KEYS}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fixture_dir = os.path.join(temp_dir, 'fixtures')
+        note_ids = synthesize_fixtures(fixture_dir, notes=4, video_size=300 * 1024, images=2,
+                                       image_size=30 * 1024, filler_notes=5)
+        config.XIAOHONGSHU_NOTE_CACHE_DIR = os.path.join(temp_dir, 'notes')
+        config.XIAOHONGSHU_STATS_FILE = os.path.join(temp_dir, 'stats.json')
+        config.XIAOHONGSHU_SHORT_LINK_CACHE = os.path.join(temp_dir, 'xhslink.json')
+        try:
+            with ReplayServer(fixture_dir) as server:
+                config.XIAOHONGSHU_WEB_BASE = config.XIAOHONGSHU_EDITH_BASE = server.url
+                assert server.note_ids() == sorted(note_ids)
+
+                downloader = XiaohongshuDownloader(os.path.join(temp_dir, 'downloads'))
+                urls = [f'https://www.xiaohongshu.com/explore/{note_id}' for note_id in note_ids]
+                results = dict(downloader.download_batch(urls, max_workers=2))
+                assert all(result['success'] for result in results.values())
+
+                video_files = results[urls[0]]['files']
+                assert len(video_files) == 1 and os.path.getsize(video_files[0]) == 300 * 1024
+                # Note ảnh: bản webp (nhỏ hơn jpg) được chọn
+                image_files = results[urls[1]]['files']
+                assert [Path(path).suffix for path in image_files] == ['.webp', '.webp']
+                assert server.stats['errors'] == 0 and server.stats['media_bytes'] > 600 * 1024
+                print("✅ Tải trọn lô note video và ảnh từ server phát lại")
+
+                # Trang lấy được qua cả ba cách (web, feed GET, edith POST)
+                for name in downloader.NOTE_STRATEGIES:
+                    note = downloader._run_strategy(name, note_ids[0])
+                    assert note['video']['media']['stream']['h264'][0]['master_url'].startswith(server.url)
+                print("✅ Phát lại trang explore, feed GET và feed POST")
+
+                media_url = note['video']['media']['stream']['h264'][0]['master_url']
+                response = requests.get(media_url, headers={'Range': 'bytes=100-199'})
+                assert response.status_code == 206 and len(response.content) == 100
+                assert requests.get(f'{server.url}/media/../pages/{note_ids[0]}.html').status_code == 404
+
+                server.error_rate = 1.0
+                assert requests.get(media_url).status_code == 503
+                server.error_rate = 0.0
+
+                server.bandwidth = 1024 * 1024
+                start = time.perf_counter()
+                assert len(requests.get(media_url).content) == 300 * 1024
+                assert time.perf_counter() - start >= 0.25
+                print("✅ Range, lỗi giả lập và giới hạn băng thông")
+        finally:
+            for key, value in original.items():
+                setattr(config, key, value)
+
+
+if __name__ == "__main__":
+    test_downloader_against_replay()
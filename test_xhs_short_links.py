@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test đổi link rút gọn xhslink.com: đi theo chuỗi chuyển hướng không tải body,
+dừng tại URL trang note, cache theo mã rút gọn và xử lý song song cả lô (server cục bộ)
+"""
+
+import os
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from xiaohongshu_downloader import HostLimiter
+from xhs_short_links import ShortLinkResolver, note_id_from_url
+
+NOTES = {
+    'AbC123': '64f1a2b3c4d5e6f708192a3b',
+    'XyZ789': '6500aa11bb22cc33dd44ee55',
+}
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    """/xhslink.com/a/<mã> -> /hop/<mã> -> trang note trên xiaohongshu.com"""
+
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        code = self.path.rsplit('/', 1)[-1]
+        if self.path.startswith('/xhslink.com/') and code in NOTES:
+            location = f'/hop/{code}'
+        elif self.path.startswith('/hop/') and code in NOTES:
+            location = f'https://www.xiaohongshu.com/explore/{NOTES[code]}?xsec_source=app_share'
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(302)
+        self.send_header('Location', location)
+        # Body lớn không được đọc vì chỉ cần header Location
+        self.send_header('Content-Length', str(1 << 20))
+        self.end_headers()
+        self.wfile.write(b' ' * (1 << 20))
+
+    def log_message(self, *args):
+        pass
+
+
+def test_resolve_short_links():
+    assert note_id_from_url('https://www.xiaohongshu.com/explore/64f1a2b3c4d5e6f708192a3b') == '64f1a2b3c4d5e6f708192a3b'
+    assert note_id_from_url('https://xhslink.com/a/AbC123') is None
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RedirectHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir, requests.Session() as session:
+            cache_path = os.path.join(temp_dir, 'xhslink_cache.json')
+            resolver = ShortLinkResolver(session, HostLimiter(), cache_path)
+
+            url = f'{base}/xhslink.com/a/AbC123'
+            assert resolver.is_short_link(url)
+            assert resolver.resolve(url) == NOTES['AbC123']
+            # Dừng ở URL trang note, không request tới xiaohongshu.com
+            assert RedirectHandler.requests_seen == ['/xhslink.com/a/AbC123', '/hop/AbC123']
+
+            # Lần sau lấy từ cache, kể cả với resolver mới đọc cache từ đĩa
+            assert resolver.resolve(url) == NOTES['AbC123']
+            assert ShortLinkResolver(session, HostLimiter(), cache_path).resolve(url) == NOTES['AbC123']
+            assert len(RedirectHandler.requests_seen) == 2
+            print("✅ Đổi link rút gọn theo chuỗi chuyển hướng và cache theo mã")
+
+            batch = [
+                url,
+                f'{base}/xhslink.com/a/XyZ789',
+                f'{base}/xhslink.com/a/XyZ789',
+                f'{base}/xhslink.com/a/Missing1',
+                'https://www.xiaohongshu.com/explore/64f1a2b3c4d5e6f708192a3b',
+            ]
+            resolved = resolver.resolve_many(batch, max_workers=4)
+            assert resolved == {
+                url: NOTES['AbC123'],
+                f'{base}/xhslink.com/a/XyZ789': NOTES['XyZ789'],
+                f'{base}/xhslink.com/a/Missing1': None,
+            }
+            # Link trùng chỉ được đổi một lần, link lỗi không vào cache
+            assert RedirectHandler.requests_seen.count('/xhslink.com/a/XyZ789') == 1
+            assert 'Missing1' not in resolver.cache
+            print("✅ Đổi song song cả lô link rút gọn")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_resolve_short_links()
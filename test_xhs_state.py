@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test tách state Xiaohongshu từ HTML: đếm ngoặc, chuỗi có escape, undefined của JS (không cần mạng)
+"""
+
+import json
+
+import xhs_state
+
+NOTE_ID = '64f1a2b3c4d5e6f708192a3b'
+
+
+def build_page(note_id=NOTE_ID, filler_notes=0, undefined=True, terminator=';'):
+    """
+    Trang explore giả lập có state chứa note cần tìm và các note khác
+
+    Args:
+        undefined: Có giá trị undefined của JS trong state như trang thật
+        terminator: Ký tự sau object state (trang thật có lúc không có dấu chấm phẩy)
+    """
+    notes = {
+        f'{i:024x}': {'note': {'title': f'note {i}', 'desc': '{not a brace} "quoted" }', 'type': 'normal'}}
+        for i in range(filler_notes)
+    }
+    notes[note_id] = {
+        'note': {
+            'title': 'Tiêu đề {có ngoặc} và \\"nháy\\"',
+            'user': {'nickname': 'tác giả'},
+            'video': {'media': {'stream': {'h264': [{'master_url': 'https://sns-video-bd.xhscdn.com/a.mp4'}]}}},
+            'imageList': [],
+        },
+        'comments': [],
+    }
+    state = json.dumps({'global': {'flag': '__js_undef__'}, 'note': {'noteDetailMap': notes}}, ensure_ascii=False)
+    if undefined:
+        state = state.replace('"__js_undef__"', 'undefined')
+    return (
+        '<html><head><script>var config = {"a": 1};</script></head><body>'
+        f'<script>window.__INITIAL_STATE__={state}{terminator}</script>'
+        '<script>window.__OTHER__ = {"x": 1}; render({a: 1});</script>'
+        '<script>if (a) { b(); }</script></body></html>'
+    )
+
+
+def test_extract_and_find_note():
+    html = build_page(filler_notes=5)
+    state = xhs_state.parse_state(html)
+    assert state['global']['flag'] is None
+    note = xhs_state.find_note(state, NOTE_ID)
+    assert note['title'] == 'Tiêu đề {có ngoặc} và \\"nháy\\"'
+    assert note['video']['media']['stream']['h264'][0]['master_url'].endswith('a.mp4')
+    assert xhs_state.find_note(state, 'f' * 24) is None
+    assert xhs_state.find_note(xhs_state.parse_state(build_page(terminator='')), NOTE_ID)
+    print("✅ Tách state và lấy đúng note theo noteDetailMap")
+
+
+def test_malformed_pages():
+    assert xhs_state.parse_state('<html>no state here</html>') is None
+    # Object không đóng ngoặc (trang bị cắt cụt)
+    assert xhs_state.extract_object('window.__INITIAL_STATE__={"a": {"b": "}"', xhs_state.STATE_MARKERS[0]) is None
+    # Ngoặc và undefined bên trong chuỗi không bị xử lý
+    state = xhs_state.extract_object(
+        'window.__INITIAL_STATE__ = {"s": "undefined } \\" x", "u": undefined};</script>', xhs_state.STATE_MARKERS[0]
+    )
+    assert state == {'s': 'undefined } " x', 'u': None}
+    print("✅ Bỏ qua trang không có state hoặc bị cắt cụt")
+
+
+def test_marker_mentioned_before_assignment():
+    marker = xhs_state.STATE_MARKERS[0]
+    page = build_page()
+    # Script đọc state trước khi trang gán giá trị
+    for prefix in ('<script>if(window.__INITIAL_STATE__){init()}</script>',
+                   '<script>var s = window.__INITIAL_STATE__ || {};</script>',
+                   '<script>if (window.__INITIAL_STATE__ == {}) {}</script>'):
+        html = page.replace('<body>', '<body>' + prefix)
+        assert xhs_state.find_note(xhs_state.extract_object(html, marker), NOTE_ID), prefix
+    # Chỉ có các lần nhắc tới, không có phép gán
+    assert xhs_state.extract_object('<script>if(window.__INITIAL_STATE__){}</script>', marker) is None
+    print("✅ Tìm đúng phép gán state khi marker được nhắc tới trước đó")
+
+
+if __name__ == "__main__":
+    test_extract_and_find_note()
+    test_malformed_pages()
+    test_marker_mentioned_before_assignment()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test tải media Xiaohongshu: chia phần theo HTTP Range, tải một luồng khi server không hỗ trợ
+và tải tiếp file .part sau khi bị ngắt (server cục bộ)
+"""
+
+import os
+import re
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from xiaohongshu_downloader import HostLimiter
+from xhs_transfer import RangeDownloader
+
+PAYLOAD = bytes(range(256)) * 4096 + b'tail'
+ETAG = '"v1"'
+BUFFER = 16 * 1024
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    """
+    Phục vụ PAYLOAD; đường dẫn /norange bỏ qua header Range.
+    Khi drop_after được đặt, mỗi response chỉ gửi chừng đó byte rồi ngắt kết nối.
+    """
+
+    ranges_served = []
+    drop_after = None
+
+    def do_GET(self):
+        match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if match and self.path != '/norange' and if_range in (None, ETAG):
+            start, end = int(match.group(1)), int(match.group(2))
+            body = PAYLOAD[start:end + 1]
+            self.ranges_served.append((start, end))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(PAYLOAD)}')
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETAG)
+        self.end_headers()
+        if self.drop_after is not None and len(body) > 1:
+            self.wfile.write(body[:self.drop_after])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_range_and_stream_downloads():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MediaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir, requests.Session() as session:
+            downloader = RangeDownloader(session, HostLimiter(), parts=4, min_parallel_size=256 * 1024,
+                                         buffer_size=BUFFER)
+            target = os.path.join(temp_dir, 'video.mp4')
+
+            stats = downloader.download(f'{base}/video.mp4', target)
+            assert stats['parts'] == 4 and stats['bytes'] == len(PAYLOAD)
+            with open(target, 'rb') as f:
+                assert f.read() == PAYLOAD
+            # Các phần liền nhau, phủ kín file (không tính request thăm dò 0-0)
+            parts = sorted(r for r in MediaHandler.ranges_served if r != (0, 0))
+            assert parts[0][0] == 0 and parts[-1][1] == len(PAYLOAD) - 1
+            assert all(a[1] + 1 == b[0] for a, b in zip(parts, parts[1:]))
+
+            stream_target = os.path.join(temp_dir, 'stream.mp4')
+            stats = downloader.download(f'{base}/norange', stream_target)
+            assert stats['parts'] == 1 and os.path.getsize(stream_target) == len(PAYLOAD)
+
+            # File đã đủ byte thì không tải lại
+            assert downloader.download(f'{base}/video.mp4', target)['skipped']
+            print("✅ Tải song song theo Range và tải một luồng khi không hỗ trợ Range")
+
+            # Kết nối bị ngắt giữa chừng: chỉ còn file .part và sidecar, lần sau tải tiếp phần thiếu
+            resumed_target = os.path.join(temp_dir, 'resumed.mp4')
+            MediaHandler.drop_after = 100000
+            try:
+                downloader.download(f'{base}/video.mp4', resumed_target)
+                assert False, "phải lỗi khi kết nối bị ngắt"
+            except Exception:
+                pass
+            finally:
+                MediaHandler.drop_after = None
+            assert not os.path.exists(resumed_target)
+            assert os.path.exists(resumed_target + '.part.json')
+
+            # Tiến độ được lưu sau mỗi buffer đầy nên phần buffer dở dang lúc bị ngắt phải tải lại
+            stats = downloader.download(f'{base}/video.mp4', resumed_target)
+            assert stats['resumed'] == 4 * (100000 // BUFFER * BUFFER)
+            assert stats['bytes'] == len(PAYLOAD) - stats['resumed']
+            with open(resumed_target, 'rb') as f:
+                assert f.read() == PAYLOAD
+            assert not os.path.exists(resumed_target + '.part')
+            assert not os.path.exists(resumed_target + '.part.json')
+            print("✅ Tải tiếp từ file .part sau khi bị ngắt và đổi tên khi đủ byte")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_range_and_stream_downloads()
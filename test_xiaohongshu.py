@@ -55,11 +55,13 @@ def test_note_id_extraction():
     print("=== Test Note ID Extraction ===")
     
     downloader = XiaohongshuDownloader()
+    # Link rút gọn được đổi sang note ID thật; dùng cache của resolver để không cần mạng
+    downloader.link_resolver.cache['xyz789'] = "64f1a2b3c4d5e6f708192a3b"
     
     test_cases = [
         ("https://www.xiaohongshu.com/explore/123456789", "123456789"),
         ("https://xiaohongshu.com/discovery/item/abcdef123", "abcdef123"),
-        ("https://xhslink.com/xyz789", "xyz789"),
+        ("https://xhslink.com/xyz789", "64f1a2b3c4d5e6f708192a3b"),
         ("https://invalid-url.com", None)
     ]
     
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test tải Xiaohongshu hàng loạt: giới hạn theo host và trả kết quả dần theo từng URL (không cần mạng)
+"""
+
+import time
+import tempfile
+import threading
+from pathlib import Path
+
+from config import config
+from xiaohongshu_downloader import XiaohongshuDownloader, HostLimiter
+
+
+def test_host_limiter_kinds_and_limits():
+    limiter = HostLimiter(page_limit=2, cdn_limit=3)
+    assert limiter.kind('https://www.xiaohongshu.com/explore/abc') == 'page'
+    assert limiter.kind('https://edith.xiaohongshu.com/api/sns/web/v1/feed') == 'page'
+    assert limiter.kind('https://sns-video-bd.xhscdn.com/stream/1.mp4') == 'cdn'
+    assert limiter.kind('https://notxiaohongshu.com/') == 'cdn'
+
+    active = {'page': 0, 'cdn': 0}
+    peak = {'page': 0, 'cdn': 0}
+    lock = threading.Lock()
+
+    def request(url, kind):
+        with limiter.slot(url):
+            with lock:
+                active[kind] += 1
+                peak[kind] = max(peak[kind], active[kind])
+            time.sleep(0.02)
+            with lock:
+                active[kind] -= 1
+
+    threads = [threading.Thread(target=request, args=('https://www.xiaohongshu.com/explore/x', 'page')) for _ in range(6)]
+    threads += [threading.Thread(target=request, args=('https://sns-img-qc.xhscdn.com/a.jpg', 'cdn')) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == {'page': 2, 'cdn': 3}
+    print("✅ Giới hạn request đồng thời riêng cho host trang/API và CDN")
+
+
+class DelayedDownloader(XiaohongshuDownloader):
+    """download_video giả lập: URL có số càng lớn thì xong càng nhanh"""
+
+    def download_video(self, url, progress_callback=None):
+        if progress_callback:
+            progress_callback("Đang tải...")
+        time.sleep(0.05 * (4 - int(url[-1])))
+        if url.endswith('2'):
+            raise RuntimeError("mạng lỗi")
+        return {'success': True, 'message': 'ok', 'files': [], 'title': url, 'author': ''}
+
+
+def test_download_batch_streams_results():
+    with tempfile.TemporaryDirectory() as output_dir:
+        downloader = DelayedDownloader(output_dir)
+        urls = [f'https://www.xiaohongshu.com/explore/{i}' for i in range(4)]
+        progress = []
+        results = list(downloader.download_batch(urls, lambda url, message: progress.append(url), max_workers=4))
+
+        # Kết quả đến theo thứ tự hoàn thành, lỗi của một URL không làm hỏng cả lượt
+        assert [url for url, _ in results] == urls[::-1]
+        assert [result['success'] for _, result in results] == [True, False, True, True]
+        assert sorted(progress) == urls
+        print("✅ Tải hàng loạt trả kết quả theo từng URL khi hoàn thành")
+
+
+class ImageDownloader(XiaohongshuDownloader):
+    """download_file giả lập: ảnh sau xong trước, ảnh số 3 lỗi; ghi lại số request đồng thời"""
+
+    def __init__(self, output_dir):
+        super().__init__(output_dir)
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def download_file(self, url, filepath, probe=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02 * (10 - int(url.rsplit('/', 1)[1])))
+        with self.lock:
+            self.active -= 1
+        return None if url.endswith('/3') else {'bytes': 1, 'skipped': False}
+
+
+def test_download_images_concurrent_in_order():
+    with tempfile.TemporaryDirectory() as output_dir:
+        downloader = ImageDownloader(output_dir)
+        image_list = [{'url_default': f'https://sns-img-qc.xhscdn.com/{i}'} for i in range(1, 10)]
+        image_list.insert(4, {'trace_id': 'không có url'})
+        files, _ = downloader.download_images(image_list, Path(output_dir), 'note')
+
+        expected = [f'note_image_{i}.jpg' for i in range(1, 11) if i not in (3, 5)]
+        assert [Path(path).name for path in files] == expected
+        assert 1 < downloader.peak <= config.XIAOHONGSHU_IMAGE_WORKERS
+        print(f"✅ Tải {len(files)} ảnh song song (tối đa {downloader.peak} cùng lúc), giữ đúng thứ tự")
+
+
+if __name__ == "__main__":
+    test_host_limiter_kinds_and_limits()
+    test_download_batch_streams_results()
+    test_download_images_concurrent_in_order()
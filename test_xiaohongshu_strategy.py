@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test chọn cách lấy note theo thống kê và request dự phòng (hedge) của XiaohongshuDownloader (không cần mạng)
+"""
+
+import os
+import time
+import tempfile
+
+from config import config
+from xiaohongshu_downloader import XiaohongshuDownloader, StrategyStats
+
+
+def test_strategy_stats_order_and_persist():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'stats.json')
+        stats = StrategyStats(path, alpha=0.5)
+        names = ['web', 'feed', 'edith']
+        assert stats.order(names) == names
+
+        stats.record('web', False, 2.0)
+        stats.record('feed', True, 0.5)
+        stats.record('edith', True, 0.2)
+        assert stats.order(names) == ['edith', 'feed', 'web']
+
+        # Thống kê được đọc lại ở lần chạy sau
+        stats.record('edith', False, 3.0)
+        reloaded = StrategyStats(path, alpha=0.5)
+        assert reloaded.stats['edith']['count'] == 2
+        assert reloaded.order(names) == ['feed', 'edith', 'web']
+        print("✅ Thứ tự cách lấy note theo thống kê, lưu giữa các lần chạy")
+
+
+class SlowWebDownloader(XiaohongshuDownloader):
+    """Web scrape chậm, feed GET nhanh, edith luôn lỗi"""
+
+    def _fetch_note_web(self, note_id, url):
+        time.sleep(0.5)
+        return {'title': 'web'}
+
+    def _fetch_note_feed(self, note_id, url):
+        time.sleep(0.05)
+        return {'title': 'feed'}
+
+    def _fetch_note_edith(self, note_id, url):
+        raise ConnectionError("bị chặn")
+
+
+def test_hedged_request_wins():
+    original = (config.XIAOHONGSHU_HEDGE_DELAY, config.XIAOHONGSHU_NOTE_CACHE_DIR, config.XIAOHONGSHU_MEDIA_URL_TTL)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        stats_path = os.path.join(temp_dir, 'stats.json')
+        config.XIAOHONGSHU_NOTE_CACHE_DIR = os.path.join(temp_dir, 'notes')
+        # URL media luôn hết hạn để mỗi lần gọi đều đi qua các endpoint
+        config.XIAOHONGSHU_MEDIA_URL_TTL = -1
+        try:
+            config.XIAOHONGSHU_HEDGE_DELAY = 0.1
+            with SlowWebDownloader(temp_dir, stats_path=stats_path) as downloader:
+                started = time.perf_counter()
+                assert downloader.get_note_info('abc')['title'] == 'feed'
+                assert time.perf_counter() - started < 0.4
+
+                # Không hedge: thử lần lượt, cách chưa có thống kê (edith) được thử trước
+                config.XIAOHONGSHU_HEDGE_DELAY = None
+                time.sleep(0.5)
+                assert downloader.strategy_stats.order(downloader.NOTE_STRATEGIES) == ['edith', 'feed', 'web']
+                assert downloader.get_note_info('abc')['title'] == 'feed'
+                assert downloader.strategy_stats.order(downloader.NOTE_STRATEGIES) == ['feed', 'web', 'edith']
+            # Thống kê ghi vào file được truyền vào; pool dự phòng đã dừng khi đóng downloader
+            assert StrategyStats(stats_path).stats['feed']['count'] == 2
+            try:
+                downloader._hedge_pool.submit(time.sleep, 0)
+                assert False, "Pool dự phòng phải dừng sau close()"
+            except RuntimeError:
+                pass
+            print("✅ Request dự phòng trả kết quả hợp lệ đầu tiên")
+        finally:
+            (config.XIAOHONGSHU_HEDGE_DELAY, config.XIAOHONGSHU_NOTE_CACHE_DIR,
+             config.XIAOHONGSHU_MEDIA_URL_TTL) = original
+
+if __name__ == "__main__":
+    test_strategy_stats_order_and_persist()
+    test_hedged_request_wins()
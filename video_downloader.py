@@ -16,6 +16,10 @@ from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 from config import config
 from video_splitter import VideoSplitter
+import mp4_parser
+from clip_engine import ClipEngine
+from stream_segmenter import StreamSegmenter
+from ffmpeg_scheduler import get_scheduler
 
 try:
     import yt_dlp
@@ -280,6 +284,38 @@ class VideoDownloader:
             pass
         return None
         
+    def stream_split_video(self, url, output_dir, resolution='1080p'):
+        """
+        Tải và cắt video cùng lúc, không lưu file gốc
+        
+        Args:
+            url: URL video
+            output_dir: Thư mục lưu
+            resolution: Độ phân giải mong muốn
+            
+        Returns:
+            list: Danh sách các đoạn đã cắt (rỗng nếu lỗi)
+        """
+        try:
+            if self.stop_flag:
+                return []
+                
+            self.log(f"Đang tải và cắt video: {url}")
+            self.update_status("Đang tải và cắt video...")
+            
+            segmenter = StreamSegmenter(log_callback=self.log, stop_check=lambda: self.stop_flag)
+            info = segmenter.resolve_formats(url, self._get_format_selector(resolution))
+            safe_title = "".join(c for c in info['title'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
+            safe_title = safe_title[:50]
+            segments_dir = os.path.join(output_dir, config.get_segments_dir_name(f"{safe_title}_{info['id']}"))
+            return segmenter.split(url, segments_dir, safe_title=safe_title, info=info)
+            
+        except Exception as e:
+            error_msg = f"Lỗi tải và cắt video {url}: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            self.log(error_msg)
+            return []
+        
     def cut_video_into_segments(self, input_file, output_dir, min_duration, max_duration, short_video_threshold):
         """
         Cắt video thành nhiều đoạn ngắn với thời lượng ngẫu nhiên
@@ -311,7 +347,11 @@ class VideoDownloader:
                 video_id=base_name
             )
             
-            if result['success']:
+            if result['success'] and result.get('index_path'):
+                # Chia ảo: chỉ có file index, các đoạn được xuất khi cần
+                self.log(f"Đã lập index {result['segments_count']} đoạn ảo: {result['index_path']}")
+                return [result['index_path']]
+            elif result['success']:
                 # Trả về danh sách các file đã cắt
                 output_files = [segment['path'] for segment in result['output_files']]
                 self.log(f"Đã cắt thành {len(output_files)} đoạn")
@@ -347,7 +387,7 @@ class VideoDownloader:
             self.update_status("Đang phân tích video...")
             
             # Lấy thông tin video
-            probe = ffmpeg.probe(input_file)
+            probe = mp4_parser.probe(input_file)
             video_duration = float(probe['streams'][0]['duration'])
             
             self.log(f"Thời lượng video gốc: {video_duration:.2f} giây")
@@ -378,34 +418,25 @@ class VideoDownloader:
                 
             self.update_status("Đang cắt video...")
             
-            # Sử dụng ffmpeg trực tiếp với tham số chính xác
+            # Seek nhanh tới keyframe trước điểm cắt, chỉ decode phần pre-roll
             try:
-                (
-                    ffmpeg
-                    .input(input_file)
-                    .filter('trim', start=start_time, duration=cut_duration)
-                    .filter('setpts', 'PTS-STARTPTS')
-                    .output(output_file, 
-                            vcodec='libx264', 
-                            acodec='aac', 
-                            preset='medium',
-                            crf=18,
-                            movflags='faststart')
-                    .overwrite_output()
-                    .run(quiet=True, capture_stdout=True, capture_stderr=True)
-                )
+                stats = ClipEngine(input_file).render(output_file, start_time, cut_duration)
+                encode_fps = f", {stats['encode_fps']:.0f} fps" if stats['encode_fps'] else ""
+                self.log(f"Seek tới keyframe {stats['seek_point']:.2f}s, pre-roll {stats['preroll']:.2f}s")
+                self.log(f"Tốc độ encode: {stats['speed']:.2f}x thời gian thực{encode_fps} ({stats['elapsed']:.1f} giây)")
             except ffmpeg.Error as e:
-                # Fallback method nếu trim filter không hoạt động
+                # Fallback method nếu encode lại không thành công
                 self.log("Thử phương pháp cắt khác...")
-                (
-                    ffmpeg
-                    .input(input_file, ss=start_time, t=cut_duration)
-                    .output(output_file, 
-                            vcodec='copy', 
-                            acodec='copy')
-                    .overwrite_output()
-                    .run(quiet=True)
-                )
+                with get_scheduler().slot() as slot:
+                    slot.run(
+                        ffmpeg
+                        .input(input_file, ss=start_time, t=cut_duration)
+                        .output(output_file, 
+                                vcodec='copy', 
+                                acodec='copy')
+                        .overwrite_output(),
+                        quiet=True
+                    )
             
             self.log(f"Đã cắt video: {output_file}")
             return True
@@ -417,7 +448,8 @@ class VideoDownloader:
             return False
             
     def process_videos(self, video_urls, output_dir, resolution=None, 
-                      enable_cut=False, min_time=None, max_time=None, short_video_time=None):
+                      enable_cut=False, min_time=None, max_time=None, short_video_time=None,
+                      stream_split=None):
         """
         Xử lý danh sách video với cấu hình từ config
         
@@ -429,6 +461,7 @@ class VideoDownloader:
             min_time: Thời gian tối thiểu (mặc định từ config)
             max_time: Thời gian tối đa (mặc định từ config)
             short_video_time: Thời gian cho video ngắn (mặc định từ config)
+            stream_split: Cắt trong lúc tải, không lưu file gốc (mặc định từ config)
             
         Returns:
             list: Danh sách file đã xử lý
@@ -442,6 +475,8 @@ class VideoDownloader:
             max_time = config.MAX_CUT_TIME
         if short_video_time is None:
              short_video_time = config.SHORT_VIDEO_THRESHOLD
+        if stream_split is None:
+            stream_split = config.STREAM_SPLIT
         processed_files = []
         total_videos = len(video_urls)
         
@@ -459,6 +494,17 @@ class VideoDownloader:
                 overall_progress = (i / total_videos) * 100
                 self.update_progress(overall_progress)
                 
+                if enable_cut and stream_split:
+                    # Cắt trong lúc tải; nếu không được thì quay về tải file đầy đủ rồi cắt
+                    cut_files = self.stream_split_video(url, output_dir, resolution)
+                    if cut_files:
+                        processed_files.extend(cut_files)
+                        self.log(f"Đã cắt thành {len(cut_files)} đoạn video")
+                        continue
+                    if self.stop_flag:
+                        break
+                    self.log("Chuyển sang tải file đầy đủ rồi cắt")
+                
                 # Tải video
                 downloaded_file = self.download_video(url, output_dir, resolution)
                 
@@ -1,9 +1,19 @@
 import os
+import json
+import hashlib
 import ffmpeg
 import logging
 from pathlib import Path
 from config import config
+import mp4_parser
+from smart_render import SmartRenderer
+from cut_planner import CutPlanner
+import virtual_split
+from rendition_ladder import RenditionLadder
+from segment_verifier import verify_segments, copy_tolerance
+from ffmpeg_scheduler import get_scheduler
 import math
+import bisect
 import random
 
 class VideoSplitter:
@@ -38,18 +48,25 @@ class VideoSplitter:
         
         return logger
     
-    def get_video_duration(self, video_path):
-        """Get video duration in seconds using FFmpeg"""
+    def get_video_duration(self, video_path, probe=None):
+        """Get video duration in seconds using FFmpeg (or an existing probe result)"""
         try:
-            probe = ffmpeg.probe(video_path)
+            probe = probe or mp4_parser.probe(video_path)
             duration = float(probe['streams'][0]['duration'])
             return duration
         except Exception as e:
             self.logger.error(f"Error getting video duration: {e}")
             return None
     
-    def calculate_segments(self, duration):
-        """Calculate how to split the video into random segments using config values"""
+    def calculate_segments(self, duration, seed=None, preferred_cuts=None):
+        """Calculate how to split the video into random segments using config values
+        
+        The same seed always produces the same plan, so re-runs can reuse it.
+        When preferred_cuts (sorted times, e.g. scene changes) are given, each
+        boundary snaps to the candidate nearest the random target that keeps
+        the segment within MIN_CUT_TIME..MAX_CUT_TIME.
+        """
+        rng = random.Random(seed)
         min_segment = config.MIN_CUT_TIME  # Sử dụng giá trị từ config
         max_segment = config.MAX_CUT_TIME  # Sử dụng giá trị từ config
         min_last_segment = config.SHORT_VIDEO_THRESHOLD  # Minimum duration for last segment
@@ -65,7 +82,11 @@ class VideoSplitter:
             remaining_duration = duration - current_time
             
             # Generate random segment duration
-            segment_duration = random.randint(min_segment, max_segment)
+            segment_duration = rng.randint(min_segment, max_segment)
+            if preferred_cuts:
+                segment_duration = self._snap_to_preferred(
+                    current_time, segment_duration, preferred_cuts, min_segment, max_segment
+                )
             
             # Check if this would be the last segment
             if current_time + segment_duration >= duration:
@@ -92,52 +113,102 @@ class VideoSplitter:
         
         return segments
     
-    def split_video(self, video_path, video_title, video_id):
-        """Split video into segments"""
+    def _snap_to_preferred(self, current_time, target_duration, preferred_cuts, min_segment, max_segment):
+        """Duration to the preferred cut nearest the target, or the target if none is in range"""
+        low = bisect.bisect_left(preferred_cuts, current_time + min_segment)
+        high = bisect.bisect_right(preferred_cuts, current_time + max_segment)
+        if low >= high:
+            return target_duration
+        target = current_time + target_duration
+        best = min(preferred_cuts[low:high], key=lambda cut: abs(cut - target))
+        return best - current_time
+    
+    def split_video(self, video_path, video_title, video_id, probe=None):
+        """Split video into segments
+        
+        A manifest in the output directory records the plan and a checksum for
+        every finished segment. Re-runs reuse the plan and only regenerate
+        segments that are missing or corrupt. A probe result the caller already
+        has is reused instead of probing the source again.
+        """
         try:
             self.logger.info(f"Starting video splitting: {video_path}")
             
-            # Get video duration
-            duration = self.get_video_duration(video_path)
-            if duration is None:
-                return {
-                    'success': False,
-                    'error': 'Could not get video duration'
-                }
+            # Create output directory for this video
+            video_output_dir = self.output_path / self._sanitize_filename(video_title)
+            video_output_dir.mkdir(parents=True, exist_ok=True)
+            manifest_path = video_output_dir / config.SEGMENT_MANIFEST_NAME
             
-            self.logger.info(f"Video duration: {duration:.2f} seconds")
+            manifest = self._load_manifest(manifest_path, video_path)
+            if manifest:
+                self.logger.info(f"Resuming from manifest: {manifest_path}")
+            else:
+                # Get video duration
+                duration = self.get_video_duration(video_path, probe)
+                if duration is None:
+                    return {
+                        'success': False,
+                        'error': 'Could not get video duration'
+                    }
+                
+                self.logger.info(f"Video duration: {duration:.2f} seconds")
+                
+                # Calculate segments
+                seed = random.randrange(2 ** 32)
+                segments = self.calculate_segments(
+                    duration, seed=seed, preferred_cuts=self._preferred_cuts(video_path)
+                )
+                manifest = self._new_manifest(video_path, video_title, duration, seed, segments)
+                self._save_manifest(manifest_path, manifest)
             
-            # Calculate segments
-            segments = self.calculate_segments(duration)
+            segments = manifest['segments']
+            if config.SPLIT_MODE == 'virtual':
+                return self._virtual_split(video_path, manifest, video_output_dir, manifest_path)
+            if config.ENABLE_RENDITION_LADDER or config.VERTICAL_EXPORT:
+                return self._ladder_split(video_path, manifest, video_output_dir, manifest_path, video_title, probe)
             self.logger.info(f"Will create {len(segments)} segments")
             
-            # Create output directory for this video
-            video_output_dir = self.output_path / self._sanitize_filename(video_title)
-            video_output_dir.mkdir(parents=True, exist_ok=True)
+            # Smart/re-encode modes share one renderer (probe and keyframes) across segments
+            renderer = SmartRenderer(video_path) if config.SPLIT_MODE != 'copy' else None
             
             # Split video into segments
             output_files = []
             for i, segment in enumerate(segments):
-                output_file = self._create_segment(
-                    video_path, 
-                    segment, 
-                    video_output_dir, 
-                    video_title, 
-                    i + 1
-                )
+                output_file = self._existing_segment(video_output_dir, segment)
+                if output_file:
+                    self.logger.info(f"Segment {i + 1} already complete, skipping: {segment['filename']}")
+                else:
+                    output_file = self._build_segment(
+                        video_path, segment, manifest, manifest_path, video_output_dir, video_title, renderer
+                    )
                 
                 if output_file:
                     output_files.append(output_file)
                 else:
                     self.logger.error(f"Failed to create segment {i + 1}")
             
+            verification = None
+            if config.VERIFY_SEGMENTS and output_files:
+                # Stream-copied segments start at the keyframe before the cut, up to one GOP early
+                tolerance = copy_tolerance(video_path) if renderer is None else None
+                verification = verify_segments(
+                    output_files, expect_audio=self._source_has_audio(video_path, probe), tolerance=tolerance
+                )
+                if verification['failed']:
+                    output_files, verification = self.repair_segments(
+                        video_path, video_title, manifest, manifest_path, video_output_dir,
+                        output_files, verification, renderer=renderer, tolerance=tolerance
+                    )
+            
             if output_files:
                 self.logger.info(f"Successfully created {len(output_files)} segments")
                 return {
                     'success': True,
                     'segments_count': len(output_files),
                     'output_files': output_files,
-                    'output_directory': str(video_output_dir)
+                    'output_directory': str(video_output_dir),
+                    'manifest_path': str(manifest_path),
+                    'verification': verification
                 }
             else:
                 return {
@@ -153,8 +224,417 @@ class VideoSplitter:
                 'error': error_msg
             }
     
-    def _create_segment(self, video_path, segment, output_dir, video_title, segment_number):
-        """Create a single video segment"""
+    def _build_segment(self, video_path, segment, manifest, manifest_path, output_dir, video_title, renderer=None):
+        """Create one planned segment and record its size and checksum in the manifest"""
+        output_file = self._create_segment(
+            video_path,
+            segment,
+            output_dir,
+            video_title,
+            segment['segment_number'],
+            renderer=renderer
+        )
+        if output_file:
+            segment['size'] = output_file['size']
+            segment['checksum'] = self._file_checksum(output_file['path'])
+            output_file['checksum'] = segment['checksum']
+            self._save_manifest(manifest_path, manifest)
+        return output_file
+    
+    def repair_segments(self, video_path, video_title, manifest, manifest_path, output_dir,
+                        output_files, report, renderer=None, tolerance=None):
+        """Regenerate only the segments that failed verification, then verify them again
+        
+        Returns:
+            tuple: (output_files with repaired entries, verification report)
+        """
+        failed_numbers = {result['segment_number'] for result in report['failed']}
+        for result in report['failed']:
+            self.logger.warning(
+                f"Segment {result['segment_number']} failed verification "
+                f"({'; '.join(result['errors'])}), regenerating"
+            )
+        
+        repaired = {}
+        for segment in manifest['segments']:
+            if segment['segment_number'] in failed_numbers:
+                segment['size'] = segment['checksum'] = None
+                repaired[segment['segment_number']] = self._build_segment(
+                    video_path, segment, manifest, manifest_path, output_dir, video_title, renderer
+                )
+        self._save_manifest(manifest_path, manifest)
+        
+        output_files = [
+            repaired.get(entry['segment_number'], entry) for entry in output_files
+        ]
+        output_files = [entry for entry in output_files if entry]
+        
+        recheck = verify_segments(
+            [entry for entry in output_files if entry['segment_number'] in failed_numbers],
+            expect_audio=self._source_has_audio(video_path),
+            tolerance=tolerance
+        )
+        still_failed = {result['segment_number'] for result in recheck['failed']}
+        for number in still_failed:
+            self.logger.error(f"Segment {number} is still invalid after regeneration")
+        
+        results = {result['segment_number']: result for result in report['results']}
+        results.update({result['segment_number']: result for result in recheck['results']})
+        failed = [result for result in results.values() if not result['ok']]
+        return output_files, {
+            'checked': len(results),
+            'passed': len(results) - len(failed),
+            'failed': failed,
+            'results': list(results.values()),
+            'repaired': sorted(failed_numbers - still_failed)
+        }
+    
+    def _source_has_audio(self, video_path, probe=None):
+        """Whether the source has an audio stream (segments must then carry one too)"""
+        try:
+            probe = probe or mp4_parser.probe(video_path)
+            return any(s['codec_type'] == 'audio' for s in probe['streams'])
+        except Exception:
+            return False
+    
+    def is_split_complete(self, video_path, video_title):
+        """Check whether every planned segment of a video already exists with its recorded size
+        
+        This is a cheap check (no checksums) used to skip already-split files in batches.
+        """
+        video_output_dir = self.output_path / self._sanitize_filename(video_title)
+        manifest = self._load_manifest(video_output_dir / config.SEGMENT_MANIFEST_NAME, video_path)
+        if not manifest:
+            return False
+        if config.SPLIT_MODE == 'virtual':
+            try:
+                virtual_split.load_index(video_output_dir / config.VIRTUAL_INDEX_NAME)
+            except (OSError, ValueError):
+                # Missing, from an older index version or the source changed: rebuild it
+                return False
+            return True
+        if config.ENABLE_RENDITION_LADDER or config.VERTICAL_EXPORT:
+            return bool(self._ladder_outputs(manifest, video_output_dir, check_all=True))
+        for segment in manifest['segments']:
+            if not segment.get('size'):
+                return False
+            try:
+                if (video_output_dir / segment['filename']).stat().st_size != segment['size']:
+                    return False
+            except OSError:
+                return False
+        return True
+    
+    def _virtual_split(self, video_path, manifest, output_dir, manifest_path):
+        """Write a byte-range index for the planned segments instead of segment files"""
+        index_path = output_dir / config.VIRTUAL_INDEX_NAME
+        index = virtual_split.write_index(video_path, manifest['segments'], index_path)
+        self.logger.info(f"Wrote virtual index with {len(index['segments'])} segments: {index_path}")
+        output_files = [
+            {
+                'filename': segment['filename'],
+                'path': None,
+                'segment_number': segment['segment_number'],
+                'start_time': segment['start'],
+                'duration': segment['duration'],
+                'size': sum(track['bytes'] for track in segment['tracks'])
+            }
+            for segment in index['segments']
+        ]
+        return {
+            'success': True,
+            'segments_count': len(output_files),
+            'output_files': output_files,
+            'output_directory': str(output_dir),
+            'manifest_path': str(manifest_path),
+            'index_path': str(index_path)
+        }
+    
+    def _ladder_split(self, video_path, manifest, output_dir, manifest_path, video_title, probe=None):
+        """Encode every segment at every rendition, decoding each segment once
+        
+        Each rendition (and the vertical export, when enabled) goes to its own
+        subdirectory with the manifest's filenames; the manifest records
+        per-rendition sizes so a complete ladder is skipped. Rendition segments
+        that fail verification are re-encoded once; if any is still invalid the
+        split fails.
+        """
+        output_files = self._ladder_outputs(manifest, output_dir, check_all=True)
+        ladder = None
+        if output_files:
+            self.logger.info("All renditions already complete, skipping encode")
+        else:
+            ladder = RenditionLadder(video_path)
+            branches = self._ladder_branches(ladder)
+            if not branches:
+                return {'success': False, 'error': 'No renditions configured'}
+            self.logger.info(
+                f"Encoding {len(manifest['segments'])} segments x {len(branches)} renditions "
+                f"({', '.join(b['name'] for b in branches)}), one ffmpeg run per segment"
+            )
+            ladder.encode(manifest['segments'], output_dir, self._sanitize_filename(video_title), branches)
+            for segment in manifest['segments']:
+                segment['renditions'] = {}
+                for branch in branches:
+                    self._record_rendition(segment, branch['name'], output_dir)
+            self._save_manifest(manifest_path, manifest)
+            output_files = self._ladder_outputs(manifest, output_dir)
+        
+        verification = None
+        if config.VERIFY_SEGMENTS and output_files:
+            expect_audio = self._source_has_audio(video_path, probe)
+            verification = verify_segments(output_files, expect_audio=expect_audio)
+            if verification['failed']:
+                output_files, verification = self.repair_renditions(
+                    ladder or RenditionLadder(video_path), manifest, manifest_path, output_dir,
+                    video_title, output_files, verification, expect_audio
+                )
+                if verification['failed']:
+                    return {
+                        'success': False,
+                        'error': f"{len(verification['failed'])} rendition segments failed verification",
+                        'verification': verification
+                    }
+        
+        if not output_files:
+            return {'success': False, 'error': 'No segments were created successfully'}
+        self.logger.info(f"Successfully created {len(output_files)} rendition segments")
+        return {
+            'success': True,
+            'segments_count': len(manifest['segments']),
+            'output_files': output_files,
+            'output_directory': str(output_dir),
+            'manifest_path': str(manifest_path),
+            'renditions': sorted({entry['rendition'] for entry in output_files}),
+            'verification': verification
+        }
+    
+    def _ladder_branches(self, ladder):
+        """Encode branches for the configured renditions and vertical export"""
+        branches = []
+        if config.ENABLE_RENDITION_LADDER:
+            branches = [ladder.branch(rendition) for rendition in ladder.renditions()]
+        if config.VERTICAL_EXPORT:
+            branches.append(ladder.vertical_branch())
+        return branches
+    
+    def _record_rendition(self, segment, name, output_dir):
+        """Record a rendition file's size in the manifest segment (None when missing, so it is redone)"""
+        path = output_dir / name / segment['filename']
+        segment['renditions'][name] = path.stat().st_size if path.exists() else None
+    
+    def repair_renditions(self, ladder, manifest, manifest_path, output_dir, video_title,
+                           output_files, report, expect_audio):
+        """Re-encode only the rendition segments that failed verification, then verify them again
+        
+        Returns:
+            tuple: (output_files, verification report)
+        """
+        entries = {entry['path']: entry for entry in output_files}
+        failed_numbers = {}
+        for result in report['failed']:
+            entry = entries[result['path']]
+            self.logger.warning(
+                f"Rendition {entry['rendition']} segment {entry['segment_number']} failed verification "
+                f"({'; '.join(result['errors'])}), regenerating"
+            )
+            failed_numbers.setdefault(entry['rendition'], set()).add(entry['segment_number'])
+        
+        branches = {branch['name']: branch for branch in self._ladder_branches(ladder)}
+        for name, numbers in failed_numbers.items():
+            segments = [segment for segment in manifest['segments'] if segment['segment_number'] in numbers]
+            if name in branches:
+                ladder.encode(segments, output_dir, self._sanitize_filename(video_title), [branches[name]])
+            for segment in segments:
+                self._record_rendition(segment, name, output_dir)
+        
+        failed_paths = {result['path'] for result in report['failed']}
+        output_files = self._ladder_outputs(manifest, output_dir)
+        recheck = verify_segments(
+            [entry for entry in output_files if entry['path'] in failed_paths], expect_audio=expect_audio
+        )
+        still_failed = {result['path'] for result in recheck['failed']}
+        # A rendition segment that is still missing or invalid counts as failed too
+        still_failed |= failed_paths - {result['path'] for result in recheck['results']}
+        for path in still_failed:
+            self.logger.error(f"Rendition segment {path} is still invalid after regeneration")
+            entry = entries[path]
+            segment = next(s for s in manifest['segments'] if s['segment_number'] == entry['segment_number'])
+            # Forget the recorded size so the next run encodes it again
+            segment['renditions'][entry['rendition']] = None
+        self._save_manifest(manifest_path, manifest)
+        
+        results = {result['path']: result for result in report['results']}
+        results.update({result['path']: result for result in recheck['results']})
+        failed = [result for result in results.values() if not result['ok']]
+        return [entry for entry in output_files if entry['path'] not in still_failed], {
+            'checked': len(results),
+            'passed': len(results) - len(failed),
+            'failed': failed,
+            'results': list(results.values()),
+            'repaired': sorted(failed_paths - still_failed)
+        }
+    
+    def _ladder_outputs(self, manifest, output_dir, check_all=False):
+        """Output entries for the rendition files recorded in the manifest
+        
+        With check_all, returns [] unless every segment has every rendition on disk
+        with its recorded size.
+        """
+        output_files = []
+        for segment in manifest['segments']:
+            renditions = segment.get('renditions') or {}
+            if check_all and not renditions:
+                return []
+            for name, size in renditions.items():
+                path = output_dir / name / segment['filename']
+                try:
+                    complete = path.stat().st_size == size
+                except OSError:
+                    complete = False
+                if not complete:
+                    if check_all:
+                        return []
+                    continue
+                output_files.append({
+                    'filename': segment['filename'],
+                    'path': str(path),
+                    'rendition': name,
+                    'segment_number': segment['segment_number'],
+                    'start_time': segment['start'],
+                    'duration': segment['duration'],
+                    'size': size
+                })
+        return output_files
+    
+    def _preferred_cuts(self, video_path):
+        """Preferred cut points from the configured planner (empty = random cuts)"""
+        try:
+            cuts = CutPlanner(video_path).preferred_cuts()
+        except Exception as e:
+            self.logger.warning(f"Cut analysis failed, using random cuts: {e}")
+            return []
+        if cuts:
+            self.logger.info(f"Found {len(cuts)} candidate cut points ({config.CUT_PLANNER})")
+        return cuts
+    
+    def _source_fingerprint(self, video_path):
+        """Identify the source file by path, size and modification time"""
+        stat = os.stat(video_path)
+        return {
+            'path': os.path.abspath(video_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime
+        }
+    
+    def _plan_params(self):
+        """Config values that affect the segment plan"""
+        return {
+            'min_cut_time': config.MIN_CUT_TIME,
+            'max_cut_time': config.MAX_CUT_TIME,
+            'short_video_threshold': config.SHORT_VIDEO_THRESHOLD,
+            'split_mode': config.SPLIT_MODE,
+            'cut_planner': config.CUT_PLANNER,
+            'scene_change_threshold': config.SCENE_CHANGE_THRESHOLD,
+            'silence_threshold_db': config.SILENCE_THRESHOLD_DB,
+            'silence_min_duration': config.SILENCE_MIN_DURATION,
+            'rendition_ladder': (
+                [r['name'] for r in config.RENDITION_LADDER] if config.ENABLE_RENDITION_LADDER else None
+            ),
+            'vertical_export': (
+                [config.VERTICAL_WIDTH, config.VERTICAL_HEIGHT, config.VERTICAL_CROP_MODE]
+                if config.VERTICAL_EXPORT else None
+            )
+        }
+    
+    def _new_manifest(self, video_path, video_title, duration, seed, segments):
+        """Build a manifest for a freshly calculated plan"""
+        safe_title = self._sanitize_filename(video_title)
+        return {
+            'version': 1,
+            'source': self._source_fingerprint(video_path),
+            'duration': duration,
+            'seed': seed,
+            'params': self._plan_params(),
+            'segments': [
+                {
+                    'segment_number': i + 1,
+                    'filename': f"{safe_title}_{i + 1:02d}.mp4",
+                    'start': segment['start'],
+                    'duration': segment['duration'],
+                    'size': None,
+                    'checksum': None
+                }
+                for i, segment in enumerate(segments)
+            ]
+        }
+    
+    def _load_manifest(self, manifest_path, video_path):
+        """Load the manifest if it still matches the source file and config"""
+        if not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+            return None
+        
+        source = self._source_fingerprint(video_path)
+        saved_source = manifest.get('source', {})
+        if (saved_source.get('size') != source['size']
+                or saved_source.get('mtime') != source['mtime']
+                or manifest.get('params') != self._plan_params()):
+            self.logger.info("Manifest does not match source or config, planning again")
+            return None
+        return manifest
+    
+    def _save_manifest(self, manifest_path, manifest):
+        """Write the manifest atomically so an interrupted run never leaves it half-written"""
+        temp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, manifest_path)
+    
+    def _existing_segment(self, output_dir, segment):
+        """Return the output entry of a segment that is already complete, otherwise None"""
+        if not segment.get('size'):
+            return None
+        output_path = output_dir / segment['filename']
+        try:
+            if output_path.stat().st_size != segment['size']:
+                return None
+        except OSError:
+            return None
+        if config.VERIFY_SEGMENT_CHECKSUM and self._file_checksum(output_path) != segment['checksum']:
+            self.logger.warning(f"Checksum mismatch, regenerating: {segment['filename']}")
+            return None
+        output_file = {
+            'filename': segment['filename'],
+            'path': str(output_path),
+            'segment_number': segment['segment_number'],
+            'start_time': segment['start'],
+            'duration': segment['duration'],
+            'size': segment['size'],
+            'checksum': segment['checksum']
+        }
+        if config.SEGMENT_THUMBNAILS:
+            output_file.update(self._existing_previews(self._preview_paths(output_path)))
+        return output_file
+    
+    def _file_checksum(self, file_path):
+        """SHA-256 of a file, read in 1 MB blocks"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _create_segment(self, video_path, segment, output_dir, video_title, segment_number, renderer=None):
+        """Create a single video segment
+        
+        Uses stream copy by default; with a SmartRenderer the cut is frame-accurate.
+        """
         try:
             # Create output filename
             safe_title = self._sanitize_filename(video_title)
@@ -166,24 +646,50 @@ class VideoSplitter:
                 f"start={segment['start']:.2f}s, duration={segment['duration']:.2f}s"
             )
             
-            # Use FFmpeg to extract segment
-            (
-                ffmpeg
-                .input(video_path, ss=segment['start'], t=segment['duration'])
-                .output(
-                    str(output_path),
-                    vcodec='copy',  # Copy video codec (faster)
-                    acodec='copy',  # Copy audio codec (faster)
-                    avoid_negative_ts='make_zero'
+            preview_paths = self._preview_paths(output_path) if config.SEGMENT_THUMBNAILS else None
+            preview = None
+            if preview_paths:
+                def preview(video_stream):
+                    return self._preview_outputs(video_stream, segment['duration'], preview_paths)
+            
+            if renderer and config.SPLIT_MODE == 'reencode':
+                # Previews share the full decode of the re-encode
+                renderer.reencode(output_path, segment['start'], segment['duration'], preview=preview)
+            elif renderer:
+                render_info = renderer.render(output_path, segment['start'], segment['duration'])
+                self.logger.info(
+                    f"Segment {segment_number} rendered in {render_info['mode']} mode "
+                    f"(re-encoded {render_info['reencoded_seconds']:.2f}s)"
                 )
-                .overwrite_output()
-                .run(quiet=True, capture_stdout=True, capture_stderr=True)
-            )
+                if preview:
+                    self._render_previews(video_path, segment, preview)
+            else:
+                # Use FFmpeg to extract segment
+                source = ffmpeg.input(video_path, ss=segment['start'], t=segment['duration'])
+                outputs = [
+                    ffmpeg.output(
+                        source['v'],
+                        source['a?'],
+                        str(output_path),
+                        vcodec='copy',  # Copy video codec (faster)
+                        acodec='copy',  # Copy audio codec (faster)
+                        avoid_negative_ts='make_zero'
+                    )
+                ]
+                if preview:
+                    # Previews read a second, keyframe-only input in the same run;
+                    # skip_frame on the copied input would also drop the packets being copied
+                    outputs.extend(preview(self._preview_source(video_path, segment)))
+                with get_scheduler().slot() as slot:
+                    slot.run(
+                        ffmpeg.merge_outputs(*outputs).overwrite_output(),
+                        quiet=True, capture_stdout=True, capture_stderr=True
+                    )
             
             # Verify the output file was created
             if output_path.exists() and output_path.stat().st_size > 0:
                 self.logger.info(f"Segment {segment_number} created successfully: {output_filename}")
-                return {
+                output_file = {
                     'filename': output_filename,
                     'path': str(output_path),
                     'segment_number': segment_number,
@@ -191,6 +697,9 @@ class VideoSplitter:
                     'duration': segment['duration'],
                     'size': output_path.stat().st_size
                 }
+                if preview_paths:
+                    output_file.update(self._existing_previews(preview_paths))
+                return output_file
             else:
                 self.logger.error(f"Segment {segment_number} file was not created or is empty")
                 return None
@@ -204,6 +713,53 @@ class VideoSplitter:
             self.logger.error(error_msg)
             return None
     
+    def _preview_paths(self, output_path):
+        """Thumbnail and contact sheet paths next to a segment file"""
+        return {
+            'thumbnail': output_path.with_name(f"{output_path.stem}_thumb.jpg"),
+            'contact_sheet': output_path.with_name(f"{output_path.stem}_sheet.jpg")
+        }
+    
+    def _preview_outputs(self, video_stream, duration, preview_paths):
+        """Thumbnail and contact sheet outputs fed from a video stream that is already being decoded"""
+        tiles = config.CONTACT_SHEET_COLUMNS * config.CONTACT_SHEET_ROWS
+        branches = video_stream.filter('scale', config.THUMBNAIL_WIDTH, -2).filter_multi_output('split')
+        thumbnail = branches[0].output(str(preview_paths['thumbnail']), **{'frames:v': 1})
+        contact_sheet = (
+            branches[1]
+            .filter('fps', fps=f"{tiles / max(duration, 0.001):.6f}")
+            .filter('tile', f"{config.CONTACT_SHEET_COLUMNS}x{config.CONTACT_SHEET_ROWS}")
+            .output(str(preview_paths['contact_sheet']), **{'frames:v': 1})
+        )
+        return [thumbnail, contact_sheet]
+    
+    def _preview_source(self, video_path, segment):
+        """Video stream for previews that decodes only the source keyframes
+        
+        Like the stream copy, it starts at the keyframe at or before the segment
+        start, so a segment without a keyframe of its own still gets a preview.
+        """
+        source = ffmpeg.input(
+            video_path, ss=segment['start'], t=segment['duration'], skip_frame='nokey', noaccurate_seek=None
+        )
+        return source.video.filter('setpts', 'PTS-STARTPTS')
+    
+    def _render_previews(self, video_path, segment, preview):
+        """Previews for smart-rendered segments, decoding only the source keyframes"""
+        with get_scheduler().slot() as slot:
+            slot.run(
+                ffmpeg.merge_outputs(*preview(self._preview_source(video_path, segment))).overwrite_output(),
+                quiet=True, capture_stdout=True, capture_stderr=True
+            )
+    
+    def _existing_previews(self, preview_paths):
+        """Output entry fields for the preview images that exist on disk"""
+        return {
+            kind: str(path)
+            for kind, path in preview_paths.items()
+            if path.exists()
+        }
+    
     def _sanitize_filename(self, filename):
         """Sanitize filename for safe file system usage"""
         # Remove or replace invalid characters
@@ -223,7 +779,7 @@ class VideoSplitter:
     def get_video_info_ffmpeg(self, video_path):
         """Get detailed video information using FFmpeg"""
         try:
-            probe = ffmpeg.probe(video_path)
+            probe = mp4_parser.probe(video_path)
             
             video_stream = None
             audio_stream = None
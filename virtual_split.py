@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Virtual Split Module
+Chia video "ảo": thay vì ghi N file, chỉ ghi một index nhỏ chứa mốc thời gian
+(căn theo keyframe) và vùng byte của từng đoạn trong file nguồn cùng header khởi tạo.
+Khi cần, exporter mới tạo file mp4 thật cho đúng một đoạn.
+
+Xuất một đoạn: python virtual_split.py <index.json> <số thứ tự đoạn> [file đầu ra]
+"""
+
+import os
+import sys
+import json
+import bisect
+import logging
+import argparse
+from pathlib import Path
+
+import ffmpeg
+import mp4_parser
+from config import config
+from ffmpeg_scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+
+def _fingerprint(video_path):
+    stat = os.stat(video_path)
+    return {
+        'path': os.path.abspath(video_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime
+    }
+
+
+def _byte_span(offsets, track, first, end):
+    """
+    Vùng byte của các mẫu [first, end) trong file: [vị trí đầu, vị trí cuối) và tổng số byte mẫu
+
+    Chỉ lưu hai đầu mút thay vì từng vùng liền nhau: audio/video xen kẽ theo chunk
+    nên danh sách vùng gần như dài bằng số mẫu
+    """
+    if first >= end:
+        return [0, 0], 0
+    last = max(range(first, end), key=lambda index: offsets[index])
+    span = [min(offsets[first:end]), offsets[last] + track.sample_size_at(last)]
+    return span, sum(track.sample_size_at(index) for index in range(first, end))
+
+
+def build_index(video_path, segments):
+    """
+    Lập index cho các đoạn đã lên kế hoạch, căn ranh giới về keyframe ngay trước
+    (giống kết quả của stream copy)
+
+    Args:
+        video_path: File MP4 nguồn
+        segments: Danh sách đoạn trong manifest (segment_number, filename, start, duration)
+
+    Returns:
+        dict: Index ảo của video
+
+    Raises:
+        mp4_parser.Mp4ParseError: Nếu nguồn không phải MP4 đọc được
+    """
+    info = mp4_parser.parse_mp4(video_path)
+    video = info.video_track
+    if video is None:
+        raise mp4_parser.Mp4ParseError("Không có track video để căn keyframe")
+
+    video_times = video.presentation_times()
+    keyframe_indices = sorted(video.keyframe_indices(), key=lambda i: video_times[i])
+    keyframe_times = [max(0.0, video_times[i]) for i in keyframe_indices]
+    duration = info.duration_seconds
+
+    # Ranh giới = keyframe tại hoặc trước điểm cắt dự kiến; bỏ các đoạn bị gộp vào nhau
+    boundaries = []
+    for segment in segments:
+        position = bisect.bisect_right(keyframe_times, segment['start'] + config.KEYFRAME_TOLERANCE) - 1
+        position = max(position, 0)
+        if boundaries and boundaries[-1][1] == position:
+            continue
+        boundaries.append((segment, position))
+
+    tracks = []
+    for track in info.tracks:
+        if track.codec_type not in ('video', 'audio') or not track.sample_count:
+            continue
+        times = video_times if track is video else track.presentation_times()
+        tracks.append((track, times, track.sample_offsets()))
+
+    index_segments = []
+    for number, (segment, position) in enumerate(boundaries):
+        start = keyframe_times[position]
+        if number + 1 < len(boundaries):
+            end_position = boundaries[number + 1][1]
+            end = keyframe_times[end_position]
+        else:
+            end_position = None
+            end = duration
+
+        track_entries = []
+        for track, times, offsets in tracks:
+            if track is video:
+                first = keyframe_indices[position]
+                last = keyframe_indices[end_position] if end_position is not None else track.sample_count
+            else:
+                first = bisect.bisect_left(times, start)
+                last = bisect.bisect_left(times, end) if end_position is not None else track.sample_count
+            span, size = _byte_span(offsets, track, first, last)
+            track_entries.append({
+                'track_id': track.track_id,
+                'type': track.codec_type,
+                'samples': [first, last],
+                'byte_span': span,
+                'bytes': size,
+            })
+
+        index_segments.append({
+            'segment_number': segment['segment_number'],
+            'filename': segment['filename'],
+            'start': start,
+            'duration': end - start,
+            'tracks': track_entries,
+        })
+
+    return {
+        'version': INDEX_VERSION,
+        'source': _fingerprint(video_path),
+        'duration': duration,
+        'init': {name: list(info.boxes[name]) for name in ('ftyp', 'moov') if name in info.boxes},
+        'segments': index_segments,
+    }
+
+
+def write_index(video_path, segments, index_path):
+    """Lập và ghi index gọn (không thụt lề; ghi file tạm rồi đổi tên)"""
+    index = build_index(video_path, segments)
+    temp_path = f"{index_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, index_path)
+    return index
+
+
+def load_index(index_path):
+    """
+    Đọc index và kiểm tra file nguồn chưa bị thay đổi
+
+    Raises:
+        ValueError: Nếu index sai phiên bản hoặc file nguồn đã khác
+    """
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get('version') != INDEX_VERSION:
+        raise ValueError(f"Index không đúng phiên bản: {index_path}")
+    source = index['source']
+    try:
+        stat = os.stat(source['path'])
+    except OSError:
+        raise ValueError(f"Không tìm thấy file nguồn: {source['path']}")
+    if stat.st_size != source['size'] or stat.st_mtime != source['mtime']:
+        raise ValueError(f"File nguồn đã thay đổi sau khi lập index: {source['path']}")
+    return index
+
+
+def export_segment(index_path, segment_number, output_path=None):
+    """
+    Tạo file mp4 thật cho một đoạn trong index (stream copy, ranh giới đã trùng keyframe)
+
+    Args:
+        index_path: File index ảo
+        segment_number: Số thứ tự đoạn (bắt đầu từ 1)
+        output_path: File đầu ra (mặc định: tên đoạn trong cùng thư mục với index)
+
+    Returns:
+        str: Đường dẫn file đã tạo
+    """
+    index = load_index(index_path)
+    segment = next((s for s in index['segments'] if s['segment_number'] == segment_number), None)
+    if segment is None:
+        raise ValueError(f"Index không có đoạn {segment_number}")
+
+    output_path = str(output_path or Path(index_path).parent / segment['filename'])
+    output_args = {}
+    video = next((t for t in segment['tracks'] if t['type'] == 'video'), None)
+    if video:
+        # Giới hạn đúng số frame của đoạn để không lấn sang GOP kế tiếp
+        output_args['frames:v'] = video['samples'][1] - video['samples'][0]
+    with get_scheduler().slot() as slot:
+        slot.run(
+            ffmpeg
+            .input(index['source']['path'], ss=segment['start'], t=segment['duration'])
+            .output(
+                output_path,
+                c='copy',
+                movflags='faststart',
+                avoid_negative_ts='make_zero',
+                **output_args
+            )
+            .overwrite_output(),
+            quiet=True, capture_stdout=True, capture_stderr=True
+        )
+    logger.info(f"Exported virtual segment {segment_number}: {output_path}")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xuất một đoạn từ index chia video ảo")
+    parser.add_argument('index', help="File index ảo")
+    parser.add_argument('segment', type=int, help="Số thứ tự đoạn (bắt đầu từ 1)")
+    parser.add_argument('output', nargs='?', help="File đầu ra")
+    args = parser.parse_args()
+
+    try:
+        print(f"✅ Đã xuất: {export_segment(args.index, args.segment, args.output)}")
+    except (ValueError, OSError, ffmpeg.Error) as e:
+        print(f"❌ Lỗi xuất đoạn: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Xiaohongshu Image Store Module
+Chọn bản ảnh ít byte nhất trong các bản CDN cung cấp, đặt đúng đuôi file theo nội dung thật
+và lưu ảnh theo hash nội dung: ảnh trùng (note đăng lại, tải lại) được hardlink tới bản đã có
+thay vì ghi thêm, ảnh đã từng tải (cùng mã ảnh trên CDN) không cần tải lại
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Định dạng trong URL CDN: "...!nd_dft_wlteh_webp_3", "...?imageView2/2/w/1080/format/avif", "a.jpg"
+URL_FORMAT = re.compile(r'(?:[_./]|format/)(avif|webp|jpe?g|png|heic)(?=[_./?!&]|$)')
+
+# Scene của bản xem trước (độ phân giải thấp), không dùng để lưu
+PREVIEW_SCENE = re.compile(r'PRV', re.IGNORECASE)
+
+# Các chỉ số tiết kiệm được cộng dồn theo note và theo lô
+SAVINGS_KEYS = ('downloaded_bytes', 'format_saved_bytes', 'dedup_bandwidth_bytes', 'dedup_storage_bytes')
+
+
+def url_format(url):
+    """Định dạng ảnh ghi trong URL ("jpg", "webp"...) hoặc None"""
+    match = URL_FORMAT.search(url.lower())
+    if not match:
+        return None
+    return 'jpg' if match.group(1) == 'jpeg' else match.group(1)
+
+
+def image_key(url):
+    """Mã ảnh trên CDN (phần cuối đường dẫn, bỏ hậu tố định dạng và chữ ký), giống nhau giữa các bản của một ảnh"""
+    path = url.split('?', 1)[0].rstrip('/')
+    return path.rsplit('/', 1)[-1].split('!', 1)[0] or None
+
+
+def image_variants(image_info):
+    """
+    Các URL bản đầy đủ của một ảnh (bỏ bản xem trước), bản mặc định đứng đầu
+    và mỗi định dạng chỉ giữ một URL
+
+    Args:
+        image_info: Một phần tử của image_list (url_default, info_list...)
+
+    Returns:
+        list: Danh sách URL
+    """
+    urls = []
+    if image_info.get('url_default'):
+        urls.append(image_info['url_default'])
+    for info in image_info.get('info_list') or []:
+        if info.get('url') and not PREVIEW_SCENE.search(info.get('image_scene', '')):
+            urls.append(info['url'])
+
+    variants = []
+    formats = set()
+    for url in urls:
+        fmt = url_format(url)
+        if fmt not in formats:
+            formats.add(fmt)
+            variants.append(url)
+    return variants
+
+
+def sniff_extension(path):
+    """Đuôi file theo chữ ký đầu file (jpg, png, webp, avif, heic, gif) hoặc None"""
+    with open(path, 'rb') as f:
+        head = f.read(32)
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    if head.startswith(b'GIF8'):
+        return 'gif'
+    if head[4:8] == b'ftyp':
+        brand = head[8:12]
+        if brand in (b'avif', b'avis'):
+            return 'avif'
+        if brand in (b'heic', b'heix', b'mif1', b'msf1'):
+            return 'heic'
+    return None
+
+
+def file_hash(path):
+    """SHA-256 của nội dung file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_savings(stats):
+    """Một dòng tóm tắt tiết kiệm băng thông/dung lượng của ảnh trong một lô"""
+    mb = 1048576
+    bandwidth = stats['format_saved_bytes'] + stats['dedup_bandwidth_bytes']
+    return (
+        f"Ảnh: tải {stats['downloaded_bytes'] / mb:.1f} MB, tiết kiệm băng thông {bandwidth / mb:.1f} MB "
+        f"(định dạng {stats['format_saved_bytes'] / mb:.1f} MB, ảnh đã có {stats['dedup_bandwidth_bytes'] / mb:.1f} MB), "
+        f"tiết kiệm dung lượng {stats['dedup_storage_bytes'] / mb:.1f} MB"
+    )
+
+
+class ImageStore:
+    """Kho ảnh theo hash nội dung, các file ảnh trong thư mục tải là hardlink tới kho"""
+
+    def __init__(self, store_dir):
+        """
+        Khởi tạo ImageStore
+
+        Args:
+            store_dir: Thư mục kho (phải cùng ổ đĩa với thư mục tải để hardlink được)
+        """
+        self.store_dir = Path(store_dir)
+        self.index_path = self.store_dir / 'index.json'
+        self._lock = threading.Lock()
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _blob_path(self, name):
+        return self.store_dir / name[:2] / name
+
+    def link_known(self, key, stem):
+        """
+        Tạo file ảnh từ kho nếu mã ảnh đã từng được tải (không cần request)
+
+        Args:
+            key: Mã ảnh (xem image_key())
+            stem: Đường dẫn file đích chưa có đuôi
+
+        Returns:
+            Path: File đã tạo hoặc None nếu ảnh chưa có trong kho
+        """
+        with self._lock:
+            name = self.index.get(key) if key else None
+            if not name:
+                return None
+            blob = self._blob_path(name)
+            if not blob.exists():
+                del self.index[key]
+                return None
+            target = stem.parent / f"{stem.name}{Path(name).suffix}"
+            try:
+                if not (target.exists() and os.path.samefile(blob, target)):
+                    self._link(blob, target)
+            except OSError as e:
+                logger.warning(f"Không tạo được ảnh {target} từ kho: {e}")
+                return None
+            return target
+
+    def add(self, path, key=None):
+        """
+        Đưa ảnh vừa tải vào kho: sửa đuôi theo nội dung, ảnh trùng nội dung được thay bằng hardlink
+
+        Args:
+            path: File ảnh vừa tải
+            key: Mã ảnh để lần sau không cần tải lại
+
+        Returns:
+            (Path file ảnh sau khi sửa đuôi, có trùng với ảnh đã có trong kho không)
+        """
+        path = Path(path)
+        try:
+            extension = sniff_extension(path)
+            if extension and path.suffix.lower() != f'.{extension}':
+                fixed = path.with_name(f"{path.stem}.{extension}")
+                os.replace(path, fixed)
+                path = fixed
+            name = f"{file_hash(path)}{path.suffix.lower()}"
+        except OSError as e:
+            logger.warning(f"Không đọc được ảnh {path}: {e}")
+            return path, False
+
+        duplicate = False
+        with self._lock:
+            blob = self._blob_path(name)
+            try:
+                if blob.exists():
+                    if not os.path.samefile(blob, path):
+                        self._link(blob, path)
+                        duplicate = True
+                else:
+                    blob.parent.mkdir(parents=True, exist_ok=True)
+                    os.link(path, blob)
+                if key:
+                    self.index[key] = name
+                    self._save()
+            except OSError as e:
+                logger.warning(f"Không đưa được ảnh {path} vào kho: {e}")
+        return path, duplicate
+
+    def _link(self, blob, target):
+        """Thay target bằng hardlink tới blob (chép nếu khác ổ đĩa), đổi tên nguyên tử"""
+        temp_path = target.with_name(target.name + '.link')
+        if temp_path.exists():
+            temp_path.unlink()
+        try:
+            os.link(blob, temp_path)
+        except OSError:
+            shutil.copyfile(blob, temp_path)
+        os.replace(temp_path, target)
+
+    def _save(self):
+        """Ghi index mã ảnh -> blob (gọi khi đang giữ lock)"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(temp_path, self.index_path)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Xiaohongshu Note Cache Module
+Cache thông tin note trên đĩa theo note ID: metadata tĩnh (title, user...) giữ lâu,
+URL media có chữ ký (video stream, image_list) hết hạn sớm và chỉ được làm mới khi hết hạn
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Các trường chứa URL media có chữ ký (cả dạng từ API feed và từ state của trang)
+MEDIA_KEYS = ('video', 'image_list', 'imageList')
+
+SAFE_NOTE_ID = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class NoteCache:
+    """Cache note_card trên đĩa, mỗi note một file JSON"""
+
+    def __init__(self, cache_dir=None, note_ttl=None, media_ttl=None):
+        """
+        Khởi tạo NoteCache
+
+        Args:
+            cache_dir: Thư mục cache (mặc định Config.XIAOHONGSHU_NOTE_CACHE_DIR)
+            note_ttl: Thời gian giữ metadata (giây, mặc định Config.XIAOHONGSHU_NOTE_TTL)
+            media_ttl: Thời gian giữ URL media (giây, mặc định Config.XIAOHONGSHU_MEDIA_URL_TTL)
+        """
+        self.cache_dir = Path(cache_dir or config.XIAOHONGSHU_NOTE_CACHE_DIR)
+        self.note_ttl = config.XIAOHONGSHU_NOTE_TTL if note_ttl is None else note_ttl
+        self.media_ttl = config.XIAOHONGSHU_MEDIA_URL_TTL if media_ttl is None else media_ttl
+        self._lock = threading.Lock()
+
+    def _path(self, note_id):
+        if not SAFE_NOTE_ID.match(note_id):
+            return None
+        return self.cache_dir / f"{note_id}.json"
+
+    def get(self, note_id):
+        """
+        Note đã cache nếu metadata còn hạn
+
+        Returns:
+            dict: {'note', 'media_fresh'} hoặc None nếu chưa cache/đã hết hạn
+        """
+        path = self._path(note_id)
+        if path is None:
+            return None
+        now = time.time()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if now - entry['fetched_at'] > self.note_ttl:
+                return None
+            return {'note': entry['note'], 'media_fresh': now - entry['media_fetched_at'] <= self.media_ttl}
+        except (OSError, ValueError, KeyError, TypeError):
+            # File hỏng hoặc sai định dạng: coi như chưa cache
+            return None
+
+    def put(self, note_id, note, refresh_media_only=False):
+        """
+        Lưu note vào cache
+
+        Args:
+            note_id: ID của note
+            note: note_card vừa lấy được
+            refresh_media_only: Chỉ thay các trường media của bản đã cache, giữ metadata và hạn của nó
+
+        Returns:
+            dict: Note sau khi lưu (metadata cũ + media mới nếu refresh_media_only)
+        """
+        path = self._path(note_id)
+        if path is None:
+            return note
+        now = time.time()
+        entry = {'note': note, 'fetched_at': now, 'media_fetched_at': now}
+        with self._lock:
+            if refresh_media_only:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        cached = json.load(f)
+                    for key in MEDIA_KEYS:
+                        if key in note:
+                            cached['note'][key] = note[key]
+                    cached['media_fetched_at'] = now
+                    entry = cached
+                except (OSError, ValueError, KeyError, TypeError):
+                    pass
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                temp_path = path.with_name(path.name + '.tmp')
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.warning(f"Không ghi được cache note {note_id}: {e}")
+        return entry['note']
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Xiaohongshu Replay Server Module
+Server HTTP cục bộ đóng vai Xiaohongshu: phát lại trang explore, response API feed và file media
+đã ghi sẵn, với độ trễ, băng thông và tỉ lệ lỗi tuỳ chỉnh, để đo/kiểm tra XiaohongshuDownloader offline.
+
+Thư mục fixture:
+    pages/<note_id>.html   Trang explore (lưu nguyên từ trình duyệt)
+    feed/<note_id>.json    Response của /api/sns/web/v1/feed
+    media/<host>/<path>    File media, ví dụ media/sns-video-bd.xhscdn.com/stream/abc.mp4
+
+URL media *.xhscdn.com trong trang và feed được đổi sang /media/<host>/<path> của server khi phát lại.
+Chạy: python xhs_replay_server.py FIXTURE_DIR [--synthesize N] [--latency S] [--bandwidth MB/s] [--error-rate P]
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from urllib.parse import parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FEED_PATH = '/api/sns/web/v1/feed'
+
+# URL CDN trong fixture, cả dạng "/" thường và dạng "/" trong state của trang
+MEDIA_URL = re.compile(r'https?:(?://|\\u002F\\u002F)([A-Za-z0-9.-]+\.xhscdn\.com)(?:/|\\u002F)')
+
+RANGE = re.compile(r'bytes=(\d+)-(\d*)$')
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Trả fixture theo đường dẫn; lỗi giả lập và độ trễ áp dụng cho mọi request"""
+
+    # Giữ kết nối như CDN/API thật để đo được hiệu quả của connection pool
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        note_id = parse_qs(query).get('source_note_id', [None])[0]
+        self._respond(path, note_id)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            note_id = json.loads(self.rfile.read(length) or b'{}').get('source_note_id')
+        except ValueError:
+            note_id = None
+        self._respond(self.path.partition('?')[0], note_id)
+
+    def _respond(self, path, note_id):
+        replay = self.server.replay
+        if replay.latency:
+            time.sleep(replay.latency)
+        if replay.inject_error():
+            self._send(503, b'{"code": -1, "msg": "replay error"}', 'application/json')
+            return
+
+        if path.startswith('/explore/'):
+            body = replay.fixture('pages', path[len('/explore/'):], '.html')
+            content_type = 'text/html; charset=utf-8'
+        elif path == FEED_PATH:
+            body = replay.fixture('feed', note_id, '.json') if note_id else None
+            content_type = 'application/json'
+        elif path.startswith('/media/'):
+            self._send_media(replay.media_path(unquote(path[len('/media/'):])))
+            return
+        else:
+            body = None
+        if body is None:
+            self._send(404, b'not found', 'text/plain')
+        else:
+            self._send(200, body, content_type)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self._write(body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE))
+
+    def _send_media(self, media_path):
+        """File media, hỗ trợ Range/If-Range như CDN"""
+        if media_path is None:
+            self._send(404, b'not found', 'text/plain')
+            return
+        stat = media_path.stat()
+        size = stat.st_size
+        etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+        start, end, status = 0, size - 1, 200
+        match = RANGE.match(self.headers.get('Range', ''))
+        if match and self.headers.get('If-Range') in (None, etag) and int(match.group(1)) < size:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            status = 206
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+
+        def chunks():
+            remaining = end - start + 1
+            with open(media_path, 'rb') as f:
+                f.seek(start)
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+        self._write(chunks(), media=True)
+
+    def _write(self, chunks, media=False):
+        """Gửi body, giới hạn băng thông theo từng response"""
+        replay = self.server.replay
+        started = time.perf_counter()
+        sent = 0
+        try:
+            for chunk in chunks:
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if replay.bandwidth:
+                    delay = started + sent / replay.bandwidth - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client đóng kết nối sớm (request thăm dò một byte, tải bị huỷ)
+            self.close_connection = True
+        finally:
+            replay.count(sent, media)
+
+    def log_message(self, *args):
+        pass
+
+
+class ReplayServer:
+    """Server phát lại fixture Xiaohongshu trên 127.0.0.1"""
+
+    def __init__(self, fixture_dir, latency=0.0, bandwidth=None, error_rate=0.0, seed=None,
+                 host='127.0.0.1', port=0):
+        """
+        Khởi tạo ReplayServer
+
+        Args:
+            fixture_dir: Thư mục fixture (pages/, feed/, media/)
+            latency: Độ trễ trước mỗi response (giây)
+            bandwidth: Băng thông tối đa của mỗi response (byte/giây, None = không giới hạn)
+            error_rate: Tỉ lệ request bị trả 503 (0-1)
+            seed: Seed cho lỗi giả lập (để lặp lại được)
+        """
+        self.fixture_dir = Path(fixture_dir)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.stats = {'requests': 0, 'errors': 0, 'bytes': 0, 'media_bytes': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fixtures = {}
+        self._httpd = ThreadingHTTPServer((host, port), ReplayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.replay = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def note_ids(self):
+        """ID các note có trang hoặc response feed trong fixture"""
+        return sorted({path.stem for folder in ('pages', 'feed') for path in (self.fixture_dir / folder).glob('*.*')})
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='xhs_replay', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def inject_error(self):
+        with self._lock:
+            self.stats['requests'] += 1
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.stats['errors'] += 1
+            return failed
+
+    def count(self, sent, media):
+        with self._lock:
+            self.stats['bytes'] += sent
+            if media:
+                self.stats['media_bytes'] += sent
+
+    def fixture(self, folder, note_id, suffix):
+        """Nội dung trang/feed đã đổi URL media sang server (đọc một lần rồi giữ trong bộ nhớ)"""
+        if not re.fullmatch(r'[A-Za-z0-9_-]+', note_id or ''):
+            return None
+        key = (folder, note_id)
+        with self._lock:
+            if key in self._fixtures:
+                return self._fixtures[key]
+        path = self.fixture_dir / folder / f'{note_id}{suffix}'
+        try:
+            text = path.read_text(encoding='utf-8')
+        except OSError:
+            return None
+        body = MEDIA_URL.sub(lambda match: f'{self.url}/media/{match.group(1)}/', text).encode('utf-8')
+        with self._lock:
+            self._fixtures[key] = body
+        return body
+
+    def media_path(self, relative):
+        """File media trong fixture, None nếu không có hoặc nằm ngoài thư mục media"""
+        media_dir = (self.fixture_dir / 'media').resolve()
+        path = (media_dir / relative).resolve()
+        if media_dir not in path.parents or not path.is_file():
+            return None
+        return path
+
+
+def synthesize_fixtures(fixture_dir, notes=20, video_size=2 * 1024 * 1024, images=3,
+                        image_size=200 * 1024, filler_notes=50, seed=0):
+    """
+    Tạo fixture giả lập có cấu trúc như trang thật: note chẵn là video, note lẻ là ảnh
+    (mỗi ảnh có bản jpg, bản webp nhỏ hơn và bản xem trước), state có undefined và URL dạng \\u002F
+
+    Returns:
+        list: ID các note đã tạo
+    """
+    rng = random.Random(seed)
+    fixture_dir = Path(fixture_dir)
+    for folder in ('pages', 'feed', 'media'):
+        (fixture_dir / folder).mkdir(parents=True, exist_ok=True)
+
+    def media(host, name, header, size):
+        path = fixture_dir / 'media' / host / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(header + rng.randbytes(max(0, size - len(header))))
+        return f'https://{host}/{name}'
+
+    note_ids = []
+    for index in range(notes):
+        note_id = f'{rng.getrandbits(96):024x}'
+        note = {
+            'noteId': note_id,
+            'type': 'video' if index % 2 == 0 else 'normal',
+            'title': f'Note giả lập {index} {{ngoặc}} "nháy"',
+            'desc': 'undefined } trong chuỗi',
+            'user': {'nickname': f'tác giả {index % 5}'},
+            'imageList': [],
+        }
+        if index % 2 == 0:
+            url = media('sns-video-bd.xhscdn.com', f'stream/{note_id}.mp4', b'\x00\x00\x00\x18ftypmp42', video_size)
+            note['video'] = {'media': {'stream': {'h264': [{'master_url': url}]}}}
+        else:
+            note['image_list'] = []
+            for number in range(images):
+                key = f'1040g{note_id[:10]}{number:02d}'
+                note['image_list'].append({
+                    'url_default': media('sns-webpic-qc.xhscdn.com', f'{key}!nd_dft_wgth_jpg_3',
+                                         b'\xff\xd8\xff\xe0', image_size),
+                    'url_pre': media('sns-webpic-qc.xhscdn.com', f'{key}!nd_prv_wgth_jpg_3',
+                                     b'\xff\xd8\xff\xe0', image_size // 8),
+                    'info_list': [
+                        {'image_scene': 'WB_PRV', 'url': f'https://sns-webpic-qc.xhscdn.com/{key}!nd_prv_wgth_jpg_3'},
+                        {'image_scene': 'WB_DFT', 'url': media('sns-webpic-qc.xhscdn.com', f'{key}!nd_dft_wlteh_webp_3',
+                                                               b'RIFF\x00\x00\x00\x00WEBPVP8 ', image_size * 2 // 3)},
+                    ],
+                })
+
+        filler = {
+            f'{rng.getrandbits(96):024x}': {'note': {'title': f'note khác {i}', 'desc': '{x} "y" }', 'type': 'normal'}}
+            for i in range(filler_notes)
+        }
+        filler[note_id] = {'note': note, 'comments': [], 'currentTime': '__js_undef__'}
+        state = json.dumps({'global': {'flag': '__js_undef__'}, 'note': {'noteDetailMap': filler}}, ensure_ascii=False)
+        state = state.replace('/', '\\u002F').replace('"__js_undef__"', 'undefined')
+        page = (
+            '<html><head><script>window.__SSR__ = true;</script></head><body><div id="app"></div>'
+            f'<script>window.__INITIAL_STATE__={state}</script>'
+            '<script>render({a: 1}); if (a) { b(); }</script></body></html>'
+        )
+        (fixture_dir / 'pages' / f'{note_id}.html').write_text(page, encoding='utf-8')
+        feed = {'code': 0, 'success': True, 'data': {'items': [{'id': note_id, 'model_type': 'note', 'note_card': note}]}}
+        (fixture_dir / 'feed' / f'{note_id}.json').write_text(json.dumps(feed, ensure_ascii=False), encoding='utf-8')
+        note_ids.append(note_id)
+    return note_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server phát lại fixture Xiaohongshu")
+    parser.add_argument('fixture_dir', help="Thư mục fixture (pages/, feed/, media/)")
+    parser.add_argument('--synthesize', type=int, metavar='N', help="Tạo N note giả lập vào thư mục fixture trước khi chạy")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Độ trễ mỗi response (giây)")
+    parser.add_argument('--bandwidth', type=float, help="Băng thông mỗi response (MB/s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Tỉ lệ request trả 503 (0-1)")
+    parser.add_argument('--seed', type=int, help="Seed cho lỗi giả lập")
+    args = parser.parse_args()
+
+    if args.synthesize:
+        synthesize_fixtures(args.fixture_dir, notes=args.synthesize)
+    bandwidth = args.bandwidth * 1024 * 1024 if args.bandwidth else None
+    server = ReplayServer(args.fixture_dir, args.latency, bandwidth, args.error_rate, args.seed, port=args.port)
+    print(f"🎞️ Phát lại {len(server.note_ids())} note tại {server.url}")
+    print(f"   Đặt Config.XIAOHONGSHU_WEB_BASE = Config.XIAOHONGSHU_EDITH_BASE = \"{server.url}\"")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Xiaohongshu Short Link Module
+Đổi link rút gọn xhslink.com thành note ID: đi theo các chuyển hướng bằng request không tải body,
+dừng ngay khi tới URL có note ID, xử lý song song cả lô và cache vĩnh viễn mã rút gọn -> note ID
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from pathlib import Path
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# http://xhslink.com/a/AbCd123 hoặc http://xhslink.com/AbCd123
+SHORT_LINK = re.compile(r'xhslink\.com/(?:[a-z]/)?([A-Za-z0-9]+)')
+
+# URL đích chứa note ID
+NOTE_URL_PATTERNS = [
+    re.compile(r'xiaohongshu\.com/explore/([a-f0-9]+)'),
+    re.compile(r'xiaohongshu\.com/discovery/item/([a-f0-9]+)'),
+]
+
+MAX_REDIRECTS = 5
+
+
+def note_id_from_url(url):
+    """Note ID trong URL trang note, None nếu không có"""
+    for pattern in NOTE_URL_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+class ShortLinkResolver:
+    """Đổi link xhslink.com thành note ID, có cache trên đĩa"""
+
+    def __init__(self, session, host_limiter, cache_path=None):
+        """
+        Khởi tạo ShortLinkResolver
+
+        Args:
+            session: requests.Session dùng chung
+            host_limiter: HostLimiter giới hạn request đồng thời theo host
+            cache_path: File cache (mặc định Config.XIAOHONGSHU_SHORT_LINK_CACHE)
+        """
+        self.session = session
+        self.host_limiter = host_limiter
+        self.cache_path = Path(cache_path or config.XIAOHONGSHU_SHORT_LINK_CACHE)
+        self._lock = threading.Lock()
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def is_short_link(self, url):
+        return SHORT_LINK.search(url) is not None
+
+    def resolve(self, url):
+        """
+        Note ID của một link rút gọn
+
+        Returns:
+            str: Note ID hoặc None nếu không chuyển hướng tới trang note
+        """
+        match = SHORT_LINK.search(url)
+        if not match:
+            return None
+        code = match.group(1)
+        with self._lock:
+            if code in self.cache:
+                return self.cache[code]
+
+        note_id = self._follow(url)
+        if note_id:
+            with self._lock:
+                self.cache[code] = note_id
+                self._save()
+            logger.info(f"Link rút gọn {code} -> note {note_id}")
+        else:
+            logger.warning(f"Không tìm được note từ link rút gọn: {url}")
+        return note_id
+
+    def resolve_many(self, urls, max_workers=None):
+        """
+        Đổi song song các link rút gọn trong một lô (các link khác bỏ qua)
+
+        Returns:
+            dict: {url: note ID hoặc None}
+        """
+        short_links = list(dict.fromkeys(url for url in urls if self.is_short_link(url)))
+        if not short_links:
+            return {}
+        workers = min(max_workers or config.XIAOHONGSHU_MAX_WORKERS, len(short_links))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='xhs_link') as pool:
+            return dict(zip(short_links, pool.map(self.resolve, short_links)))
+
+    def _follow(self, url):
+        """Đi theo chuyển hướng (không đọc body) tới khi gặp URL có note ID"""
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        for _ in range(MAX_REDIRECTS):
+            note_id = note_id_from_url(url)
+            if note_id:
+                return note_id
+            try:
+                with self.host_limiter.slot(url):
+                    response = self.session.get(url, allow_redirects=False, stream=True,
+                                                timeout=config.XIAOHONGSHU_TIMEOUT)
+                    response.close()
+            except Exception as e:
+                logger.warning(f"Lỗi khi mở link rút gọn {url}: {e}")
+                return None
+            location = response.headers.get('Location')
+            if not location:
+                return None
+            url = urljoin(url, location)
+        return note_id_from_url(url)
+
+    def _save(self):
+        """Ghi cache ra đĩa (gọi khi đang giữ lock)"""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.cache, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Không ghi được cache link rút gọn: {e}")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Xiaohongshu State Module
+Tách object state (window.__INITIAL_STATE__ ...) từ HTML trang explore trong một lượt quét:
+tìm phép gán, đổi `undefined` của JS thành null (bỏ qua nội dung chuỗi, xử lý ký tự escape),
+khớp ngoặc và parse JSON một lần rồi đi thẳng tới noteDetailMap[note_id]
+"""
+
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Các biến state theo thứ tự ưu tiên
+STATE_MARKERS = ('window.__INITIAL_STATE__', 'window.__INITIAL_SSR_STATE__', 'window.__NUXT__')
+
+# Chuỗi JSON dạng "unrolled loop": không có nhánh lựa chọn lồng nhau nên không backtracking
+STRING_LITERAL = re.compile(r'("[^"\\]*(?:\\[\s\S][^"\\]*)*")')
+
+UNDEFINED = re.compile(r'\bundefined\b')
+
+# Phép gán object (không phải so sánh ==): con trỏ dừng ngay trước '{'
+ASSIGNMENT = re.compile(r'\s*=(?!=)\s*(?=\{)')
+
+JSON_DECODER = json.JSONDecoder()
+
+# URL video nằm trực tiếp trong HTML, theo thứ tự ưu tiên
+VIDEO_URL_PATTERNS = [
+    re.compile(r'"videoUrl":\s*"([^"]+)"'),
+    re.compile(r'"url":\s*"([^"]*\.mp4[^"]*?)"'),
+    re.compile(r'src="([^"]*\.mp4[^"]*?)"'),
+]
+
+
+def extract_object(html, marker):
+    """
+    Parse object JS được gán cho marker
+
+    Thời gian tuyến tính theo độ dài HTML: một lượt regex tách các chuỗi để đổi
+    `undefined` (chỉ ở ngoài chuỗi) thành null, rồi raw_decode vừa khớp ngoặc vừa
+    parse object trong một lượt, bỏ qua phần script phía sau.
+
+    Args:
+        html: Nội dung trang
+        marker: Tên biến, ví dụ "window.__INITIAL_STATE__"
+
+    Returns:
+        dict: Object đã parse hoặc None
+    """
+    # Marker có thể xuất hiện trước phép gán (if(window.__INITIAL_STATE__), ... || {}):
+    # lấy lần đầu tiên marker được gán một object
+    position = html.find(marker)
+    while position >= 0:
+        assignment = ASSIGNMENT.match(html, position + len(marker))
+        if assignment:
+            break
+        position = html.find(marker, position + len(marker))
+    else:
+        return None
+    start = assignment.end()
+    # JSON trong thẻ script không thể chứa "</script>" nên object kết thúc trước thẻ đóng
+    end = html.find('</script>', start)
+    source = html[start:end if end >= 0 else len(html)]
+
+    if 'undefined' in source:
+        # Phần tử chẵn nằm ngoài chuỗi, phần tử lẻ là chuỗi nguyên vẹn (kể cả escape)
+        pieces = STRING_LITERAL.split(source)
+        for i in range(0, len(pieces), 2):
+            if 'undefined' in pieces[i]:
+                pieces[i] = UNDEFINED.sub('null', pieces[i])
+        source = ''.join(pieces)
+    try:
+        state, _ = JSON_DECODER.raw_decode(source)
+    except ValueError as e:
+        logger.warning(f"Lỗi parse JSON {marker}: {e}")
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def parse_state(html):
+    """
+    Parse object state đầu tiên tìm thấy trong trang
+
+    Returns:
+        dict: State đã parse hoặc None
+    """
+    for marker in STATE_MARKERS:
+        state = extract_object(html, marker)
+        if state is not None:
+            return state
+    return None
+
+
+def find_note(state, note_id):
+    """
+    Dữ liệu note trong state (note_card với title, user, video, image_list...)
+
+    Args:
+        state: State đã parse
+        note_id: ID của note
+
+    Returns:
+        dict: Dữ liệu note hoặc None
+    """
+    note_detail_map = (state.get('note') or {}).get('noteDetailMap') or {}
+    entry = note_detail_map.get(note_id)
+    if isinstance(entry, dict):
+        # Trang explore bọc note trong {"note": {...}, "comments": ...}
+        note = entry.get('note')
+        return note if isinstance(note, dict) and note else entry
+
+    data = state.get('data')
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, dict) and note_id in (value.get('noteId'), value.get('note_id'), value.get('id')):
+                return value
+    return None
+
+
+def find_video_url(html):
+    """URL video .mp4 đầu tiên xuất hiện trực tiếp trong HTML (dùng khi trang không có state)"""
+    for pattern in VIDEO_URL_PATTERNS:
+        match = pattern.search(html)
+        if match and 'mp4' in match.group(1):
+            return match.group(1)
+    return None
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Xiaohongshu Transfer Module
+Tải file media: kiểm tra server có hỗ trợ HTTP Range không, file lớn được chia thành
+nhiều phần tải song song vào file đã cấp phát sẵn (ghi đúng offset, buffer lớn),
+không hỗ trợ Range thì tải một luồng.
+
+Dữ liệu được ghi vào file .part kèm sidecar .part.json (kích thước, ETag, tiến độ từng phần);
+lần thử sau tải tiếp bằng Range, file chỉ được đổi tên thành file đích khi đủ số byte.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# "bytes 0-0/12345" -> tổng kích thước
+CONTENT_RANGE_TOTAL = re.compile(r'bytes\s+\d+-\d+/(\d+)')
+
+# Media tải nguyên bản (không nén) để số byte nhận được so được với Content-Length
+IDENTITY = {'Accept-Encoding': 'identity'}
+
+
+class TransferError(Exception):
+    """Tải file không trọn vẹn (thiếu byte, server trả sai phần, file trên server đã đổi)"""
+
+
+class RangeDownloader:
+    """Tải một URL vào file, chia phần theo HTTP Range và tải tiếp được khi bị ngắt"""
+
+    def __init__(self, session, host_limiter, parts=None, min_parallel_size=None, buffer_size=None):
+        """
+        Khởi tạo RangeDownloader
+
+        Args:
+            session: requests.Session dùng chung
+            host_limiter: HostLimiter giới hạn request đồng thời theo host
+            parts: Số phần tối đa (mặc định Config.XIAOHONGSHU_DOWNLOAD_PARTS)
+            min_parallel_size: File nhỏ hơn mức này tải một luồng (mặc định Config.XIAOHONGSHU_PARALLEL_MIN_SIZE)
+            buffer_size: Kích thước mỗi lần đọc/ghi (mặc định Config.XIAOHONGSHU_DOWNLOAD_BUFFER)
+        """
+        self.session = session
+        self.host_limiter = host_limiter
+        self.parts = parts or config.XIAOHONGSHU_DOWNLOAD_PARTS
+        self.min_parallel_size = min_parallel_size or config.XIAOHONGSHU_PARALLEL_MIN_SIZE
+        self.buffer_size = buffer_size or config.XIAOHONGSHU_DOWNLOAD_BUFFER
+
+    def probe(self, url):
+        """
+        Hỏi kích thước file, khả năng Range và ETag bằng request một byte
+        (CDN có chữ ký thường không nhận HEAD)
+
+        Returns:
+            (tổng kích thước hoặc None, có hỗ trợ Range không, ETag hoặc None)
+        """
+        with self.host_limiter.slot(url):
+            response = self.session.get(url, headers={**IDENTITY, 'Range': 'bytes=0-0'}, stream=True,
+                                        timeout=config.XIAOHONGSHU_TIMEOUT)
+            response.close()
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        if response.status_code == 206:
+            match = CONTENT_RANGE_TOTAL.match(response.headers.get('Content-Range', ''))
+            if match:
+                return int(match.group(1)), True, etag
+        length = response.headers.get('Content-Length')
+        return (int(length) if length and length.isdigit() else None), False, etag
+
+    def download(self, url, filepath, probe=None):
+        """
+        Tải URL vào filepath qua file .part, tải tiếp phần còn thiếu nếu đã có
+
+        Args:
+            url: URL media
+            filepath: File đích
+            probe: Kết quả probe(url) đã có (kích thước, Range, ETag), để khỏi hỏi lại server
+
+        Returns:
+            dict: {'bytes', 'resumed', 'seconds', 'parts', 'speed', 'skipped'}
+            (bytes là số byte tải trong lần này, speed tính bằng byte/giây)
+        """
+        filepath = str(filepath)
+        started = time.perf_counter()
+        total, ranged, etag = probe or self.probe(url)
+        if total is not None and os.path.exists(filepath) and os.path.getsize(filepath) == total:
+            return {'bytes': 0, 'resumed': 0, 'seconds': 0.0, 'parts': 0, 'speed': 0.0, 'skipped': True}
+
+        part_path = filepath + '.part'
+        if ranged:
+            state = self._resume_state(part_path, total, etag)
+            resumed = sum(written for _, _, written in state['parts'])
+            if resumed:
+                logger.info(f"Tải tiếp {filepath} từ {resumed}/{total} byte")
+            self._download_parts(url, part_path, state)
+            received = sum(written for _, _, written in state['parts'])
+            parts = len(state['parts'])
+        else:
+            resumed = 0
+            received = self._download_stream(url, part_path)
+            parts = 1
+        if total is not None and received != total:
+            raise TransferError(f"Nhận {received}/{total} byte")
+
+        os.replace(part_path, filepath)
+        self._remove_sidecar(part_path)
+        seconds = max(time.perf_counter() - started, 1e-6)
+        transferred = received - resumed
+        return {'bytes': transferred, 'resumed': resumed, 'seconds': seconds, 'parts': parts,
+                'speed': transferred / seconds, 'skipped': False}
+
+    def _resume_state(self, part_path, total, etag):
+        """Tiến độ đã lưu nếu còn khớp với file trên server, không thì tạo mới và cấp phát file .part"""
+        try:
+            with open(part_path + '.json', 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if (state['total'] == total and state['etag'] == etag
+                    and os.path.getsize(part_path) == total):
+                return state
+        except (OSError, ValueError, KeyError):
+            pass
+
+        count = 1
+        if total >= self.min_parallel_size and self.parts > 1:
+            # Mỗi phần ít nhất nửa ngưỡng tải song song, để file vừa đủ lớn không bị chia quá vụn
+            count = min(self.parts, max(1, total // (self.min_parallel_size // 2 or 1)))
+        part_size = max(1, -(-total // count))
+        state = {
+            'total': total,
+            'etag': etag,
+            'parts': [[start, min(start + part_size, total) - 1, 0] for start in range(0, total, part_size)],
+        }
+        with open(part_path, 'wb') as f:
+            f.truncate(total)
+        self._save_state(part_path, state)
+        return state
+
+    def _save_state(self, part_path, state):
+        temp_path = part_path + '.json.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, part_path + '.json')
+
+    def _remove_sidecar(self, part_path):
+        try:
+            os.remove(part_path + '.json')
+        except OSError:
+            pass
+
+    def _download_stream(self, url, part_path):
+        """Tải một luồng với buffer lớn (server không hỗ trợ Range nên luôn tải lại từ đầu)"""
+        written = 0
+        with self.host_limiter.slot(url):
+            with self.session.get(url, headers=IDENTITY, stream=True, timeout=config.XIAOHONGSHU_TIMEOUT) as response:
+                response.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.buffer_size):
+                        f.write(chunk)
+                        written += len(chunk)
+        return written
+
+    def _download_parts(self, url, part_path, state):
+        """Tải song song các phần còn thiếu vào file .part đã cấp phát sẵn"""
+        lock = threading.Lock()
+        pending = [part for part in state['parts'] if part[0] + part[2] <= part[1]]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix='xhs_part') as pool:
+            # list() để lỗi của bất kỳ phần nào được ném ra
+            list(pool.map(lambda part: self._download_range(url, part_path, part, state, lock), pending))
+
+    def _download_range(self, url, part_path, part, state, lock):
+        """Tải phần [start, end] từ byte đã có, ghi vào đúng offset và lưu tiến độ sau mỗi buffer"""
+        start, end, written = part
+        expected = end - start + 1
+        headers = {**IDENTITY, 'Range': f'bytes={start + written}-{end}'}
+        if state['etag']:
+            # File trên server đã đổi thì server trả 200 cả file thay vì để nối nhầm dữ liệu
+            headers['If-Range'] = state['etag']
+        with self.host_limiter.slot(url):
+            with self.session.get(url, headers=headers, stream=True,
+                                  timeout=config.XIAOHONGSHU_TIMEOUT) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    self._remove_sidecar(part_path)
+                    raise TransferError(f"Server không trả phần {start + written}-{end} (status {response.status_code})")
+                with open(part_path, 'r+b') as f:
+                    f.seek(start + written)
+                    for chunk in response.iter_content(chunk_size=self.buffer_size):
+                        chunk = chunk[:expected - written]
+                        f.write(chunk)
+                        written += len(chunk)
+                        # Ghi dữ liệu trước rồi mới ghi tiến độ, để sidecar không vượt quá dữ liệu thật
+                        f.flush()
+                        with lock:
+                            part[2] = written
+                            self._save_state(part_path, state)
+                        if written >= expected:
+                            break
+        if written != expected:
+            raise TransferError(f"Phần {start}-{end}: nhận {written}/{expected} byte")
@@ -1,11 +1,115 @@
 import os
 import re
 import json
+import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+from config import config
+import xhs_state
+from xhs_note_cache import NoteCache
+from xhs_transfer import RangeDownloader
+from xhs_short_links import ShortLinkResolver, note_id_from_url
+import xhs_image_store
+from xhs_image_store import ImageStore, SAVINGS_KEYS
+
+
+class HostLimiter:
+    """
+    Giới hạn số request đồng thời tới từng host
+    Host trang/API của Xiaohongshu có giới hạn riêng (thấp) để tránh bị chặn,
+    host CDN tải media có giới hạn riêng (cao hơn)
+    """
+    
+    PAGE_DOMAINS = ('xiaohongshu.com', 'xhslink.com', 'rednote.com')
+    
+    def __init__(self, page_limit: int = None, cdn_limit: int = None):
+        self.page_limit = page_limit or config.XIAOHONGSHU_PAGE_HOST_LIMIT
+        self.cdn_limit = cdn_limit or config.XIAOHONGSHU_CDN_HOST_LIMIT
+        self._semaphores = {}
+        self._lock = threading.Lock()
+    
+    def kind(self, url: str) -> str:
+        """Loại host của URL: 'page' (trang/API) hoặc 'cdn' (media)"""
+        host = urlparse(url).netloc.lower().split(':')[0]
+        if any(host == domain or host.endswith('.' + domain) for domain in self.PAGE_DOMAINS):
+            return 'page'
+        return 'cdn'
+    
+    @contextmanager
+    def slot(self, url: str):
+        """Chiếm một chỗ của host trong suốt request (kể cả khi đọc body dạng stream)"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                limit = self.page_limit if self.kind(url) == 'page' else self.cdn_limit
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(limit)
+        with semaphore:
+            yield
+
+# Chi phí cố định mỗi lần thử (giây), để cách lỗi nhanh không được xếp trên cách thành công
+STRATEGY_ATTEMPT_COST = 0.5
+
+
+class StrategyStats:
+    """
+    Thống kê trượt (EWMA) tỉ lệ thành công và độ trễ của từng cách lấy note,
+    lưu ra file để lần chạy sau dùng lại
+    """
+    
+    def __init__(self, path: str = None, alpha: float = None):
+        self.path = Path(path or config.XIAOHONGSHU_STATS_FILE)
+        self.alpha = alpha or config.XIAOHONGSHU_STATS_ALPHA
+        self._lock = threading.Lock()
+        self.stats = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        except (OSError, ValueError):
+            pass
+    
+    def record(self, name: str, success: bool, latency: float):
+        """Cập nhật thống kê sau một lần thử rồi ghi ra file"""
+        with self._lock:
+            entry = self.stats.get(name)
+            if entry is None:
+                entry = self.stats[name] = {'success': float(success), 'latency': latency, 'count': 0}
+            else:
+                entry['success'] += self.alpha * (float(success) - entry['success'])
+                entry['latency'] += self.alpha * (latency - entry['latency'])
+            entry['count'] += 1
+            snapshot = json.dumps(self.stats, indent=2)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f"{self.path.name}.{threading.get_ident()}.tmp")
+            temp_path.write_text(snapshot, encoding='utf-8')
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Không ghi được thống kê endpoint: {e}")
+    
+    def order(self, names: List[str]) -> List[str]:
+        """
+        Sắp xếp các cách lấy theo thời gian kỳ vọng tới khi thành công ((độ trễ + chi phí mỗi lần thử) / tỉ lệ thành công)
+        Cách chưa có thống kê được thử trước theo thứ tự mặc định
+        """
+        def expected_cost(item):
+            index, name = item
+            entry = self.stats.get(name)
+            if entry is None:
+                return (0.0, index)
+            return ((entry['latency'] + STRATEGY_ATTEMPT_COST) / max(entry['success'], 0.05), index)
+        
+        with self._lock:
+            return [name for _, name in sorted(enumerate(names), key=expected_cost)]
+
 
 class XiaohongshuDownloader:
     """
@@ -13,7 +117,15 @@ class XiaohongshuDownloader:
     Sử dụng requests để lấy dữ liệu và tải xuống nội dung
     """
     
-    def __init__(self, output_dir: str = "downloads"):
+    # Các cách lấy thông tin note, theo thứ tự mặc định
+    NOTE_STRATEGIES = ['web', 'feed', 'edith']
+    
+    def __init__(self, output_dir: str = "downloads", stats_path: str = None):
+        """
+        Args:
+            output_dir: Thư mục lưu file tải về
+            stats_path: File thống kê các cách lấy note (mặc định Config.XIAOHONGSHU_STATS_FILE)
+        """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
@@ -40,25 +152,52 @@ class XiaohongshuDownloader:
         self.session = requests.Session()
         self.session.headers.update(self.headers)
         
+        # Đủ kết nối cho các worker tải song song
+        pool_size = config.XIAOHONGSHU_MAX_WORKERS * max(config.XIAOHONGSHU_PAGE_HOST_LIMIT, config.XIAOHONGSHU_CDN_HOST_LIMIT)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.host_limiter = HostLimiter()
+        self.transfer = RangeDownloader(self.session, self.host_limiter)
+        self.link_resolver = ShortLinkResolver(self.session, self.host_limiter)
+        self.strategy_stats = StrategyStats(stats_path)
+        self.note_cache = NoteCache()
+        self.image_store = ImageStore(config.XIAOHONGSHU_IMAGE_STORE_DIR or self.output_dir / '.image_store')
+        self.last_batch_savings = dict.fromkeys(SAVINGS_KEYS, 0)
+        self._hedge_pool = ThreadPoolExecutor(max_workers=config.XIAOHONGSHU_MAX_WORKERS * 2,
+                                              thread_name_prefix='xhs_hedge')
+        
         # Thiết lập logging
         self.logger = logging.getLogger(__name__)
     
+    def close(self):
+        """Dừng pool request dự phòng và đóng các kết nối HTTP"""
+        self._hedge_pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Request trang/API qua giới hạn host, có timeout"""
+        kwargs.setdefault('timeout', config.XIAOHONGSHU_TIMEOUT)
+        with self.host_limiter.slot(url):
+            return self.session.request(method, url, **kwargs)
+    
     def extract_note_id(self, url: str) -> Optional[str]:
         """
         Trích xuất note ID từ URL Xiaohongshu
+        Link rút gọn xhslink.com được đổi sang note ID thật qua chuyển hướng (có cache)
         """
         try:
-            # Pattern cho URL Xiaohongshu
-            patterns = [
-                r'xiaohongshu\.com/explore/([a-f0-9]+)',
-                r'xiaohongshu\.com/discovery/item/([a-f0-9]+)',
-                r'xhslink\.com/([a-zA-Z0-9]+)',
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, url)
-                if match:
-                    return match.group(1)
+            note_id = note_id_from_url(url)
+            if note_id:
+                return note_id
+            if self.link_resolver.is_short_link(url):
+                return self.link_resolver.resolve(url)
             
             self.logger.warning(f"Không thể trích xuất note ID từ URL: {url}")
             return None
@@ -68,154 +207,44 @@ class XiaohongshuDownloader:
             return None
     
     def get_note_info(self, note_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Lấy thông tin note, ưu tiên cache trên đĩa
+        
+        Note còn hạn cả metadata và URL media được trả ngay; URL media hết hạn thì lấy lại
+        note và chỉ thay phần media trong cache (lỗi mạng thì dùng tạm bản đã cache).
+        """
+        cached = self.note_cache.get(note_id)
+        if cached and cached['media_fresh']:
+            self.logger.info(f"Dùng thông tin note đã cache: {note_id}")
+            return cached['note']
+        
+        note_data = self._fetch_note_info(note_id)
+        if note_data:
+            return self.note_cache.put(note_id, note_data, refresh_media_only=cached is not None)
+        if cached:
+            self.logger.warning(f"Không làm mới được URL media, dùng bản cache cũ: {note_id}")
+            return cached['note']
+        return None
+    
+    def _fetch_note_info(self, note_id: str) -> Optional[Dict[str, Any]]:
         """
         Lấy thông tin chi tiết của note từ Xiaohongshu API
+        
+        Các cách lấy (web scrape, GET feed, POST edith feed) được thử theo thống kê
+        thành công/độ trễ gần đây; nếu bật hedge thì cách tiếp theo được gửi song song
+        khi cách đang chạy quá ngưỡng trễ, kết quả hợp lệ đầu tiên được dùng.
         """
         try:
-            # Thử nhiều API endpoint khác nhau
-            endpoints = [
-                # Endpoint web scraping (ưu tiên cao nhất)
-                {
-                    'url': f'https://www.xiaohongshu.com/explore/{note_id}',
-                    'method': 'WEB_SCRAPE'
-                },
-                # Endpoint cũ (fallback)
-                {
-                    'url': 'https://www.xiaohongshu.com/api/sns/web/v1/feed',
-                    'params': {
-                        'source_note_id': note_id,
-                        'image_formats': 'jpg,webp,avif',
-                        'extra': json.dumps({'need_body_topic': '1'})
-                    },
-                    'method': 'GET'
-                },
-                # Endpoint mới từ thư viện xhs
-                {
-                    'url': 'https://edith.xiaohongshu.com/api/sns/web/v1/feed',
-                    'data': {
-                        'source_note_id': note_id,
-                        'image_formats': ['jpg', 'webp', 'avif'],
-                        'extra': {'need_body_topic': '1'}
-                    },
-                    'method': 'POST'
-                }
-            ]
-            
-            for endpoint in endpoints:
-                try:
-                    if endpoint['method'] == 'POST':
-                        response = self.session.post(
-                            endpoint['url'], 
-                            json=endpoint['data'],
-                            headers={
-                                **self.headers,
-                                'Content-Type': 'application/json'
-                            }
-                        )
-                    elif endpoint['method'] == 'WEB_SCRAPE':
-                        # Thử web scraping nếu API thất bại
-                        response = self.session.get(
-                            endpoint['url'],
-                            headers={
-                                **self.headers,
-                                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                            }
-                        )
-                        if response.status_code == 200:
-                            # Tìm kiếm dữ liệu JSON trong HTML
-                            html_content = response.text
-                            import re
-                            
-                            # Thử nhiều pattern khác nhau
-                            patterns = [
-                                r'window\.__INITIAL_STATE__\s*=\s*(\{.*?\});',
-                                r'window\.__INITIAL_SSR_STATE__\s*=\s*(\{.*?\});',
-                                r'window\.__NUXT__\s*=\s*(\{.*?\});',
-                                r'"noteDetailMap":\s*(\{[^}]*"' + re.escape(note_id) + r'"[^}]*\})',
-                                r'"video":\s*(\{[^}]*"url"[^}]*\})',
-                                r'"imageList":\s*(\[[^\]]*\])'
-                            ]
-                            
-                            for pattern in patterns:
-                                match = re.search(pattern, html_content, re.DOTALL)
-                                if match:
-                                    try:
-                                        if 'noteDetailMap' in pattern:
-                                            # Tìm note data trực tiếp
-                                            note_match = re.search(r'"' + re.escape(note_id) + r'":\s*(\{.*?\}(?=,"[a-f0-9]{24}"|\}))', html_content, re.DOTALL)
-                                            if note_match:
-                                                note_data = json.loads(note_match.group(1))
-                                                self.logger.info(f"Thành công lấy thông tin note từ web scraping (direct): {endpoint['url']}")
-                                                return note_data
-                                        else:
-                                            initial_state = json.loads(match.group(1))
-                                            # Tìm note data trong initial state
-                                            if 'note' in initial_state and 'noteDetailMap' in initial_state['note']:
-                                                note_detail_map = initial_state['note']['noteDetailMap']
-                                                if note_id in note_detail_map:
-                                                    note_data = note_detail_map[note_id]
-                                                    self.logger.info(f"Thành công lấy thông tin note từ web scraping: {endpoint['url']}")
-                                                    return note_data
-                                            # Thử tìm trong các cấu trúc khác
-                                            elif 'data' in initial_state:
-                                                data = initial_state['data']
-                                                if isinstance(data, dict):
-                                                    for key, value in data.items():
-                                                        if isinstance(value, dict) and note_id in str(value):
-                                                            self.logger.info(f"Tìm thấy note data trong {key}: {endpoint['url']}")
-                                                            return value
-                                    except (json.JSONDecodeError, KeyError) as e:
-                                        self.logger.warning(f"Lỗi parse JSON pattern {pattern}: {e}")
-                                        continue
-                            
-                            # Thử tìm video URL trực tiếp trong HTML
-                            video_patterns = [
-                                r'"videoUrl":\s*"([^"]+)"',
-                                r'"url":\s*"([^"]*\.mp4[^"]*?)"',
-                                r'src="([^"]*\.mp4[^"]*?)"'
-                            ]
-                            
-                            for video_pattern in video_patterns:
-                                video_match = re.search(video_pattern, html_content)
-                                if video_match:
-                                    video_url = video_match.group(1)
-                                    if video_url and 'mp4' in video_url:
-                                        # Tạo note data giả với video URL
-                                        fake_note_data = {
-                                            'type': 'video',
-                                            'title': f'Video {note_id}',
-                                            'video': {'url': video_url},
-                                            'imageList': []
-                                        }
-                                        self.logger.info(f"Tìm thấy video URL trực tiếp: {video_url}")
-                                        return fake_note_data
-                            
-                            self.logger.warning(f"Không tìm thấy dữ liệu note trong HTML: {endpoint['url']}")
-                        continue
-                    else:
-                        response = self.session.get(endpoint['url'], params=endpoint['params'])
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if 'data' in data and 'items' in data['data'] and len(data['data']['items']) > 0:
-                            self.logger.info(f"Thành công lấy thông tin note từ endpoint: {endpoint['url']}")
-                            return data['data']['items'][0]['note_card']
-                    elif response.status_code == 500:
-                        self.logger.warning(f"Xiaohongshu API trả về lỗi server (500). Link có thể đã bị xóa hoặc không công khai: {note_id}")
-                        continue
-                    elif response.status_code == 403:
-                        self.logger.warning(f"Không có quyền truy cập nội dung này (403). Link có thể bị hạn chế: {note_id}")
-                        continue
-                    elif response.status_code == 404:
-                        self.logger.warning(f"Không tìm thấy nội dung (404). Link có thể đã bị xóa: {note_id}")
-                        continue
-                    else:
-                        self.logger.warning(f"Endpoint {endpoint['url']} trả về status: {response.status_code}")
-                        continue
-                        
-                except Exception as endpoint_error:
-                    self.logger.warning(f"Lỗi với endpoint {endpoint['url']}: {endpoint_error}")
-                    continue
+            order = self.strategy_stats.order(self.NOTE_STRATEGIES)
+            if config.XIAOHONGSHU_HEDGE_DELAY is None:
+                for name in order:
+                    note_data = self._run_strategy(name, note_id)
+                    if note_data:
+                        return note_data
+            else:
+                note_data = self._get_note_info_hedged(note_id, order)
+                if note_data:
+                    return note_data
             
             self.logger.error(f"Tất cả endpoint đều thất bại cho note {note_id}")
             return None
@@ -224,6 +253,136 @@ class XiaohongshuDownloader:
             self.logger.error(f"Lỗi khi lấy thông tin note: {e}")
             return None
     
+    def _get_note_info_hedged(self, note_id: str, order: List[str]) -> Optional[Dict[str, Any]]:
+        """Chạy các cách lấy note, tối đa hai cách cùng lúc; cách sau được gửi khi cách trước chậm hoặc lỗi"""
+        pending = list(order)
+        running = {}
+        
+        def launch():
+            name = pending.pop(0)
+            running[self._hedge_pool.submit(self._run_strategy, name, note_id)] = name
+        
+        launch()
+        while running:
+            timeout = config.XIAOHONGSHU_HEDGE_DELAY if pending and len(running) < 2 else None
+            finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not finished:
+                self.logger.info(f"{running[next(iter(running))]} chậm hơn {timeout}s, gửi thêm request dự phòng")
+                launch()
+                continue
+            for future in finished:
+                running.pop(future)
+                note_data = future.result()
+                if note_data:
+                    # Request còn lại chạy nốt trong nền và vẫn được ghi vào thống kê
+                    return note_data
+            if pending and len(running) < 2:
+                launch()
+        return None
+    
+    def _run_strategy(self, name: str, note_id: str) -> Optional[Dict[str, Any]]:
+        """Chạy một cách lấy note và ghi thống kê thành công/độ trễ"""
+        fetch, url = {
+            'web': (self._fetch_note_web, f'{config.XIAOHONGSHU_WEB_BASE}/explore/{note_id}'),
+            'feed': (self._fetch_note_feed, f'{config.XIAOHONGSHU_WEB_BASE}/api/sns/web/v1/feed'),
+            'edith': (self._fetch_note_edith, f'{config.XIAOHONGSHU_EDITH_BASE}/api/sns/web/v1/feed'),
+        }[name]
+        started = time.perf_counter()
+        try:
+            note_data = fetch(note_id, url)
+        except Exception as endpoint_error:
+            self.logger.warning(f"Lỗi với endpoint {url}: {endpoint_error}")
+            note_data = None
+        self.strategy_stats.record(name, note_data is not None, time.perf_counter() - started)
+        return note_data
+    
+    def _fetch_note_web(self, note_id: str, url: str) -> Optional[Dict[str, Any]]:
+        """Lấy note bằng web scraping trang explore"""
+        response = self._request(
+            'GET',
+            url,
+            headers={
+                **self.headers,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+            }
+        )
+        if response.status_code != 200:
+            return self._log_feed_status(response, url, note_id)
+        
+        # Tìm kiếm dữ liệu JSON trong HTML (quét một lượt, parse một lần)
+        html_content = response.text
+        state = xhs_state.parse_state(html_content)
+        if state is not None:
+            note_data = xhs_state.find_note(state, note_id)
+            if note_data:
+                self.logger.info(f"Thành công lấy thông tin note từ web scraping: {url}")
+                return note_data
+        
+        # Chỉ tìm video URL trực tiếp khi trang không có state
+        # (state có mà thiếu note thì URL tìm được là của note khác)
+        video_url = xhs_state.find_video_url(html_content) if state is None else None
+        if video_url:
+            # Tạo note data giả với video URL
+            fake_note_data = {
+                'type': 'video',
+                'title': f'Video {note_id}',
+                'video': {'url': video_url},
+                'imageList': []
+            }
+            self.logger.info(f"Tìm thấy video URL trực tiếp: {video_url}")
+            return fake_note_data
+        
+        self.logger.warning(f"Không tìm thấy dữ liệu note trong HTML: {url}")
+        return None
+    
+    def _fetch_note_feed(self, note_id: str, url: str) -> Optional[Dict[str, Any]]:
+        """Lấy note từ endpoint feed cũ (GET)"""
+        response = self._request('GET', url, params={
+            'source_note_id': note_id,
+            'image_formats': 'jpg,webp,avif',
+            'extra': json.dumps({'need_body_topic': '1'})
+        })
+        return self._parse_feed_response(response, url, note_id)
+    
+    def _fetch_note_edith(self, note_id: str, url: str) -> Optional[Dict[str, Any]]:
+        """Lấy note từ endpoint feed mới của thư viện xhs (POST)"""
+        response = self._request(
+            'POST',
+            url,
+            json={
+                'source_note_id': note_id,
+                'image_formats': ['jpg', 'webp', 'avif'],
+                'extra': {'need_body_topic': '1'}
+            },
+            headers={
+                **self.headers,
+                'Content-Type': 'application/json'
+            }
+        )
+        return self._parse_feed_response(response, url, note_id)
+    
+    def _parse_feed_response(self, response: requests.Response, url: str, note_id: str) -> Optional[Dict[str, Any]]:
+        """note_card từ response của API feed"""
+        if response.status_code != 200:
+            return self._log_feed_status(response, url, note_id)
+        data = response.json()
+        if 'data' in data and 'items' in data['data'] and len(data['data']['items']) > 0:
+            self.logger.info(f"Thành công lấy thông tin note từ endpoint: {url}")
+            return data['data']['items'][0]['note_card']
+        return None
+    
+    def _log_feed_status(self, response: requests.Response, url: str, note_id: str) -> None:
+        """Ghi log lỗi HTTP của một endpoint"""
+        if response.status_code == 500:
+            self.logger.warning(f"Xiaohongshu API trả về lỗi server (500). Link có thể đã bị xóa hoặc không công khai: {note_id}")
+        elif response.status_code == 403:
+            self.logger.warning(f"Không có quyền truy cập nội dung này (403). Link có thể bị hạn chế: {note_id}")
+        elif response.status_code == 404:
+            self.logger.warning(f"Không tìm thấy nội dung (404). Link có thể đã bị xóa: {note_id}")
+        else:
+            self.logger.warning(f"Endpoint {url} trả về status: {response.status_code}")
+        return None
+    
     def sanitize_filename(self, filename: str) -> str:
         """
         Làm sạch tên file để tránh ký tự không hợp lệ
@@ -235,27 +394,122 @@ class XiaohongshuDownloader:
             filename = filename[:100]
         return filename.strip()
     
-    def download_file(self, url: str, filepath: Path) -> bool:
+    def download_file(self, url: str, filepath: Path, probe: Optional[Tuple] = None) -> Optional[Dict[str, Any]]:
         """
-        Tải xuống file từ URL
+        Tải xuống file từ URL (chia phần song song nếu server hỗ trợ Range)
+        
+        Dữ liệu được ghi vào file .part; khi lỗi sẽ thử lại (Config.XIAOHONGSHU_RETRY_COUNT lần)
+        và tải tiếp từ chỗ đã dừng. File đích chỉ xuất hiện khi đã đủ số byte.
+        Kết quả probe đã có (RangeDownloader.probe) được dùng cho lần thử đầu.
+        
+        Returns:
+            Thống kê tải {'bytes', 'resumed', 'seconds', 'parts', 'speed', 'skipped'} hoặc None nếu lỗi
         """
-        try:
-            response = self.session.get(url, stream=True)
-            response.raise_for_status()
-            
-            filepath.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            self.logger.info(f"Đã tải xuống: {filepath}")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Lỗi khi tải file {url}: {e}")
-            return False
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        attempts = max(1, config.XIAOHONGSHU_RETRY_COUNT)
+        for attempt in range(1, attempts + 1):
+            try:
+                # Lần thử lại hỏi lại server: lỗi có thể do file trên server đã đổi
+                stats = self.transfer.download(url, filepath, probe if attempt == 1 else None)
+                if stats['skipped']:
+                    self.logger.info(f"File đã tải đủ, bỏ qua: {filepath}")
+                else:
+                    self.logger.info(
+                        f"Đã tải xuống: {filepath} ({stats['bytes'] / 1048576:.1f} MB, "
+                        f"{stats['speed'] / 1048576:.2f} MB/s, {stats['parts']} phần)"
+                    )
+                return stats
+                
+            except Exception as e:
+                self.logger.error(f"Lỗi khi tải file {url} (lần {attempt}/{attempts}): {e}")
+        return None
+    
+    def download_images(self, image_list: List[Dict[str, Any]], video_dir: Path, safe_title: str) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Tải song song các ảnh của một note (tối đa Config.XIAOHONGSHU_IMAGE_WORKERS ảnh cùng lúc)
+        
+        Returns:
+            (đường dẫn các ảnh tải thành công theo thứ tự trong image_list,
+             số byte đã tải/tiết kiệm được theo SAVINGS_KEYS)
+        """
+        jobs = [
+            (image_info, video_dir / f"{safe_title}_image_{i+1}")
+            for i, image_info in enumerate(image_list)
+            if xhs_image_store.image_variants(image_info)
+        ]
+        savings = dict.fromkeys(SAVINGS_KEYS, 0)
+        if not jobs:
+            return [], savings
+        workers = min(config.XIAOHONGSHU_IMAGE_WORKERS, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='xhs_image') as pool:
+            # map giữ nguyên thứ tự ảnh dù ảnh nào tải xong trước
+            results = list(pool.map(lambda job: self._download_image(*job), jobs))
+        for _, image_savings in results:
+            for key in SAVINGS_KEYS:
+                savings[key] += image_savings[key]
+        return [path for path, _ in results if path], savings
+    
+    def _download_image(self, image_info: Dict[str, Any], stem: Path) -> Tuple[Optional[str], Dict[str, int]]:
+        """
+        Tải một ảnh: lấy từ kho nếu đã từng tải, không thì tải bản ít byte nhất và đưa vào kho
+        
+        Returns:
+            (đường dẫn ảnh hoặc None nếu lỗi, số byte đã tải/tiết kiệm được)
+        """
+        savings = dict.fromkeys(SAVINGS_KEYS, 0)
+        variants = xhs_image_store.image_variants(image_info)
+        key = xhs_image_store.image_key(variants[0])
+        
+        known = self.image_store.link_known(key, stem)
+        if known:
+            size = known.stat().st_size
+            savings['dedup_bandwidth_bytes'] = size
+            savings['dedup_storage_bytes'] = size
+            return str(known), savings
+        
+        url, savings['format_saved_bytes'], probe = self._pick_image_variant(variants)
+        image_path = stem.parent / f"{stem.name}.{xhs_image_store.url_format(url) or 'jpg'}"
+        stats = self.download_file(url, image_path, probe)
+        if not stats:
+            return None, savings
+        savings['downloaded_bytes'] = stats['bytes']
+        image_path, duplicate = self.image_store.add(image_path, key)
+        if duplicate:
+            savings['dedup_storage_bytes'] = image_path.stat().st_size
+        return str(image_path), savings
+    
+    def _pick_image_variant(self, variants: List[str]) -> Tuple[str, int, Optional[Tuple]]:
+        """
+        Chọn bản ảnh ít byte nhất (hỏi song song kích thước từng định dạng bằng request một byte);
+        bản không rõ kích thước xếp sau, hoà thì theo Config.XIAOHONGSHU_IMAGE_FORMATS
+        
+        Returns:
+            (URL được chọn, số byte ít hơn so với bản mặc định,
+             kết quả probe của URL được chọn để lúc tải không phải hỏi lại, hoặc None)
+        """
+        preference = config.XIAOHONGSHU_IMAGE_FORMATS
+        
+        def rank(url):
+            fmt = xhs_image_store.url_format(url)
+            return preference.index(fmt) if fmt in preference else len(preference)
+        
+        if len(variants) == 1 or not config.XIAOHONGSHU_PROBE_IMAGE_VARIANTS:
+            return min(variants, key=rank), 0, None
+        
+        def probe(url):
+            try:
+                return self.transfer.probe(url)
+            except Exception as e:
+                self.logger.debug(f"Không hỏi được kích thước ảnh {url}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=len(variants), thread_name_prefix='xhs_image_probe') as pool:
+            probes = dict(zip(variants, pool.map(probe, variants)))
+        sizes = {url: result[0] if result else None for url, result in probes.items()}
+        chosen = min(variants, key=lambda url: (sizes[url] is None, sizes[url] or 0, rank(url)))
+        default_size, chosen_size = sizes[variants[0]], sizes[chosen]
+        saved = default_size - chosen_size if default_size and chosen_size else 0
+        return chosen, saved, probes[chosen]
     
     def download_video(self, url: str, progress_callback=None) -> Dict[str, Any]:
         """
@@ -317,19 +571,17 @@ class XiaohongshuDownloader:
                     video_filename = f"{safe_title}.mp4"
                     video_path = video_dir / video_filename
                     
-                    if self.download_file(video_url, video_path):
+                    stats = self.download_file(video_url, video_path)
+                    if stats:
                         downloaded_files.append(str(video_path))
+                        if progress_callback and not stats['skipped']:
+                            progress_callback(f"Đã tải video {stats['bytes'] / 1048576:.1f} MB "
+                                              f"({stats['speed'] / 1048576:.2f} MB/s, {stats['parts']} phần)")
             
             # Tải hình ảnh nếu có
             if 'image_list' in note_info:
-                for i, image_info in enumerate(note_info['image_list']):
-                    if 'url_default' in image_info:
-                        image_url = image_info['url_default']
-                        image_filename = f"{safe_title}_image_{i+1}.jpg"
-                        image_path = video_dir / image_filename
-                        
-                        if self.download_file(image_url, image_path):
-                            downloaded_files.append(str(image_path))
+                image_files, result['image_savings'] = self.download_images(note_info['image_list'], video_dir, safe_title)
+                downloaded_files.extend(image_files)
             
             if downloaded_files:
                 result['success'] = True
@@ -349,6 +601,45 @@ class XiaohongshuDownloader:
         
         return result
     
+    def download_batch(self, urls: List[str], progress_callback=None,
+                       max_workers: int = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Tải nhiều URL song song qua một pool worker giới hạn
+        
+        Args:
+            urls: Danh sách URL Xiaohongshu
+            progress_callback: Hàm nhận (url, message) để báo tiến độ từng URL
+            max_workers: Số URL xử lý cùng lúc (mặc định Config.XIAOHONGSHU_MAX_WORKERS)
+        
+        Yields:
+            (url, result) theo thứ tự hoàn thành; result giống download_video()
+        
+        Sau khi hết lô, self.last_batch_savings chứa tổng số byte ảnh đã tải/tiết kiệm được của lô
+        """
+        def download(url):
+            callback = (lambda message: progress_callback(url, message)) if progress_callback else None
+            return self.download_video(url, callback)
+        
+        max_workers = max_workers or config.XIAOHONGSHU_MAX_WORKERS
+        # Đổi trước cả lô link rút gọn song song, download_video sau đó lấy note ID từ cache
+        self.link_resolver.resolve_many(urls, max_workers)
+        savings = dict.fromkeys(SAVINGS_KEYS, 0)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='xhs_download') as pool:
+            futures = {pool.submit(download, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.error(f"Lỗi khi tải {url}: {e}")
+                    result = {'success': False, 'message': f"Lỗi: {str(e)}", 'files': [], 'title': '', 'author': ''}
+                for key, value in result.get('image_savings', {}).items():
+                    savings[key] += value
+                yield url, result
+        self.last_batch_savings = savings
+        if savings['downloaded_bytes'] or savings['dedup_storage_bytes']:
+            self.logger.info(xhs_image_store.describe_savings(savings))
+    
     def is_xiaohongshu_url(self, url: str) -> bool:
         """
         Kiểm tra xem URL có phải là URL Xiaohongshu không